@@ -2,20 +2,34 @@
 Configuration constants and settings for the AI Strategy Factory.
 """
 
+import os
 from pathlib import Path
 from enum import Enum
 from typing import Dict, List
 
+from dotenv import load_dotenv
+
 # Base paths
 PROJECT_ROOT = Path(__file__).parent.parent
 OUTPUT_DIR = PROJECT_ROOT / "output"
 TLDR_GUIDES_DIR = PROJECT_ROOT / "Consulting Guides TLDR"
 PROGRESS_DIR = PROJECT_ROOT / "progress"
 
+# Settings below are read from the environment at import time, and entry
+# points import this module before they load .env themselves
+load_dotenv(PROJECT_ROOT / ".env")
+
+# Global research query cache, shared by every company and analysis version
+RESEARCH_CACHE_DIR = Path(os.getenv("RESEARCH_CACHE_DIR", OUTPUT_DIR / ".cache" / "research"))
+
 # API Configuration
 GEMINI_MODEL = "gemini-2.5-flash"
 GEMINI_REQUEST_DELAY = 5  # seconds between requests
 
+# Identical Perplexity/Gemini requests in flight at the same time (e.g. from
+# concurrent jobs) share one upstream call
+COALESCE_API_REQUESTS = os.getenv("COALESCE_API_REQUESTS", "true").lower() not in ("0", "false", "no")
+
 # Perplexity models and their use cases
 class PerplexityModel(str, Enum):
     SONAR = "sonar"
@@ -258,5 +272,149 @@ RETRY_CONFIG = {
     "max_retries": 3,
     "initial_delay": 5,
     "max_delay": 60,
-    "backoff_multiplier": 2
+    "backoff_multiplier": 2,
+    "jitter": 0.25,  # Random spread applied to each backoff delay (fraction)
+}
+
+# Per-provider circuit breaker: after repeated transient failures, or at once
+# on an invalid key or exhausted quota, calls fail fast until the reset timeout
+CIRCUIT_BREAKER_CONFIG = {
+    "failure_threshold": 5,  # Consecutive retryable failures that open the circuit
+    "reset_timeout": 60,     # Seconds before a single probe call is allowed
+}
+
+# Perplexity rate limit (token bucket shared by all clients in a process)
+PERPLEXITY_RATE_LIMIT = {
+    "requests_per_second": 1.0,
+    "burst": 1,
+    # Optional file path to share the bucket across worker processes on
+    # the same host (POSIX only)
+    "lock_file": os.getenv("PERPLEXITY_RATE_LIMIT_FILE"),
+}
+
+# API credential pools: set PERPLEXITY_API_KEYS / GEMINI_API_KEYS to a
+# comma-separated list of keys to spread requests across them. Each key gets
+# its own rate limit; requests go to the key with the most capacity left, and
+# keys returning quota or auth errors are sidelined for sideline_seconds.
+# With a single key (in either variable), the clients use it directly.
+CREDENTIAL_POOLS = {
+    "perplexity": {
+        "env": "PERPLEXITY_API_KEYS",
+        "requests_per_second": PERPLEXITY_RATE_LIMIT["requests_per_second"],
+        "burst": PERPLEXITY_RATE_LIMIT["burst"],
+        "sideline_seconds": 900,
+        "lock_file": PERPLEXITY_RATE_LIMIT["lock_file"],  # One bucket file per key
+    },
+    "gemini": {
+        "env": "GEMINI_API_KEYS",
+        "requests_per_second": 1 / GEMINI_REQUEST_DELAY,
+        "burst": 1,
+        "sideline_seconds": 900,
+        "lock_file": None,
+    },
+}
+
+# Research query concurrency
+RESEARCH_CONCURRENCY = {
+    "max_in_flight": 4,  # Research requests in flight at once (1 = sequential)
+    "batch_size": 5,     # Compatible queries packed per multi-query request (1 = no batching)
+}
+
+# Research budget: in the listed modes, a section's follow-up queries (e.g.
+# competitor_ai) wait for the queries that score its confidence (e.g.
+# competitors_list) and are skipped or downgraded to sonar once the section
+# reaches the target. Lower targets cut more calls; waiting adds latency.
+# Off by default: confidence is scored from result counts, which a normal
+# response already maxes out, so any target would trim every follow-up.
+RESEARCH_BUDGET_CONFIG = {
+    "target_confidence": float(os.getenv("RESEARCH_TARGET_CONFIDENCE", 0)),  # 0 = disabled
+    "on_target": os.getenv("RESEARCH_ON_TARGET", "downgrade"),  # downgrade | skip
+    "downgrade_model": PerplexityModel.SONAR,
+    "modes": [ResearchMode.COMPREHENSIVE],
+}
+
+# Model selection under a per-run budget (0 disables a budget). The selector
+# steps down to faster/cheaper models when a model's latency percentile would
+# overrun the time left, its error rate is too high, or its cost would exceed
+# what is left of the budget. Latency, error rate and cost come from rolling
+# per-model call statistics (persisted to stats_file); a model with fewer
+# than min_samples calls uses its (p50, p95) latency prior in seconds.
+MODEL_SELECTION_CONFIG = {
+    "latency_budget_seconds": float(os.getenv("RESEARCH_LATENCY_BUDGET", 0)),
+    "cost_budget": float(os.getenv("RESEARCH_COST_BUDGET", 0)),  # USD per run
+    "latency_percentile": 95,
+    "max_error_rate": 0.5,
+    "stats_window": 50,  # Calls kept per model
+    "min_samples": 5,
+    "stats_file": RESEARCH_CACHE_DIR / "model_stats.json",
+    "latency_priors": {
+        PerplexityModel.SONAR: (2.0, 5.0),
+        PerplexityModel.SONAR_PRO: (4.0, 10.0),
+        PerplexityModel.SONAR_REASONING: (6.0, 15.0),
+        PerplexityModel.SONAR_REASONING_PRO: (10.0, 25.0),
+        PerplexityModel.SONAR_DEEP_RESEARCH: (60.0, 180.0),
+    },
+}
+
+# Hedged Perplexity requests (opt-in): a request still running after the
+# model's observed latency percentile gets one duplicate, and whichever
+# answers first is used. Duplicates are capped at max_rate of all requests
+# in the process, so the extra cost stays bounded.
+PERPLEXITY_HEDGING = {
+    "enabled": os.getenv("PERPLEXITY_HEDGING", "false").lower() in ("1", "true", "yes"),
+    "latency_percentile": 90,
+    "max_rate": float(os.getenv("PERPLEXITY_HEDGE_MAX_RATE", 0.1)),
+    "min_delay_seconds": 1.0,
+    "workers": 16,  # Threads running PerplexityClient's duplicate requests
+    "request_workers": 32,  # Threads running the originals of its hedged requests
+}
+
+# Competitor enrichment: once competitors_list lands, one cached profile query
+# per detected competitor runs alongside the rest of research. Enrichments
+# still running at the deadline are dropped rather than awaited.
+COMPETITOR_ENRICHMENT_CONFIG = {
+    "enabled": os.getenv("COMPETITOR_ENRICHMENT", "true").lower() not in ("0", "false", "no"),
+    "max_competitors": 5,
+    "deadline_seconds": float(os.getenv("COMPETITOR_ENRICHMENT_DEADLINE", 20)),  # From launch
+    "model": PerplexityModel.SONAR,
+    "modes": [ResearchMode.COMPREHENSIVE],
+}
+
+# Background deep research: queries routed to sonar-deep-research are first
+# answered with the fast model so synthesis can start; the deep answer keeps
+# running and, once collected, patches the research and the deliverables
+# that used the changed sections are regenerated.
+DEEP_RESEARCH_BACKGROUND = {
+    "enabled": os.getenv("DEEP_RESEARCH_BACKGROUND", "false").lower() in ("1", "true", "yes"),
+    "fast_model": PerplexityModel.SONAR,
+    # Deep answers are awaited after synthesis until this observed latency
+    # percentile of the deep model has passed since each was sent
+    "latency_percentile": 95,
+    "workers": 16,  # Threads running the sync orchestrator's deep queries (all of a plan's at once)
+    "modes": [ResearchMode.COMPREHENSIVE],
+}
+
+# Research query cache: expired entries are still served for a grace window
+# (a fraction of their TTL, capped) while they are refreshed in the background.
+# The store is capped by entry count and bytes (least recently used entries
+# are evicted) and entries past their grace window are swept periodically.
+RESEARCH_CACHE_CONFIG = {
+    "stale_grace_ratio": float(os.getenv("RESEARCH_CACHE_STALE_GRACE_RATIO", 1.0)),  # 0 = disabled
+    "max_stale_grace_hours": 168,
+    "refresh_workers": 2,  # Background refresh threads per process
+    "max_entries": int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", 50_000)),  # 0 = unbounded
+    "max_bytes": int(os.getenv("RESEARCH_CACHE_MAX_BYTES", 512 * 1024 * 1024)),  # 0 = unbounded
+    "sweep_interval_seconds": 600,  # Background expiry sweep (0 = disabled)
+}
+
+# API record/replay: "record" stores every Perplexity/Gemini request and
+# response as a fixture; "replay" serves them offline without API keys
+_replay_seed = os.getenv("API_REPLAY_SEED")
+API_REPLAY_CONFIG = {
+    "mode": os.getenv("API_REPLAY_MODE", "off"),  # off | record | replay
+    "fixture_dir": Path(os.getenv("API_FIXTURE_DIR", OUTPUT_DIR / ".fixtures")),
+    "latency_ms": float(os.getenv("API_REPLAY_LATENCY_MS", 0)),        # Added per replayed call
+    "latency_jitter_ms": float(os.getenv("API_REPLAY_JITTER_MS", 0)),  # Random spread on the latency
+    "error_rate": float(os.getenv("API_REPLAY_ERROR_RATE", 0)),        # Fraction of calls failing with 503
+    "seed": int(_replay_seed) if _replay_seed else None,
 }
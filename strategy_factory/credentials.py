@@ -0,0 +1,283 @@
+"""
+API credential pools for the upstream API clients.
+
+With a single API key, throughput is capped at that key's quota. A
+CredentialPool holds several keys for one provider, each with its own
+token bucket, and hands every request the key with the most capacity
+left. A key that fails with a quota or auth error is sidelined for a
+while and the request moves on to the next key, so one exhausted key
+does not open the provider's circuit breaker for all of them.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .config import CREDENTIAL_POOLS
+from .retry_policy import ErrorKind, classify_error
+
+T = TypeVar("T")
+
+
+class NoCredentialsError(Exception):
+    """Raised when every key in a pool is sidelined."""
+
+    def __init__(self, provider: str, retry_in: float):
+        self.provider = provider
+        self.retry_in = retry_in
+        # Worded so classify_error treats it as provider-wide (fatal)
+        super().__init__(
+            f"All {provider} API keys are sidelined after quota or auth errors; "
+            f"next available in {retry_in:.0f}s"
+        )
+
+
+class _PooledKey:
+    """One key in a pool, with its rate limit and usage counters."""
+
+    def __init__(self, key: str, limiter: Any):
+        self.key = key
+        self.limiter = limiter
+        self.sidelined_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.sidelined = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Masked key for logs and reports."""
+        return f"...{self.key[-4:]}"
+
+
+class CredentialPool:
+    """
+    Thread-safe pool of API keys for one provider.
+
+    Use call() / call_async() to run a request with a key: they wait for the
+    chosen key's rate limit, and on a quota or auth error sideline the key
+    and retry right away with another one.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        keys: List[str],
+        requests_per_second: float,
+        burst: int = 1,
+        sideline_seconds: float = 900.0,
+        lock_file: Optional[Path] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            provider: Provider name, used in errors and reports.
+            keys: API keys (duplicates are ignored).
+            requests_per_second: Sustained request rate allowed per key.
+            burst: Requests each key can send back to back.
+            sideline_seconds: How long a key that hit a quota or auth error
+                is left out.
+            lock_file: Optional path prefix for sharing each key's bucket
+                across processes on the same host (one file per key, named
+                by a hash of the key).
+        """
+        # Imported here: the research package imports this module
+        from .research.rate_limiter import TokenBucketRateLimiter
+
+        keys = list(dict.fromkeys(k for k in keys if k))
+        if not keys:
+            raise ValueError(f"No {provider} API keys given")
+
+        self.provider = provider
+        self.sideline_seconds = sideline_seconds
+        self._keys = [
+            _PooledKey(key, TokenBucketRateLimiter(
+                requests_per_second,
+                burst,
+                lock_file=self._key_lock_file(lock_file, key),
+            ))
+            for key in keys
+        ]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key_lock_file(lock_file: Optional[Path], key: str) -> Optional[Path]:
+        """Per-key bucket file under a lock file prefix, without the key in its name."""
+        if not lock_file:
+            return None
+        digest = hashlib.sha256(key.encode()).hexdigest()[:12]
+        return Path(f"{lock_file}.{digest}")
+
+    @property
+    def keys(self) -> List[str]:
+        """All keys in the pool, in configured order."""
+        return [entry.key for entry in self._keys]
+
+    def _reserve(self) -> Tuple[str, float]:
+        """
+        Pick the key with the most capacity left and reserve a request on it.
+
+        With lock-file buckets, capacity includes requests other processes
+        have sent with the key.
+
+        Returns:
+            Tuple of (key, seconds to wait before sending).
+
+        Raises:
+            NoCredentialsError: If every key is sidelined.
+        """
+        with self._lock:
+            now = time.time()
+            active = [entry for entry in self._keys if entry.sidelined_until <= now]
+            if not active:
+                retry_in = min(entry.sidelined_until for entry in self._keys) - now
+                raise NoCredentialsError(self.provider, retry_in)
+
+            entry = max(active, key=lambda e: (e.limiter.available(), -e.requests))
+            entry.requests += 1
+            return entry.key, entry.limiter.reserve()
+
+    def acquire(self) -> str:
+        """Block until a key may send a request, and return it."""
+        key, wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return key
+
+    async def acquire_async(self) -> str:
+        """Wait, without blocking the event loop, for a key and return it."""
+        # File-locked per-key buckets can block in flock(), so reserve off the loop
+        if self._keys[0].limiter.lock_file:
+            key, wait = await asyncio.to_thread(self._reserve)
+        else:
+            key, wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return key
+
+    def report_failure(self, key: str, error: BaseException) -> bool:
+        """
+        Record a failed request, sidelining the key on quota or auth errors.
+
+        Args:
+            key: Key the request was sent with.
+            error: Exception raised by the request.
+
+        Returns:
+            True if the key was sidelined and the request can move to another key.
+        """
+        sideline = classify_error(error) == ErrorKind.FATAL
+        with self._lock:
+            entry = next(e for e in self._keys if e.key == key)
+            entry.failures += 1
+            entry.last_error = str(error)
+            if sideline:
+                entry.sidelined += 1
+                entry.sidelined_until = time.time() + self.sideline_seconds
+
+        if sideline:
+            print(f"Warning: {self.provider} key {entry.label} sidelined: {error}")
+        return sideline
+
+    def call(self, fn: Callable[[str], T]) -> T:
+        """
+        Run a request with a key from the pool.
+
+        Args:
+            fn: Function making one API request with the given key.
+
+        Returns:
+            The function's result.
+
+        Raises:
+            NoCredentialsError: If every key is sidelined.
+            Exception: The request's error, if it is not a quota or auth error.
+        """
+        while True:
+            key = self.acquire()
+            try:
+                return fn(key)
+            except Exception as e:
+                if not self.report_failure(key, e):
+                    raise
+
+    async def call_async(self, fn: Callable[[str], Awaitable[T]]) -> T:
+        """Async version of call()."""
+        while True:
+            key = await self.acquire_async()
+            try:
+                return await fn(key)
+            except Exception as e:
+                if not self.report_failure(key, e):
+                    raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-key usage, with keys masked."""
+        with self._lock:
+            now = time.time()
+            return {
+                "provider": self.provider,
+                "keys": [
+                    {
+                        "key": entry.label,
+                        "requests": entry.requests,
+                        "failures": entry.failures,
+                        "times_sidelined": entry.sidelined,
+                        "status": "sidelined" if entry.sidelined_until > now else "active",
+                        "last_error": entry.last_error,
+                    }
+                    for entry in self._keys
+                ],
+            }
+
+
+_pools: Dict[str, Optional[CredentialPool]] = {}
+_pools_lock = threading.Lock()
+
+
+def configured_keys(provider: str) -> List[str]:
+    """
+    Get the distinct keys listed in a provider's keys variable.
+
+    Args:
+        provider: Provider name (a key of CREDENTIAL_POOLS).
+
+    Returns:
+        Keys from the comma-separated variable (e.g. PERPLEXITY_API_KEYS),
+        in order, without duplicates.
+    """
+    value = os.getenv(CREDENTIAL_POOLS[provider]["env"], "")
+    return list(dict.fromkeys(k.strip() for k in value.split(",") if k.strip()))
+
+
+def get_credential_pool(provider: str) -> Optional[CredentialPool]:
+    """
+    Get the process-wide credential pool for a provider.
+
+    Args:
+        provider: Provider name (a key of CREDENTIAL_POOLS).
+
+    Returns:
+        The shared CredentialPool built from the provider's comma-separated
+        keys variable (e.g. PERPLEXITY_API_KEYS) on first use, or None when
+        fewer than two keys are configured (clients then use the single key
+        directly, see configured_keys()).
+    """
+    with _pools_lock:
+        if provider not in _pools:
+            config = CREDENTIAL_POOLS[provider]
+            keys = configured_keys(provider)
+            _pools[provider] = CredentialPool(
+                provider,
+                keys,
+                requests_per_second=config["requests_per_second"],
+                burst=config["burst"],
+                sideline_seconds=config["sideline_seconds"],
+                lock_file=config["lock_file"],
+            ) if len(keys) > 1 else None
+        return _pools[provider]
@@ -21,7 +21,13 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
 
-from strategy_factory.config import OUTPUT_DIR, DELIVERABLES
+from strategy_factory.config import (
+    OUTPUT_DIR,
+    DELIVERABLES,
+    RESEARCH_CONCURRENCY,
+    DEEP_RESEARCH_BACKGROUND,
+)
+from strategy_factory.credentials import get_credential_pool
 from strategy_factory.models import (
     CompanyInput,
     ResearchMode,
@@ -29,7 +35,10 @@ from strategy_factory.models import (
     DeliverableStatus,
 )
 from strategy_factory.progress_tracker import ProgressTracker, slugify
+from strategy_factory.replay import ReplayMode, configure_api_recorder, get_api_recorder
+from strategy_factory.research.model_selector import ModelSelector
 from strategy_factory.research.orchestrator import ResearchOrchestrator
+from strategy_factory.research.query_templates import QueryTemplates
 from strategy_factory.synthesis.orchestrator import SynthesisOrchestrator
 from strategy_factory.generation.orchestrator import GenerationOrchestrator
 
@@ -53,6 +62,9 @@ class StrategyFactoryCLI:
 
     def __init__(self):
         self.parser = self._create_parser()
+        # Research still running deep queries, and the synthesis they may patch
+        self._deep_research: Optional[ResearchOrchestrator] = None
+        self._synthesis: Optional[SynthesisOrchestrator] = None
 
     def _create_parser(self) -> argparse.ArgumentParser:
         """Create the argument parser with all commands."""
@@ -74,6 +86,10 @@ Examples:
   # Dry run to see what would be generated
   python -m strategy_factory.main run "Acme Corp" --dry-run
 
+  # Record API calls, then replay them offline (e.g. for benchmarking)
+  python -m strategy_factory.main run "Acme Corp" --record fixtures/acme
+  python -m strategy_factory.main run "Acme Corp" --replay fixtures/acme --replay-latency-ms 800
+
   # Resume from checkpoint
   python -m strategy_factory.main resume "Acme Corp"
 
@@ -138,6 +154,31 @@ Examples:
             action="store_true",
             help="Enable verbose output",
         )
+        fixture_group = run_parser.add_mutually_exclusive_group()
+        fixture_group.add_argument(
+            "--record",
+            type=Path,
+            metavar="DIR",
+            help="Record every API request/response pair as a fixture in DIR",
+        )
+        fixture_group.add_argument(
+            "--replay",
+            type=Path,
+            metavar="DIR",
+            help="Serve API calls from fixtures in DIR instead of the live APIs",
+        )
+        run_parser.add_argument(
+            "--replay-latency-ms",
+            type=float,
+            default=None,
+            help="Latency added to each replayed API call",
+        )
+        run_parser.add_argument(
+            "--replay-error-rate",
+            type=float,
+            default=None,
+            help="Fraction of replayed API calls that fail with a transient error",
+        )
 
         # Resume command
         resume_parser = subparsers.add_parser(
@@ -231,8 +272,11 @@ Examples:
         if args.dry_run:
             return self._dry_run(company_name, mode, args.context, args.industry)
 
-        # Check for API keys
-        if not self._check_api_keys():
+        # Record/replay mode (must be set before any API client is created)
+        self._configure_replay(args)
+
+        # Check for API keys (not needed when replaying fixtures)
+        if not get_api_recorder().replaying and not self._check_api_keys():
             return 1
 
         # Create company input
@@ -269,6 +313,11 @@ Examples:
                 print("Skipping synthesis phase (using cached deliverables).")
                 synthesis_output = None
 
+            # Patch in background deep research and regenerate what it changed
+            research_output = self._apply_deep_research(
+                tracker, company_input, research_output, synthesis_output
+            )
+
             # Phase 3: Document Generation
             if not args.skip_generation and synthesis_output:
                 result = self._run_generation(tracker, company_input, research_output, synthesis_output)
@@ -353,6 +402,11 @@ Examples:
                 # Reconstruct synthesis output from files
                 synthesis_output = self._load_synthesis_from_files(tracker)
 
+            # Patch in background deep research and regenerate what it changed
+            research_output = self._apply_deep_research(
+                tracker, company_input, research_output, synthesis_output
+            )
+
             # Check if final documents are generated
             final_deliverables = ["executive_summary_deck", "full_findings_presentation",
                                   "final_strategy_report", "statement_of_work"]
@@ -500,12 +554,13 @@ Examples:
         try:
             orchestrator = ResearchOrchestrator(
                 mode=mode,
-                cache_dir=Path(tracker.output_dir),
                 progress_callback=progress_callback,
+                background_deep_research=DEEP_RESEARCH_BACKGROUND["enabled"],
             )
 
             research_output = orchestrator.research(company_input)
             print()  # New line after progress bar
+            self._deep_research = orchestrator if orchestrator.deep_research else None
 
             # Save research output
             tracker.save_research_output(research_output)
@@ -519,6 +574,25 @@ Examples:
             print(f"\n  ✓ Research complete")
             print(f"    Queries: {len(orchestrator.results)}")
             print(f"    Cost: ${cost_summary['total_cost']:.4f}")
+            cache_report = orchestrator.get_cache_report()
+            print(f"    Cache: {cache_report['hits']} hits / {cache_report['misses']} misses"
+                  f" (saved ~${cache_report['estimated_savings']:.4f})")
+            if cache_report['stale_hits']:
+                print(f"    Stale hits: {cache_report['stale_hits']} (refreshing in background)")
+            if cost_summary['hedged_requests']:
+                print(f"    Hedged: {cost_summary['hedged_requests']} requests, "
+                      f"{cost_summary['hedge_wins']} won (${cost_summary['hedge_cost']:.4f})")
+            self._print_key_usage("perplexity")
+            if orchestrator.trimmed_queries:
+                trimmed = ", ".join(f"{name} ({action})" for name, action in orchestrator.trimmed_queries.items())
+                print(f"    Early exit: {trimmed}")
+            if orchestrator.dropped_enrichments:
+                prefix = len(orchestrator.result_processor.COMPETITOR_PROFILE_PREFIX)
+                dropped = ", ".join(name[prefix:] for name in orchestrator.dropped_enrichments)
+                print(f"    Enrichment dropped (deadline or error): {dropped}")
+            if orchestrator.deep_research:
+                print(f"    Deep research: {len(orchestrator.deep_research)} queries "
+                      f"running in background (fast answers used for now)")
             print(f"    Info Tier: {research_output.information_tier.value}")
             print()
 
@@ -557,6 +631,7 @@ Examples:
 
             synthesis_output = orchestrator.synthesize(company_input, research)
             print()  # New line after progress bar
+            self._synthesis = orchestrator
 
             # Save deliverables
             file_paths = orchestrator.save_deliverables(tracker.company_slug)
@@ -577,6 +652,7 @@ Examples:
             print(f"    Cost: ${cost_summary['total_cost']:.4f}")
             if orchestrator.errors:
                 print(f"    Errors: {len(orchestrator.errors)}")
+            self._print_key_usage("gemini")
             print()
 
             return synthesis_output
@@ -586,6 +662,50 @@ Examples:
             tracker.fail_phase("synthesis", str(e))
             raise
 
+    def _apply_deep_research(
+        self,
+        tracker: ProgressTracker,
+        company_input: CompanyInput,
+        research: ResearchOutput,
+        synthesis_output=None,
+    ) -> ResearchOutput:
+        """Patch background deep research in and regenerate the deliverables it changed."""
+        orchestrator, self._deep_research = self._deep_research, None
+        if orchestrator is None:
+            return research
+
+        print("Deep Research")
+        print("-" * 40)
+        print(f"  Waiting for {len(orchestrator.deep_research)} deep-research queries...")
+
+        updated, research = orchestrator.collect_deep_research()
+        tracker.save_research_output(research)
+        orchestrator.save_research_cache(Path(tracker.output_dir))
+
+        print(f"  ✓ Patched sections: {', '.join(sorted(updated)) or 'none'}")
+        if orchestrator.dropped_deep_research:
+            print(f"    Kept fast answers: {', '.join(orchestrator.dropped_deep_research)}")
+
+        synthesis = self._synthesis
+        if synthesis is not None and updated:
+            cost_before = synthesis.gemini_client.total_cost
+            regenerated = synthesis.regenerate_stale(company_input, research, updated)
+            print()  # New line after progress bar
+
+            file_paths = synthesis.save_deliverables(tracker.company_slug)
+            for d_id in regenerated:
+                tracker.complete_deliverable(d_id, file_paths[d_id])
+            tracker.add_cost(synthesis.gemini_client.total_cost - cost_before, "synthesis")
+            if synthesis_output is not None:
+                for d_id in regenerated:
+                    synthesis_output.deliverables[d_id] = synthesis.generated_content[d_id]
+                synthesis_output.total_cost = synthesis.gemini_client.total_cost
+
+            print(f"  ✓ Regenerated: {', '.join(regenerated) or 'none'}")
+        print()
+
+        return research
+
     def _run_generation(
         self,
         tracker: ProgressTracker,
@@ -651,14 +771,45 @@ Examples:
     # Helper Methods
     # ========================================================================
 
+    def _configure_replay(self, args) -> None:
+        """Set up API record/replay from command line options."""
+        options = {}
+        if args.replay_latency_ms is not None:
+            options["latency_ms"] = args.replay_latency_ms
+        if args.replay_error_rate is not None:
+            options["error_rate"] = args.replay_error_rate
+
+        if args.record:
+            configure_api_recorder(ReplayMode.RECORD, args.record, **options)
+        elif args.replay:
+            configure_api_recorder(ReplayMode.REPLAY, args.replay, **options)
+        elif options:
+            recorder = get_api_recorder()
+            configure_api_recorder(recorder.mode, recorder.fixture_dir, **options)
+
+        recorder = get_api_recorder()
+        if recorder.enabled:
+            print(f"API {recorder.mode.value} mode: fixtures in {recorder.fixture_dir}\n")
+
+    def _print_key_usage(self, provider: str) -> None:
+        """Print per-key usage when a provider's credential pool is in use."""
+        pool = get_credential_pool(provider)
+        if pool is None:
+            return
+
+        for key in pool.get_stats()["keys"]:
+            print(f"    Key {key['key']}: {key['requests']} requests, "
+                  f"{key['failures']} failures ({key['status']})")
+
     def _check_api_keys(self) -> bool:
         """Check if required API keys are set."""
         missing = []
 
-        if not os.getenv("PERPLEXITY_API_KEY"):
+        # A comma-separated key pool (e.g. PERPLEXITY_API_KEYS) also counts
+        if not (os.getenv("PERPLEXITY_API_KEY") or os.getenv("PERPLEXITY_API_KEYS")):
             missing.append("PERPLEXITY_API_KEY")
 
-        if not os.getenv("GEMINI_API_KEY"):
+        if not (os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEYS")):
             missing.append("GEMINI_API_KEY")
 
         if missing:
@@ -686,17 +837,32 @@ Examples:
         print("Pipeline Overview:")
         print("-" * 40)
 
-        # Research phase
-        print("\n1. RESEARCH PHASE")
-        print(f"   Mode: {mode.value}")
+        # Research phase: estimated from observed model latency/cost
+        templates = QueryTemplates()
         if mode == ResearchMode.QUICK:
-            print("   Queries: ~9 queries (essential info only)")
-            print("   Models: sonar")
-            print("   Est. Cost: ~$0.01-0.05")
+            planned = templates.get_quick_mode_templates()
         else:
-            print("   Queries: ~18 queries (comprehensive)")
-            print("   Models: sonar, sonar-pro, sonar-deep-research")
-            print("   Est. Cost: ~$0.30-0.80")
+            planned = templates.get_comprehensive_templates()
+        selector = ModelSelector(mode=mode)
+        concurrency = RESEARCH_CONCURRENCY["max_in_flight"]
+        estimate = selector.estimate_total_cost(
+            [t.category for t in planned],
+            queries_per_category=1,
+            concurrency=concurrency,
+        )
+        models = sorted({selector.select_model(t.category).model.value for t in planned})
+        research_cost = estimate["total"]
+
+        print("\n1. RESEARCH PHASE")
+        print(f"   Mode: {mode.value}")
+        print(f"   Queries: {len(planned)} queries")
+        print(f"   Models: {', '.join(models)}")
+        print(f"   Est. Cost: ~${research_cost:.2f}")
+        print(f"   Est. Time: ~{estimate['predicted_seconds']:.0f}s ({concurrency} requests in flight)")
+        if selector.latency_budget > 0:
+            print(f"   Latency Budget: {selector.latency_budget:.0f}s")
+        if selector.cost_budget > 0:
+            print(f"   Cost Budget: ${selector.cost_budget:.2f}")
 
         # Synthesis phase
         print("\n2. SYNTHESIS PHASE")
@@ -733,16 +899,10 @@ Examples:
 
         # Total estimates
         print("\nTotal Estimated Cost:")
-        if mode == ResearchMode.QUICK:
-            print("   Research: ~$0.01-0.05")
-            print("   Synthesis: ~$0.01-0.10")
-            print("   ─────────────────────")
-            print("   Total: ~$0.02-0.15")
-        else:
-            print("   Research: ~$0.30-0.80")
-            print("   Synthesis: ~$0.01-0.10")
-            print("   ─────────────────────")
-            print("   Total: ~$0.31-0.90")
+        print(f"   Research: ~${research_cost:.2f}")
+        print("   Synthesis: ~$0.01-0.10")
+        print("   ─────────────────────")
+        print(f"   Total: ~${research_cost + 0.01:.2f}-{research_cost + 0.10:.2f}")
 
         print("\nTo execute, remove the --dry-run flag.")
         return 0
@@ -791,6 +951,12 @@ Examples:
         print(f"\nDeliverables: {summary['deliverables']['completed']}/{summary['deliverables']['total']}")
         print(f"Total Cost: ${summary['costs']['total']:.4f}")
 
+        replay_stats = get_api_recorder().get_stats()
+        if replay_stats['mode'] != ReplayMode.OFF.value:
+            print(f"API {replay_stats['mode']}: {replay_stats['recorded']} recorded, "
+                  f"{replay_stats['replayed']} replayed, "
+                  f"{replay_stats['injected_errors']} injected errors")
+
         if summary['errors']:
             print(f"\nWarnings/Errors: {len(summary['errors'])}")
             for err in summary['errors']:
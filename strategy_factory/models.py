@@ -11,7 +11,8 @@ These models define the structure for:
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from enum import Enum
-from pydantic import BaseModel, Field
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from pydantic import BaseModel, Field, field_serializer, field_validator
 
 
 # ============================================================================
@@ -93,6 +94,97 @@ class QueryResult(BaseModel):
     error: Optional[str] = None
 
 
+# Query parameters that identify a visit rather than a page (plus any utm_*)
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a source URL so variants of the same page compare equal.
+
+    Drops the scheme, a leading "www.", the fragment, tracking parameters
+    and trailing slashes, and lowercases the host.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    params = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+    ]
+    normalized = host + (parts.path.rstrip("/") or "")
+    if params:
+        normalized += "?" + urlencode(sorted(params))
+    return normalized
+
+
+def compact_query_results(
+    results: List[QueryResult],
+    max_snippet_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Serialize query results with sources deduplicated across queries.
+
+    Each page (by normalized URL) and each distinct snippet is stored once;
+    queries keep an ordered list of [source index, snippet index] references,
+    so every query's attribution is preserved. Results without a URL cannot
+    be matched to a page, so each keeps a source entry of its own.
+
+    Args:
+        results: Query results to serialize.
+        max_snippet_chars: Optional truncation applied to snippets.
+
+    Returns:
+        JSON-serializable dict with "sources", "snippets" and "queries".
+    """
+    sources: Dict[str, int] = {}
+    source_list: List[Dict[str, Any]] = []
+    snippets: Dict[str, int] = {}
+    queries = []
+
+    for query_result in results:
+        refs = []
+        for sr in query_result.results:
+            key = normalize_url(sr.url)
+            source = sources.get(key) if key else None
+            if source is None:
+                source = len(source_list)
+                source_list.append(sr.model_dump(exclude={"snippet"}, exclude_none=True))
+                if key:
+                    sources[key] = source
+            snippet = sr.snippet[:max_snippet_chars] if max_snippet_chars else sr.snippet
+            refs.append([source, snippets.setdefault(snippet, len(snippets))])
+
+        data = query_result.model_dump(mode="json", exclude={"results"})
+        data["refs"] = refs
+        queries.append(data)
+
+    return {"sources": source_list, "snippets": list(snippets), "queries": queries}
+
+
+def expand_query_results(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand the output of compact_query_results into QueryResult dicts.
+
+    Results that share a snippet share one string, so expanded output
+    stays interned in memory.
+    """
+    sources = data["sources"]
+    snippets = data["snippets"]
+
+    queries = []
+    for query in data["queries"]:
+        query = dict(query)
+        query["results"] = [
+            {**sources[source], "snippet": snippets[snippet]}
+            for source, snippet in query.pop("refs")
+        ]
+        queries.append(query)
+    return queries
+
+
 class CompanyProfile(BaseModel):
     """Researched company profile."""
     description: str = ""
@@ -179,6 +271,19 @@ class ResearchOutput(BaseModel):
     total_cost: float = 0.0
     confidence_scores: Dict[str, float] = Field(default_factory=dict)
 
+    @field_serializer("raw_queries", when_used="json")
+    def _compact_raw_queries(self, raw_queries: List[QueryResult]) -> Dict[str, Any]:
+        # Sources repeat across queries; store each once in saved JSON
+        return compact_query_results(raw_queries)
+
+    @field_validator("raw_queries", mode="before")
+    @classmethod
+    def _expand_raw_queries(cls, value: Any) -> Any:
+        # Accept both the compact form and the plain list older files used
+        if isinstance(value, dict):
+            return expand_query_results(value)
+        return value
+
 
 # ============================================================================
 # Synthesis Models
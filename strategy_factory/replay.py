@@ -0,0 +1,377 @@
+"""
+Record/replay of upstream API calls.
+
+In record mode every Perplexity search and Gemini generation that
+succeeds is written to a fixture store as a request/response pair. In
+replay mode the same requests are served from the store without touching
+the network, so the full pipeline can be run, profiled and benchmarked
+on a machine without API keys. Replay can inject latency and transient
+errors to reproduce production slowdowns.
+
+Fixtures are plain JSON files, one per request, under
+<fixture_dir>/<provider>/<request hash>.json. Multi-query requests are
+stored one fixture per query, as if each query had been sent alone, so
+replay does not depend on how queries happened to be batched.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import API_REPLAY_CONFIG
+
+
+class ReplayMode(str, Enum):
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class FixtureNotFoundError(Exception):
+    """Raised in replay mode when a request has no recorded fixture."""
+
+    # Treated as a bad request by the retry policy: not retried
+    status_code = 404
+
+    def __init__(self, provider: str, key: str):
+        self.provider = provider
+        self.key = key
+        super().__init__(f"No recorded {provider} fixture for request {key}")
+
+
+class InjectedReplayError(Exception):
+    """Transient error injected during replay to exercise retry paths."""
+
+    # Treated as a server error by the retry policy: retried
+    status_code = 503
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        super().__init__(f"Injected {provider} replay error (503 service unavailable)")
+
+
+class ApiRecorder:
+    """
+    Records API request/response pairs, or replays them.
+
+    Clients route each transport call through call() / call_async() with
+    the request as a JSON-serializable dict and encode/decode functions
+    that convert the response to and from its stored JSON form.
+    """
+
+    def __init__(
+        self,
+        mode: ReplayMode = ReplayMode.OFF,
+        fixture_dir: Optional[Path] = None,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the recorder.
+
+        Args:
+            mode: OFF passes calls through, RECORD stores them, REPLAY serves them.
+            fixture_dir: Directory of the fixture store.
+            latency_ms: Latency added to each replayed call.
+            latency_jitter_ms: Random spread applied to the added latency.
+            error_rate: Fraction of replayed calls that fail with a transient error.
+            seed: Seed for latency and error injection, for reproducible runs.
+        """
+        self.mode = ReplayMode(mode)
+        self.fixture_dir = Path(fixture_dir) if fixture_dir else None
+        self.latency_ms = max(0.0, latency_ms)
+        self.latency_jitter_ms = max(0.0, latency_jitter_ms)
+        self.error_rate = min(1.0, max(0.0, error_rate))
+
+        if self.mode != ReplayMode.OFF and self.fixture_dir is None:
+            raise ValueError(f"fixture_dir is required in {self.mode.value} mode")
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Stats
+        self.recorded = 0
+        self.replayed = 0
+        self.injected_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether calls are being recorded or replayed."""
+        return self.mode != ReplayMode.OFF
+
+    @property
+    def replaying(self) -> bool:
+        """Whether calls are served from fixtures instead of the network."""
+        return self.mode == ReplayMode.REPLAY
+
+    def _request_key(self, request: Dict[str, Any]) -> str:
+        """Hash a request dict into a stable fixture key."""
+        request_str = json.dumps(request, sort_keys=True, default=str)
+        return hashlib.sha256(request_str.encode()).hexdigest()[:32]
+
+    def _fixture_path(self, provider: str, key: str) -> Path:
+        return self.fixture_dir / provider / f"{key}.json"
+
+    def _save(self, provider: str, request: Dict[str, Any], payload: Any) -> None:
+        """Write a fixture atomically."""
+        key = self._request_key(request)
+        path = self._fixture_path(provider, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = {
+            "provider": provider,
+            "recorded_at": datetime.now().isoformat(),
+            "request": request,
+            "response": payload,
+        }
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2, default=str)
+        tmp_path.replace(path)
+
+        with self._lock:
+            self.recorded += 1
+
+    def _load(self, provider: str, request: Dict[str, Any]) -> Any:
+        """Read a fixture's stored response."""
+        key = self._request_key(request)
+        path = self._fixture_path(provider, key)
+        if not path.exists():
+            raise FixtureNotFoundError(provider, key)
+
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        with self._lock:
+            self.replayed += 1
+        return data["response"]
+
+    def _save_items(
+        self,
+        provider: str,
+        request: Dict[str, Any],
+        field: str,
+        payloads: List[Any],
+    ) -> None:
+        """Write one fixture per item of a multi-item request."""
+        items = request[field]
+        if len(payloads) != len(items):
+            # Not answered per item; the caller falls back to single requests
+            return
+        for item, payload in zip(items, payloads):
+            self._save(provider, {**request, field: item}, payload)
+
+    def _load_items(self, provider: str, request: Dict[str, Any], field: str) -> List[Any]:
+        """Read the per-item fixtures of a multi-item request."""
+        return [self._load(provider, {**request, field: item}) for item in request[field]]
+
+    def _plan_injection(self, provider: str) -> float:
+        """
+        Decide the injected latency and error for one replayed call.
+
+        Returns:
+            Seconds of latency to add.
+
+        Raises:
+            InjectedReplayError: If this call should fail.
+        """
+        with self._lock:
+            spread = self._random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.injected_errors += 1
+
+        if fail:
+            raise InjectedReplayError(provider)
+        return max(0.0, self.latency_ms + spread) / 1000
+
+    def call(
+        self,
+        provider: str,
+        request: Dict[str, Any],
+        fn: Callable[[], Any],
+        encode: Callable[[Any], Any],
+        decode: Callable[[Any], Any],
+    ) -> Any:
+        """
+        Make, record or replay one API call.
+
+        Args:
+            provider: Provider name, e.g. "perplexity" or "gemini".
+            request: JSON-serializable request; identifies the fixture.
+            fn: Zero-argument function making the live call.
+            encode: Converts a live response to its stored JSON form.
+            decode: Converts a stored JSON form back to a response.
+
+        Returns:
+            The live or replayed response.
+        """
+        if self.mode == ReplayMode.REPLAY:
+            latency = self._plan_injection(provider)
+            if latency:
+                time.sleep(latency)
+            return decode(self._load(provider, request))
+
+        response = fn()
+        if self.mode == ReplayMode.RECORD:
+            self._save(provider, request, encode(response))
+        return response
+
+    async def call_async(
+        self,
+        provider: str,
+        request: Dict[str, Any],
+        fn: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Any],
+        decode: Callable[[Any], Any],
+    ) -> Any:
+        """Async variant of call(); fn returns an awaitable live call."""
+        if self.mode == ReplayMode.REPLAY:
+            latency = self._plan_injection(provider)
+            if latency:
+                await asyncio.sleep(latency)
+            return decode(self._load(provider, request))
+
+        response = await fn()
+        if self.mode == ReplayMode.RECORD:
+            self._save(provider, request, encode(response))
+        return response
+
+    def call_batch(
+        self,
+        provider: str,
+        request: Dict[str, Any],
+        field: str,
+        fn: Callable[[], Any],
+        encode: Callable[[Any], List[Any]],
+        decode: Callable[[List[Any]], Any],
+    ) -> Any:
+        """
+        Make, record or replay one multi-item API call, one fixture per item.
+
+        Each item is stored under the request with `field` set to that
+        item alone, i.e. the same fixture a single-item request would use.
+
+        Args:
+            provider: Provider name, e.g. "perplexity".
+            request: JSON-serializable request whose `field` is a list of items.
+            field: Request field holding the items (e.g. "query").
+            fn: Zero-argument function making the live call.
+            encode: Converts a live response to a list of stored JSON forms,
+                one per item.
+            decode: Converts a list of stored JSON forms back to a response.
+
+        Returns:
+            The live or replayed response.
+        """
+        if self.mode == ReplayMode.REPLAY:
+            latency = self._plan_injection(provider)
+            if latency:
+                time.sleep(latency)
+            return decode(self._load_items(provider, request, field))
+
+        response = fn()
+        if self.mode == ReplayMode.RECORD:
+            self._save_items(provider, request, field, encode(response))
+        return response
+
+    async def call_batch_async(
+        self,
+        provider: str,
+        request: Dict[str, Any],
+        field: str,
+        fn: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], List[Any]],
+        decode: Callable[[List[Any]], Any],
+    ) -> Any:
+        """Async variant of call_batch(); fn returns an awaitable live call."""
+        if self.mode == ReplayMode.REPLAY:
+            latency = self._plan_injection(provider)
+            if latency:
+                await asyncio.sleep(latency)
+            return decode(self._load_items(provider, request, field))
+
+        response = await fn()
+        if self.mode == ReplayMode.RECORD:
+            self._save_items(provider, request, field, encode(response))
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get record/replay statistics."""
+        with self._lock:
+            return {
+                "mode": self.mode.value,
+                "fixture_dir": str(self.fixture_dir) if self.fixture_dir else None,
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "injected_errors": self.injected_errors,
+            }
+
+
+_recorder: Optional[ApiRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def configure_api_recorder(
+    mode: ReplayMode,
+    fixture_dir: Optional[Path] = None,
+    **kwargs,
+) -> ApiRecorder:
+    """
+    Replace the process-wide recorder, e.g. from command line options.
+
+    Must be called before the API clients are created.
+
+    Args:
+        mode: Record/replay mode.
+        fixture_dir: Fixture store directory. Defaults to API_REPLAY_CONFIG.
+        **kwargs: Additional ApiRecorder arguments (latency, error rate, seed).
+
+    Returns:
+        The new shared ApiRecorder.
+    """
+    global _recorder
+    options = {
+        "latency_ms": API_REPLAY_CONFIG["latency_ms"],
+        "latency_jitter_ms": API_REPLAY_CONFIG["latency_jitter_ms"],
+        "error_rate": API_REPLAY_CONFIG["error_rate"],
+        "seed": API_REPLAY_CONFIG["seed"],
+        **kwargs,
+    }
+    with _recorder_lock:
+        _recorder = ApiRecorder(
+            mode=mode,
+            fixture_dir=fixture_dir or API_REPLAY_CONFIG["fixture_dir"],
+            **options,
+        )
+        return _recorder
+
+
+def get_api_recorder() -> ApiRecorder:
+    """
+    Get the process-wide recorder shared by all API clients.
+
+    Returns:
+        The shared ApiRecorder, created from API_REPLAY_CONFIG on first use.
+    """
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = ApiRecorder(
+                mode=API_REPLAY_CONFIG["mode"],
+                fixture_dir=API_REPLAY_CONFIG["fixture_dir"],
+                latency_ms=API_REPLAY_CONFIG["latency_ms"],
+                latency_jitter_ms=API_REPLAY_CONFIG["latency_jitter_ms"],
+                error_rate=API_REPLAY_CONFIG["error_rate"],
+                seed=API_REPLAY_CONFIG["seed"],
+            )
+        return _recorder
@@ -11,6 +11,7 @@ including:
 """
 
 from .perplexity_client import PerplexityClient
+from .async_perplexity_client import AsyncPerplexityClient
 from .query_templates import QueryTemplates
 from .model_selector import ModelSelector
 from .orchestrator import ResearchOrchestrator
@@ -18,6 +19,7 @@ from .result_processor import ResultProcessor
 
 __all__ = [
     "PerplexityClient",
+    "AsyncPerplexityClient",
     "QueryTemplates",
     "ModelSelector",
     "ResearchOrchestrator",
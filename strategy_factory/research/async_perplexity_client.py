@@ -0,0 +1,463 @@
+"""
+Asyncio Perplexity Search API client.
+
+Shares caching, batching and cost tracking with PerplexityClient, but
+talks to the Search API over a pooled keep-alive httpx.AsyncClient and
+awaits rate limiting and retry backoff instead of sleeping. Cache reads
+and writes go to SQLite on worker threads. One event loop can then drive
+research for many companies at once without a thread per job.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Union, Tuple, Set, Callable, Awaitable, TypeVar
+
+import httpx
+
+from ..config import PerplexityModel
+from ..credentials import CredentialPool
+from ..models import QueryResult
+from ..replay import ApiRecorder
+from .hedging import HedgePolicy
+from .model_stats import ModelStats
+from .perplexity_client import PerplexityClientBase
+from .rate_limiter import TokenBucketRateLimiter
+
+T = TypeVar("T")
+
+
+class AsyncPerplexityClient(PerplexityClientBase):
+    """
+    Async wrapper for the Perplexity Search API.
+
+    Features:
+    - Pooled keep-alive HTTP connections (httpx.AsyncClient)
+    - Awaitable rate limiting on the shared token bucket
+    - Automatic retry with non-blocking exponential backoff
+    - The same query cache, stale-while-revalidate refreshes, request
+      coalescing, multi-query batching and record/replay as PerplexityClient
+
+    Use as an async context manager, or call aclose() when done. Background
+    refreshes run as tasks on the caller's event loop; aclose() waits for
+    them so refreshed entries are written before the pool is closed.
+    """
+
+    SEARCH_URL = "https://api.perplexity.ai/search"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        enable_cache: bool = True,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 120.0,
+        max_connections: int = 20,
+        stale_grace_ratio: Optional[float] = None,
+        recorder: Optional[ApiRecorder] = None,
+        model_stats: Optional[ModelStats] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        credentials: Optional[CredentialPool] = None,
+    ):
+        """
+        Initialize the async Perplexity client.
+
+        Args:
+            api_key: Perplexity API key. If not provided, uses PERPLEXITY_API_KEY env var.
+            cache_dir: Directory for caching query results.
+            enable_cache: Whether to enable result caching.
+            rate_limiter: Rate limiter to use. Defaults to the process-wide
+                limiter shared by all clients.
+            http_client: Optional httpx.AsyncClient to share a connection pool
+                between clients. Not closed by aclose().
+            timeout: Request timeout in seconds.
+            max_connections: Connection pool size when creating our own client.
+            stale_grace_ratio: Stale-while-revalidate grace window as a fraction
+                of each entry's TTL (0 disables). Defaults to RESEARCH_CACHE_CONFIG.
+            recorder: API record/replay store. Defaults to the process-wide recorder.
+            model_stats: Per-model call statistics. Defaults to the process-wide tracker.
+            hedge_policy: Hedged request policy. Defaults to the process-wide policy.
+            credentials: Pool of API keys to use instead of api_key.
+        """
+        super().__init__(
+            api_key=api_key,
+            cache_dir=cache_dir,
+            enable_cache=enable_cache,
+            rate_limiter=rate_limiter,
+            stale_grace_ratio=stale_grace_ratio,
+            recorder=recorder,
+            model_stats=model_stats,
+            hedge_policy=hedge_policy,
+            credentials=credentials,
+        )
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._http = http_client
+        self._owns_http = http_client is None
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Wait for background refreshes, then close the HTTP pool if we created it."""
+        if self._refresh_tasks:
+            await asyncio.gather(*self._refresh_tasks, return_exceptions=True)
+        if self._http is not None and self._owns_http:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "AsyncPerplexityClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def search(
+        self,
+        query: Union[str, List[str]],
+        max_results: int = 10,
+        max_tokens_per_page: int = 1024,
+        country: Optional[str] = None,
+        search_recency_filter: Optional[str] = None,
+        search_after_date: Optional[str] = None,
+        search_before_date: Optional[str] = None,
+        search_domain_filter: Optional[List[str]] = None,
+        use_quality_domains: bool = False,
+        model: PerplexityModel = PerplexityModel.SONAR,
+        cache_ttl_hours: int = 24,
+        cache_label: Optional[str] = None,
+        cache_identity: Optional[str] = None,
+    ) -> QueryResult:
+        """
+        Execute a Perplexity search query with retry logic.
+
+        Arguments are the same as PerplexityClient.search().
+
+        Returns:
+            QueryResult with search results and metadata.
+        """
+        query_str, cache_key, cached, needs_refresh, params = await self._off_loop(
+            self._plan_search,
+            query, max_results, max_tokens_per_page, country, search_recency_filter,
+            search_after_date, search_before_date, search_domain_filter,
+            use_quality_domains, model, cache_label, cache_identity,
+            undo=lambda plan: plan[3] and self._release_refresh([plan[1]]),
+        )
+        if needs_refresh:
+            self._schedule_refresh(
+                [([0], params)], [cache_key], [query_str], [cache_ttl_hours], model
+            )
+        if cached:
+            return cached
+
+        # Wait for an identical request already in flight, if any
+        flight, leader = self.single_flight.claim(cache_key)
+        if not leader:
+            await self._wait_for_flight(flight)
+            return self._followed_result(flight, query_str, model)
+
+        try:
+            result = await self._execute_with_retry(params, model)
+            await asyncio.to_thread(
+                self._store_cached, cache_key, query_str, result, cache_ttl_hours
+            )
+        except BaseException as e:
+            self.single_flight.fail(cache_key, flight, e)
+            raise
+
+        self.single_flight.resolve(cache_key, flight, result)
+        return result
+
+    async def search_batch(
+        self,
+        queries: List[str],
+        max_results: int = 10,
+        max_tokens_per_page: int = 1024,
+        country: Optional[str] = None,
+        search_recency_filter: Optional[str] = None,
+        search_after_date: Optional[str] = None,
+        search_before_date: Optional[str] = None,
+        search_domain_filter: Optional[List[str]] = None,
+        use_quality_domains: bool = False,
+        model: PerplexityModel = PerplexityModel.SONAR,
+        cache_ttl_hours: Union[int, List[int]] = 24,
+        cache_labels: Optional[List[Optional[str]]] = None,
+        cache_identities: Optional[List[Optional[str]]] = None,
+    ) -> List[QueryResult]:
+        """
+        Execute independent queries that share parameters in as few requests as possible.
+
+        Arguments are the same as PerplexityClient.search_batch(). The
+        multi-query requests for a batch are sent concurrently.
+
+        Returns:
+            List of QueryResult objects, in the same order as queries.
+        """
+        ttls = cache_ttl_hours if isinstance(cache_ttl_hours, list) else [cache_ttl_hours] * len(queries)
+        keys, results, requests, refreshes, flights = await self._off_loop(
+            self._plan_batch,
+            queries, max_results, max_tokens_per_page, country, search_recency_filter,
+            search_after_date, search_before_date, search_domain_filter,
+            use_quality_domains, model, cache_labels, cache_identities,
+            undo=self._abandon_batch_plan,
+        )
+
+        if refreshes:
+            self._schedule_refresh(refreshes, keys, queries, ttls, model)
+
+        try:
+            await self._run_requests(requests, keys, queries, ttls, model, results)
+        finally:
+            self._land_flights(keys, results, flights)
+
+        # Collect queries answered by other callers' requests
+        for i, (flight, leader) in flights.items():
+            if not leader:
+                await self._wait_for_flight(flight)
+                results[i] = self._followed_result(flight, queries[i], model)
+        return results
+
+    async def _off_loop(
+        self,
+        fn: Callable[..., T],
+        *args: Any,
+        undo: Optional[Callable[[T], Any]] = None,
+    ) -> T:
+        """
+        Run blocking cache work on a worker thread.
+
+        The SQLite store can wait on its busy timeout or evict during a
+        write, which must not stall every job on the loop. If the caller
+        is cancelled meanwhile, the work still finishes and `undo` is given
+        its result to release whatever it claimed.
+        """
+        task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if undo is not None:
+                task.add_done_callback(
+                    lambda t: t.cancelled() or t.exception() or undo(t.result())
+                )
+            raise
+
+    def _abandon_batch_plan(self, plan: Tuple[Any, ...]) -> None:
+        """Release the refreshes and flights claimed by a batch plan that will not run."""
+        keys, _, _, refreshes, flights = plan
+        self._release_refresh([keys[i] for chunk, _ in refreshes for i in chunk])
+        self._land_flights(keys, [None] * len(keys), flights)
+
+    async def _wait_for_flight(self, flight: Future) -> None:
+        """Wait for another caller's request without blocking the event loop."""
+        try:
+            # Shielded so cancelling this job does not cancel the shared request
+            await asyncio.shield(asyncio.wrap_future(flight))
+        except Exception:
+            pass  # Reported through _followed_result()
+
+    async def _run_requests(
+        self,
+        requests: List[Tuple[List[int], Dict[str, Any]]],
+        keys: List[str],
+        queries: List[str],
+        ttls: List[int],
+        model: PerplexityModel,
+        results: Optional[List[Optional[QueryResult]]] = None,
+    ) -> None:
+        """Execute planned requests concurrently, caching each result."""
+        async def run(chunk: List[int], params: Dict[str, Any]) -> None:
+            if len(chunk) > 1:
+                chunk_results = await self._execute_batch_with_retry(params, model)
+            else:
+                chunk_results = [await self._execute_with_retry(params, model)]
+
+            if results is not None:
+                for i, result in zip(chunk, chunk_results):
+                    results[i] = result
+
+            def store() -> None:
+                for i, result in zip(chunk, chunk_results):
+                    self._store_cached(keys[i], queries[i], result, ttls[i])
+
+            await asyncio.to_thread(store)
+
+        await asyncio.gather(*(run(chunk, params) for chunk, params in requests))
+
+    def _schedule_refresh(
+        self,
+        requests: List[Tuple[List[int], Dict[str, Any]]],
+        keys: List[str],
+        queries: List[str],
+        ttls: List[int],
+        model: PerplexityModel,
+    ) -> None:
+        """Refresh stale cache entries in a background task."""
+        claimed = [keys[i] for chunk, _ in requests for i in chunk]
+
+        async def refresh() -> None:
+            try:
+                await self._run_requests(requests, keys, queries, ttls, model)
+            except Exception as e:
+                print(f"Warning: Background cache refresh failed: {e}")
+            finally:
+                self._release_refresh(claimed)
+
+        task = asyncio.ensure_future(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _request_with_retry(
+        self,
+        params: Dict[str, Any],
+        model: PerplexityModel,
+    ) -> Tuple[Any, Optional[Exception]]:
+        """
+        Send a Search API request with rate limiting and retries.
+
+        Each attempt's latency (excluding rate limit waits) is recorded
+        against the model. With hedging enabled, see _run_hedged.
+
+        Returns:
+            Tuple of (response JSON, None) on success or (None, last_error).
+        """
+        async def send(key: str) -> Any:
+            async def post() -> Any:
+                response = await self._get_http().post(
+                    self.SEARCH_URL,
+                    json=params,
+                    headers={"Authorization": f"Bearer {key}"},
+                )
+                response.raise_for_status()
+                return response.json()
+
+            started = time.monotonic()
+            # Fixtures are shared with PerplexityClient: same request, same payload
+            try:
+                if isinstance(params["query"], list):
+                    # One fixture per query, so replay does not depend on batching
+                    data = await self.recorder.call_batch_async(
+                        "perplexity",
+                        params,
+                        "query",
+                        post,
+                        encode=lambda data: self._encode_batch(data.get("results", [])),
+                        decode=lambda payloads: {
+                            "results": [payload["results"] for payload in payloads]
+                        },
+                    )
+                else:
+                    data = await self.recorder.call_async(
+                        "perplexity",
+                        params,
+                        post,
+                        encode=lambda data: {"results": self._encode_results(data.get("results", []))},
+                        decode=lambda payload: payload,
+                    )
+            except Exception:
+                self._record_call(model, started, error=True)
+                raise
+            self._record_call(model, started, error=False)
+            return data
+
+        async def request() -> Any:
+            if self.credentials is not None:
+                return await self.credentials.call_async(send)
+            await self.rate_limiter.acquire_async()
+            return await send(self.api_key)
+
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return await self.retry_policy.run_async(request)
+        return await self._run_hedged(lambda: self.retry_policy.run_async(request), delay, model)
+
+    async def _run_hedged(
+        self,
+        attempt: Callable[[], Awaitable[Tuple[Any, Optional[Exception]]]],
+        delay: float,
+        model: PerplexityModel,
+    ) -> Tuple[Any, Optional[Exception]]:
+        """
+        Run a request, racing one duplicate if it takes longer than `delay`.
+
+        The first successful response wins and the other request is cancelled.
+
+        Returns:
+            Tuple of (response JSON, None) on success or (None, last_error).
+        """
+        primary = asyncio.ensure_future(attempt())
+        hedge: Optional[asyncio.Task] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.hedge_policy.try_hedge():
+                return await primary
+
+            self._record_hedge(model)
+            hedge = asyncio.ensure_future(attempt())
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (primary, hedge):
+                    if task in done and task.result()[0] is not None:
+                        self._record_hedge_outcome(hedge_won=task is hedge)
+                        return task.result()
+
+            # Both failed
+            self._record_hedge_outcome(hedge_won=False)
+            return primary.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _execute_with_retry(
+        self,
+        params: Dict[str, Any],
+        model: PerplexityModel,
+    ) -> QueryResult:
+        """Execute a search with retry logic."""
+        data, error = await self._request_with_retry(params, model)
+        if data is None:
+            # All retries failed
+            query_str = params["query"]
+            if isinstance(query_str, list):
+                query_str = " | ".join(query_str)
+            return self._error_result(query_str, model, error)
+
+        return self._build_query_result(
+            params, data.get("results", []), model, self._billed_cost(data, model)
+        )
+
+    async def _execute_batch_with_retry(
+        self,
+        params: Dict[str, Any],
+        model: PerplexityModel,
+    ) -> List[QueryResult]:
+        """Execute a multi-query search and split the response per query."""
+        queries = params["query"]
+
+        data, error = await self._request_with_retry(params, model)
+        if data is None:
+            return [self._error_result(q, model, error) for q in queries]
+
+        split_results = self._split_batch_results(
+            queries, data.get("results", []), model, self._billed_cost(data, model)
+        )
+        if split_results is None:
+            # Response is not grouped per query; fall back to one request each
+            split_results = list(await asyncio.gather(*(
+                self._execute_with_retry({**params, "query": q}, model)
+                for q in queries
+            )))
+        return split_results
@@ -0,0 +1,668 @@
+"""
+Persistent storage for cached Perplexity query results.
+
+Entries live in a SQLite table keyed by cache key, so each query costs
+one row write and lookups read only the row they need. SQLite's WAL
+journal gives crash-safe writes and lets several jobs share one cache
+file. Results are stored as compressed positional records and decoded
+into Pydantic models only when an entry is actually served. The legacy
+JSON format remains available for import and export.
+
+The store is bounded: entry count and total result bytes are capped, the
+least recently used entries are evicted past either cap, and a background
+sweeper deletes entries that have expired beyond their stale grace window.
+Reads rarely write: access times are buffered and written in batches
+with the next write or sweep, so readers do not queue on the writer lock.
+Running totals are kept in a one-row table maintained by triggers, so size
+checks stay O(1) and are shared by every process using the file.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Iterator, Tuple, Union
+
+from ..config import RESEARCH_CACHE_CONFIG
+from ..models import QueryResult, SearchResult
+
+
+# Results are stored as zlib-compressed positional records rather than
+# Pydantic JSON: no repeated field names, and snippets compress well.
+# Record layout: [query, model_used, timestamp, result_count, cost_estimate,
+#                 error, [[title, url, snippet, date, last_updated], ...]]
+_SEARCH_RESULT_FIELDS = ("title", "url", "snippet", "date", "last_updated")
+
+
+def encode_result(result: QueryResult) -> bytes:
+    """Pack a QueryResult into a compact compressed record."""
+    record = [
+        result.query,
+        result.model_used,
+        result.timestamp.isoformat(),
+        result.result_count,
+        result.cost_estimate,
+        result.error,
+        [[getattr(r, name) for name in _SEARCH_RESULT_FIELDS] for r in result.results],
+    ]
+    return zlib.compress(json.dumps(record, separators=(",", ":")).encode())
+
+
+def decode_result(raw: Union[bytes, str]) -> QueryResult:
+    """
+    Unpack a stored result.
+
+    Records written by encode_result() were validated before storage, so
+    models are built without re-validation. Plain JSON text from older
+    cache files is validated as usual.
+
+    Raises:
+        ValueError: If the stored data is unreadable.
+    """
+    if isinstance(raw, str):
+        return QueryResult.model_validate_json(raw)
+
+    try:
+        query, model_used, timestamp, count, cost, error, results = json.loads(
+            zlib.decompress(raw)
+        )
+    except (zlib.error, TypeError) as e:
+        raise ValueError(f"corrupt cache record: {e}") from e
+
+    return QueryResult.model_construct(
+        query=query,
+        model_used=model_used,
+        results=[
+            SearchResult.model_construct(**dict(zip(_SEARCH_RESULT_FIELDS, r)))
+            for r in results
+        ],
+        result_count=count,
+        timestamp=datetime.fromisoformat(timestamp),
+        cost_estimate=cost,
+        error=error,
+    )
+
+
+class CacheEntry:
+    """
+    Represents a cached query result.
+
+    Entries read from the store carry the raw stored record; the QueryResult
+    is only decoded when .result is first accessed, so entries that turn out
+    to be expired are never turned into models.
+    """
+
+    __slots__ = ("query_hash", "query", "timestamp", "ttl_hours", "_result", "_raw")
+
+    def __init__(
+        self,
+        query_hash: str,
+        query: str,
+        result: Optional[QueryResult] = None,
+        timestamp: Optional[datetime] = None,
+        ttl_hours: int = 24,
+        raw: Union[bytes, str, None] = None,
+    ):
+        if result is None and raw is None:
+            raise ValueError("CacheEntry needs a result or a raw record")
+        self.query_hash = query_hash
+        self.query = query
+        self.timestamp = timestamp or datetime.now()
+        self.ttl_hours = ttl_hours
+        self._result = result
+        self._raw = raw
+
+    @property
+    def result(self) -> QueryResult:
+        """The cached QueryResult, decoded on first access."""
+        if self._result is None:
+            self._result = decode_result(self._raw)
+            self._raw = None
+        return self._result
+
+    def encoded(self) -> bytes:
+        """The result as a stored record, reusing the raw record if possible."""
+        if isinstance(self._raw, bytes):
+            return self._raw
+        return encode_result(self.result)
+
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS query_cache (
+    key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_query_cache_expires ON query_cache (expires_at);
+CREATE TABLE IF NOT EXISTS query_cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_sweep REAL NOT NULL DEFAULT 0
+);
+"""
+
+# Keep query_cache_stats in step with query_cache on every write
+_TRIGGERS_SQL = """
+CREATE TRIGGER IF NOT EXISTS query_cache_insert AFTER INSERT ON query_cache BEGIN
+    UPDATE query_cache_stats SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS query_cache_delete AFTER DELETE ON query_cache BEGIN
+    UPDATE query_cache_stats SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS query_cache_resize AFTER UPDATE OF size ON query_cache BEGIN
+    UPDATE query_cache_stats SET bytes = bytes + NEW.size - OLD.size WHERE id = 1;
+END;
+"""
+
+
+class ResearchCacheStore:
+    """
+    SQLite-backed, size-bounded key/value store for query results.
+
+    Features:
+    - O(1) writes per query (single-row upsert)
+    - Lazy reads by key; nothing is loaded up front
+    - Entry-count and byte caps with least-recently-used eviction
+    - Background sweeping of entries expired past their grace window
+    - O(1) hit/miss/eviction counters
+    - Crash-safe, multi-process access via WAL journaling
+    - JSON import/export compatible with the legacy cache file
+    """
+
+    DB_FILE_NAME = "query_cache.sqlite3"
+    LEGACY_JSON_FILE_NAME = "research_cache.json"
+
+    # Eviction trims the store to this fraction of its caps, so a full
+    # cache does not evict on every write
+    EVICTION_LOW_WATER = 0.9
+
+    # Buffered access times are written once this many have built up
+    MAX_PENDING_TOUCHES = 256
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        stale_grace_ratio: Optional[float] = None,
+        max_stale_grace_hours: Optional[float] = None,
+        sweep_interval: Optional[float] = None,
+    ):
+        """
+        Initialize the cache store.
+
+        Args:
+            cache_dir: Directory holding the cache database. If not provided,
+                the store is kept in memory for the lifetime of the object.
+            max_entries: Maximum number of entries (0 = unbounded).
+            max_bytes: Maximum total size of stored results (0 = unbounded).
+            stale_grace_ratio: Expired entries are kept for this fraction of
+                their TTL so they can still be served stale.
+            max_stale_grace_hours: Cap on the stale grace window.
+            sweep_interval: Seconds between background expiry sweeps
+                (0 disables the sweeper).
+
+        Unset limits default to RESEARCH_CACHE_CONFIG.
+        """
+        def setting(value: Any, name: str) -> Any:
+            return RESEARCH_CACHE_CONFIG[name] if value is None else value
+
+        self.cache_dir = cache_dir
+        self.max_entries = max(0, int(setting(max_entries, "max_entries")))
+        self.max_bytes = max(0, int(setting(max_bytes, "max_bytes")))
+        self.stale_grace_ratio = max(0.0, setting(stale_grace_ratio, "stale_grace_ratio"))
+        self.max_stale_grace_hours = setting(max_stale_grace_hours, "max_stale_grace_hours")
+        self.sweep_interval = setting(sweep_interval, "sweep_interval_seconds")
+        self._lock = threading.Lock()
+        self._pending_touches: Dict[str, float] = {}
+
+        # Counters for this store object
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired_swept = 0
+
+        if cache_dir:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            self.db_path = cache_dir / self.DB_FILE_NAME
+            is_new = not self.db_path.exists()
+            self._conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=30,
+                check_same_thread=False,
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        else:
+            self.db_path = None
+            is_new = False
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+
+        self._init_schema()
+
+        # Carry over entries from the old JSON cache on first use
+        if is_new:
+            legacy_file = cache_dir / self.LEGACY_JSON_FILE_NAME
+            if legacy_file.exists():
+                self.import_json(legacy_file)
+
+        # An in-memory store is private to this object, and put() already
+        # drops dead entries whenever it evicts
+        if self.sweep_interval > 0 and self.db_path is not None:
+            _CacheSweeper.register(self)
+
+    def _init_schema(self) -> None:
+        """Create tables and triggers, upgrading caches from before size tracking."""
+        with self._lock:
+            self._conn.executescript(_SCHEMA_SQL)
+
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(query_cache)")}
+            if "size" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE query_cache ADD COLUMN last_access REAL NOT NULL DEFAULT 0"
+                )
+                self._conn.execute(
+                    "ALTER TABLE query_cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0"
+                )
+                self._conn.execute(
+                    "UPDATE query_cache SET size = length(result), last_access = created_at"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_query_cache_access ON query_cache (last_access)"
+            )
+
+            # Seed the totals before the triggers start maintaining them
+            self._conn.execute(
+                "INSERT OR IGNORE INTO query_cache_stats (id, entries, bytes) "
+                "SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM query_cache"
+            )
+            self._conn.executescript(_TRIGGERS_SQL)
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get a cache entry by key.
+
+        Only unexpired entries count as hits. The access time is buffered
+        rather than written here; see _flush_touches().
+
+        Args:
+            key: Cache key.
+
+        Returns:
+            CacheEntry if present (valid or not), otherwise None.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query, result, created_at, expires_at FROM query_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row and row[3] > now:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+            if row:
+                self._pending_touches[key] = now
+                if len(self._pending_touches) >= self.MAX_PENDING_TOUCHES:
+                    self._flush_touches()
+                    self._conn.commit()
+
+        if not row:
+            return None
+
+        return self._row_to_entry(key, row)
+
+    def _flush_touches(self) -> None:
+        """
+        Write buffered access times in one statement. Caller holds the lock and commits.
+
+        Rows deleted since they were read are simply not matched.
+        """
+        if not self._pending_touches:
+            return
+        self._conn.executemany(
+            "UPDATE query_cache SET last_access = MAX(last_access, ?) WHERE key = ?",
+            [(at, key) for key, at in self._pending_touches.items()],
+        )
+        self._pending_touches.clear()
+
+    def _row_to_entry(self, key: str, row: Tuple[Any, ...]) -> CacheEntry:
+        """Build a lazily decoded entry from a (query, result, created_at, expires_at) row."""
+        query, raw_result, created_at, expires_at = row
+        return CacheEntry(
+            query_hash=key,
+            query=query,
+            timestamp=datetime.fromtimestamp(created_at),
+            ttl_hours=round((expires_at - created_at) / 3600),
+            raw=raw_result,
+        )
+
+    def load_result(self, entry: CacheEntry) -> Optional[QueryResult]:
+        """
+        Decode an entry's result, dropping the entry if it is unreadable.
+
+        Args:
+            entry: Entry returned by get().
+
+        Returns:
+            The QueryResult, or None if the stored record is corrupt.
+        """
+        try:
+            return entry.result
+        except ValueError as e:
+            print(f"Warning: Dropping unreadable cache entry {entry.query_hash}: {e}")
+            self.delete(entry.query_hash)
+            return None
+
+    def put(self, entry: CacheEntry) -> None:
+        """
+        Insert or replace a cache entry.
+
+        Args:
+            entry: Entry to store.
+        """
+        created_at = entry.timestamp.timestamp()
+        expires_at = created_at + entry.ttl_hours * 3600
+        record = entry.encoded()
+
+        with self._lock:
+            self._flush_touches()
+
+            # Upsert rather than REPLACE so the row is updated, not deleted
+            # and re-inserted, and the size triggers see a single change
+            self._conn.execute(
+                "INSERT INTO query_cache "
+                "(key, query, result, created_at, expires_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET query = excluded.query, "
+                "result = excluded.result, created_at = excluded.created_at, "
+                "expires_at = excluded.expires_at, last_access = excluded.last_access, "
+                "size = excluded.size",
+                (
+                    entry.query_hash,
+                    entry.query,
+                    record,
+                    created_at,
+                    expires_at,
+                    time.time(),
+                    len(record),
+                ),
+            )
+            self._conn.commit()
+
+            if self._over_limit(low_water=False):
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        """Delete a cache entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM query_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Delete all cache entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM query_cache")
+            self._conn.commit()
+
+    def _totals(self) -> Tuple[int, int]:
+        """Current (entries, bytes) from the trigger-maintained stats row."""
+        row = self._conn.execute(
+            "SELECT entries, bytes FROM query_cache_stats WHERE id = 1"
+        ).fetchone()
+        return row or (0, 0)
+
+    def _over_limit(self, low_water: bool) -> bool:
+        """Check the caps, optionally against the eviction low-water mark."""
+        factor = self.EVICTION_LOW_WATER if low_water else 1.0
+        entries, size = self._totals()
+        return (
+            (self.max_entries and entries > self.max_entries * factor)
+            or (self.max_bytes and size > self.max_bytes * factor)
+        )
+
+    def _delete_expired(self, now: float) -> int:
+        """Delete entries expired beyond their stale grace window. Caller holds the lock."""
+        cursor = self._conn.execute(
+            "DELETE FROM query_cache WHERE expires_at "
+            "+ MIN((expires_at - created_at) * ?, ?) < ?",
+            (self.stale_grace_ratio, self.max_stale_grace_hours * 3600, now),
+        )
+        self.expired_swept += cursor.rowcount
+        return cursor.rowcount
+
+    def _evict(self) -> None:
+        """
+        Bring the store back under its caps. Caller holds the lock.
+
+        Dead entries go first; then the least recently used entries are
+        evicted in batches until the store is under the low-water mark.
+        """
+        self._delete_expired(time.time())
+
+        while self._over_limit(low_water=True):
+            entries, size = self._totals()
+            batch = max(1, entries // 20)
+            cursor = self._conn.execute(
+                "DELETE FROM query_cache WHERE key IN "
+                "(SELECT key FROM query_cache ORDER BY last_access LIMIT ?)",
+                (batch,),
+            )
+            if cursor.rowcount == 0:
+                break
+            self.evictions += cursor.rowcount
+
+        self._conn.commit()
+
+    def flush(self) -> None:
+        """Write buffered access times to the database."""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+
+    def sweep(self, force: bool = False) -> int:
+        """
+        Delete entries expired beyond their stale grace window.
+
+        Stores sharing a database file coordinate through a shared
+        timestamp, so the file is swept at most once per sweep_interval.
+
+        Args:
+            force: Sweep even if the file was swept recently.
+
+        Returns:
+            Number of entries deleted.
+        """
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            if not force:
+                cursor = self._conn.execute(
+                    "UPDATE query_cache_stats SET last_sweep = ? "
+                    "WHERE id = 1 AND last_sweep <= ?",
+                    (now, now - self.sweep_interval),
+                )
+                if cursor.rowcount == 0:
+                    self._conn.commit()
+                    return 0
+
+            deleted = self._delete_expired(now)
+            self._conn.commit()
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store size and hit/miss/eviction counters."""
+        with self._lock:
+            entries, size = self._totals()
+            return {
+                "entries": entries,
+                "bytes": size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired_swept": self.expired_swept,
+            }
+
+    def count_valid(self) -> int:
+        """Count entries that have not yet expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM query_cache WHERE expires_at > ?",
+                (time.time(),),
+            ).fetchone()
+        return row[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._totals()[0]
+
+    def iter_entries(self) -> Iterator[CacheEntry]:
+        """
+        Iterate over all cache entries.
+
+        Entries are not counted as hits or marked as recently used.
+        """
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT key FROM query_cache")]
+
+        for key in keys:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT query, result, created_at, expires_at FROM query_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+            if row:
+                yield self._row_to_entry(key, row)
+
+    def import_json(self, json_file: Union[str, Path]) -> int:
+        """
+        Import entries from a JSON cache file.
+
+        Entries that do not match the cache file format are skipped, so
+        other files sharing the legacy name are left alone.
+
+        Args:
+            json_file: Path to the JSON file.
+
+        Returns:
+            Number of entries imported.
+        """
+        try:
+            with open(json_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not import cache: {e}")
+            return 0
+
+        if not isinstance(data, dict):
+            return 0
+
+        imported = 0
+        for key, entry in data.items():
+            if not isinstance(entry, dict) or not {"query", "result", "timestamp"} <= entry.keys():
+                continue
+            try:
+                self.put(CacheEntry(
+                    query_hash=key,
+                    query=entry["query"],
+                    result=QueryResult.model_validate(entry["result"]),
+                    timestamp=datetime.fromisoformat(entry["timestamp"]),
+                    ttl_hours=entry.get("ttl_hours", 24),
+                ))
+                imported += 1
+            except (ValueError, TypeError) as e:
+                print(f"Warning: Skipping cache entry {key}: {e}")
+
+        return imported
+
+    def export_json(self, json_file: Union[str, Path]) -> int:
+        """
+        Export all entries to a JSON cache file.
+
+        Args:
+            json_file: Destination path.
+
+        Returns:
+            Number of entries exported.
+        """
+        data = {}
+        for entry in self.iter_entries():
+            result = self.load_result(entry)
+            if result is None:
+                continue
+            data[entry.query_hash] = {
+                "query": entry.query,
+                "result": result.model_dump(mode="json"),
+                "timestamp": entry.timestamp.isoformat(),
+                "ttl_hours": entry.ttl_hours,
+            }
+
+        with open(json_file, "w") as f:
+            json.dump(data, f, indent=2, default=str)
+
+        return len(data)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        _CacheSweeper.unregister(self)
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+
+class _CacheSweeper:
+    """
+    One daemon thread per process that periodically sweeps every open store.
+
+    Stores are held weakly, so a store that is no longer used by any client
+    is dropped without needing an explicit close().
+    """
+
+    _stores: "weakref.WeakSet[ResearchCacheStore]" = weakref.WeakSet()
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def register(cls, store: ResearchCacheStore) -> None:
+        with cls._lock:
+            cls._stores.add(store)
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(
+                    target=cls._run, name="research-cache-sweeper", daemon=True
+                )
+                cls._thread.start()
+
+    @classmethod
+    def unregister(cls, store: ResearchCacheStore) -> None:
+        with cls._lock:
+            cls._stores.discard(store)
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            with cls._lock:
+                stores = list(cls._stores)
+            interval = min((s.sweep_interval for s in stores), default=60)
+
+            for store in stores:
+                try:
+                    store.sweep()
+                except sqlite3.Error as e:
+                    print(f"Warning: Research cache sweep failed: {e}")
+            del stores
+
+            time.sleep(max(1.0, interval))
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark of entity extraction on adversarial snippets.
+
+Times ResultProcessor's competitor and tool name extraction against the
+nested-quantifier regular expressions it replaced, on long period-free
+snippets that make those patterns backtrack. Extraction time should grow
+linearly with snippet size; the legacy patterns grow quadratically.
+
+Also times KeywordMatcher against one substring check per keyword, the
+loop extractors used to run, as the keyword list grows. The matcher's
+time should stay flat; the per-keyword loop grows with the list.
+
+    python -m strategy_factory.research.entity_benchmark
+"""
+
+import re
+import timeit
+
+from ..models import SearchResult
+from .result_processor import ResultProcessor
+from .text_index import KeywordMatcher, analyze_snippet
+
+# The patterns entity extraction used to run
+LEGACY_PATTERNS = {
+    "competitors": re.compile(r"(?:competitor|alternative|similar)[^.]*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)"),
+    "tools": re.compile(r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:is a|provides|offers)"),
+}
+
+# Repeated to build adversarial snippets
+ADVERSARIAL_UNITS = {
+    "competitors": "competitor ",
+    "tools": "Acme ",
+}
+
+SIZES_KB = (1, 2, 5, 10)
+
+KEYWORD_COUNTS = (10, 100, 1000)
+
+
+def run_benchmark() -> None:
+    """Print extraction times per extractor and snippet size."""
+    processor = ResultProcessor()
+    extractors = {
+        "competitors": processor._extract_competitor_names,
+        "tools": processor._extract_tools,
+    }
+
+    def time_extraction(name: str, results) -> float:
+        def run():
+            analyze_snippet.cache_clear()
+            extractors[name](results)
+        return min(timeit.repeat(run, number=1, repeat=5))
+
+    print(f"{'extractor':<12} {'size':>6} {'linear (ms)':>12} {'legacy (ms)':>12}")
+    for name, unit in ADVERSARIAL_UNITS.items():
+        for size_kb in SIZES_KB:
+            text = (unit * (size_kb * 1024 // len(unit) + 1))[:size_kb * 1024]
+            results = [SearchResult(title="", url="", snippet=text)]
+
+            linear = time_extraction(name, results)
+            legacy = min(timeit.repeat(lambda: LEGACY_PATTERNS[name].findall(text), number=1, repeat=3))
+            print(f"{name:<12} {size_kb:>4}KB {linear * 1000:>12.2f} {legacy * 1000:>12.2f}")
+
+
+def run_keyword_benchmark() -> None:
+    """Print keyword matching times per keyword list size."""
+    text = analyze_snippet(
+        "The company runs its analytics platform on a public cloud and is "
+        "rolling out machine learning tools across its sales teams. " * 40
+    ).lower
+
+    print(f"{'keywords':>8} {'matcher (ms)':>13} {'per keyword (ms)':>17}")
+    for count in KEYWORD_COUNTS:
+        keywords = [f"keyword{i:04d}" for i in range(count - 1)] + ["machine learning"]
+        matcher = KeywordMatcher(keywords)
+
+        matched = min(timeit.repeat(lambda: matcher.find_all(text), number=5, repeat=3)) / 5
+        looped = min(timeit.repeat(lambda: {k for k in keywords if k in text}, number=5, repeat=3)) / 5
+        print(f"{count:>8} {matched * 1000:>13.2f} {looped * 1000:>17.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
+    print()
+    run_keyword_benchmark()
@@ -0,0 +1,118 @@
+"""
+Hedging policy for Perplexity requests.
+
+Latency varies a lot between identical requests, and one slow request
+holds up everything waiting on it. A hedged request sends one duplicate
+once the original has run longer than the model usually takes (its
+observed latency percentile) and uses whichever answers first. The
+policy decides when to hedge and caps how often, so the duplicates cost
+at most a fixed fraction of all requests; the clients do the racing.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from ..config import PerplexityModel, PERPLEXITY_HEDGING
+from .model_stats import ModelStats, get_model_stats
+
+
+class HedgePolicy:
+    """
+    Thread-safe hedge budget and outcome counters, shared per process.
+
+    A hedge is allowed only while hedges sent stay within `max_rate` of the
+    requests started, counted across every client in the process.
+    """
+
+    def __init__(
+        self,
+        stats: Optional[ModelStats] = None,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        min_delay: Optional[float] = None,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            stats: Per-model latency statistics. Defaults to the process-wide tracker.
+            enabled: Whether to hedge at all. Defaults to PERPLEXITY_HEDGING.
+            percentile: Latency percentile after which to hedge.
+            max_rate: Maximum hedges as a fraction of requests.
+            min_delay: Minimum seconds to wait before hedging.
+        """
+        self.stats = stats or get_model_stats()
+        self.enabled = PERPLEXITY_HEDGING["enabled"] if enabled is None else enabled
+        self.percentile = percentile or PERPLEXITY_HEDGING["latency_percentile"]
+        self.max_rate = PERPLEXITY_HEDGING["max_rate"] if max_rate is None else max_rate
+        self.min_delay = (
+            PERPLEXITY_HEDGING["min_delay_seconds"] if min_delay is None else min_delay
+        )
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def delay(self, model: PerplexityModel) -> Optional[float]:
+        """
+        Start a request and get how long to wait before hedging it.
+
+        Args:
+            model: Model the request is made for.
+
+        Returns:
+            Seconds to wait for the original before hedging, or None if the
+            request should not be hedged.
+        """
+        if not self.enabled or self.max_rate <= 0:
+            return None
+
+        with self._lock:
+            self.requests += 1
+        return max(self.min_delay, self.stats.latency(model, self.percentile))
+
+    def try_hedge(self) -> bool:
+        """Reserve a hedge if the budget allows one."""
+        with self._lock:
+            if self.hedges + 1 > self.max_rate * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_outcome(self, hedge_won: bool) -> None:
+        """Record which of a hedged pair answered first."""
+        if hedge_won:
+            with self._lock:
+                self.hedge_wins += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging statistics."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedges / max(1, self.requests), 3),
+                "win_rate": round(self.hedge_wins / max(1, self.hedges), 3),
+            }
+
+
+_hedge_policy: Optional[HedgePolicy] = None
+_hedge_policy_lock = threading.Lock()
+
+
+def get_hedge_policy() -> HedgePolicy:
+    """
+    Get the process-wide hedge policy.
+
+    Returns:
+        The shared HedgePolicy, configured from PERPLEXITY_HEDGING on first use.
+    """
+    global _hedge_policy
+    with _hedge_policy_lock:
+        if _hedge_policy is None:
+            _hedge_policy = HedgePolicy()
+        return _hedge_policy
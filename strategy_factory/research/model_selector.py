@@ -5,14 +5,23 @@ Handles the selection of appropriate Perplexity models based on:
 - Research mode (Quick vs Comprehensive)
 - Query type and complexity
 - Company information availability (public vs private)
+- Per-run latency and cost budgets, using observed per-model statistics
 """
 
+import time
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
-from ..config import PerplexityModel, ResearchMode, RESEARCH_MODE_MODELS, PERPLEXITY_COSTS
+from ..config import (
+    PerplexityModel,
+    ResearchMode,
+    RESEARCH_MODE_MODELS,
+    PERPLEXITY_COSTS,
+    MODEL_SELECTION_CONFIG,
+)
 from ..models import CompanyInfoTier
+from .model_stats import ModelStats, get_model_stats
 from .query_templates import QueryCategory
 
 
@@ -23,6 +32,7 @@ class ModelSelection:
     reason: str
     estimated_cost: float
     fallback_model: Optional[PerplexityModel] = None
+    estimated_seconds: float = 0.0  # Median latency
 
 
 class ModelSelector:
@@ -33,6 +43,9 @@ class ModelSelector:
     - Research mode (quick = sonar only, comprehensive = multiple models)
     - Query category (news vs deep research)
     - Company information tier (public companies need less deep research)
+    - Run budgets: a model whose latency percentile would overrun the time
+      left, whose error rate is too high, or whose cost would exceed the
+      cost left is swapped for the next faster/cheaper one
     """
     
     # Model recommendations by query category
@@ -84,15 +97,65 @@ class ModelSelector:
         CompanyInfoTier.STARTUP_STEALTH: True,    # Upgrade to deeper models
     }
     
-    def __init__(self, mode: ResearchMode = ResearchMode.QUICK):
+    # Models to step down through when one does not fit the budget, slowest
+    # and most expensive first
+    BUDGET_FALLBACKS: List[PerplexityModel] = [
+        PerplexityModel.SONAR_DEEP_RESEARCH,
+        PerplexityModel.SONAR_REASONING_PRO,
+        PerplexityModel.SONAR_PRO,
+        PerplexityModel.SONAR_REASONING,
+        PerplexityModel.SONAR,
+    ]
+    
+    def __init__(
+        self,
+        mode: ResearchMode = ResearchMode.QUICK,
+        stats: Optional[ModelStats] = None,
+        latency_budget_seconds: Optional[float] = None,
+        cost_budget: Optional[float] = None,
+    ):
         """
         Initialize the model selector.
         
         Args:
             mode: Research mode (quick or comprehensive).
+            stats: Per-model call statistics. Defaults to the process-wide tracker.
+            latency_budget_seconds: Wall-clock budget per run (0 = none).
+                Defaults to MODEL_SELECTION_CONFIG.
+            cost_budget: Cost budget per run in USD (0 = none). Defaults to
+                MODEL_SELECTION_CONFIG.
         """
         self.mode = mode
         self.available_models = RESEARCH_MODE_MODELS[mode]
+        self.stats = stats or get_model_stats()
+        self.latency_budget = (
+            MODEL_SELECTION_CONFIG["latency_budget_seconds"]
+            if latency_budget_seconds is None else latency_budget_seconds
+        )
+        self.cost_budget = (
+            MODEL_SELECTION_CONFIG["cost_budget"] if cost_budget is None else cost_budget
+        )
+        
+        # Current run (see start_run)
+        self._run_started: Optional[float] = None
+        self.committed_cost = 0.0
+    
+    def start_run(self) -> None:
+        """Start the latency and cost budgets for a new research run."""
+        self._run_started = time.monotonic()
+        self.committed_cost = 0.0
+    
+    def reserve(self, selection: ModelSelection) -> None:
+        """Count a selection that is about to run against the run's cost budget."""
+        self.committed_cost += selection.estimated_cost
+    
+    def time_left(self) -> Optional[float]:
+        """Seconds left in the run's latency budget, or None without a budget."""
+        if self.latency_budget <= 0:
+            return None
+        if self._run_started is None:
+            return self.latency_budget
+        return self.latency_budget - (time.monotonic() - self._run_started)
     
     def select_model(
         self,
@@ -116,16 +179,10 @@ class ModelSelector:
                 model=force_model,
                 reason="Forced model selection",
                 estimated_cost=self._estimate_query_cost(force_model),
+                estimated_seconds=self.stats.latency(force_model),
             )
         
-        # Get base model for category and mode
-        base_model = self.CATEGORY_MODELS.get(category, {}).get(
-            self.mode, PerplexityModel.SONAR
-        )
-        
-        # Check if model is available in current mode
-        if base_model not in self.available_models:
-            base_model = self.available_models[0]
+        base_model = self._base_model(category)
         
         # Apply tier adjustments for comprehensive mode
         selected_model = base_model
@@ -140,6 +197,18 @@ class ModelSelector:
                     selected_model = PerplexityModel.SONAR_DEEP_RESEARCH
                     reason = f"Upgraded to deep research for {info_tier.value} company"
         
+        # Step down to a model that fits the run's budgets
+        candidates = self._budget_candidates(selected_model)
+        for i, model in enumerate(candidates):
+            problem = self._budget_problem(model)
+            if problem is None or i == len(candidates) - 1:
+                break
+            reason = f"{model.value} {problem}; stepped down"
+        if model != selected_model:
+            if problem is not None:
+                reason += " (over budget, no faster model left)"
+            selected_model = model
+        
         # Determine fallback
         fallback = PerplexityModel.SONAR if selected_model != PerplexityModel.SONAR else None
         
@@ -148,6 +217,74 @@ class ModelSelector:
             reason=reason,
             estimated_cost=self._estimate_query_cost(selected_model),
             fallback_model=fallback,
+            estimated_seconds=self.stats.latency(selected_model),
+        )
+    
+    def _budget_candidates(self, model: PerplexityModel) -> List[PerplexityModel]:
+        """Get the model followed by the available models it may step down to."""
+        if model not in self.BUDGET_FALLBACKS:
+            return [model]
+        
+        lower = self.BUDGET_FALLBACKS[self.BUDGET_FALLBACKS.index(model) + 1:]
+        return [model] + [m for m in lower if m in self.available_models]
+    
+    def _budget_problem(self, model: PerplexityModel) -> Optional[str]:
+        """
+        Check a model against the run's budgets and its observed error rate.
+        
+        Returns:
+            Why the model does not fit, or None if it does.
+        """
+        error_rate = self.stats.error_rate(model)
+        if error_rate > MODEL_SELECTION_CONFIG["max_error_rate"]:
+            return f"error rate {error_rate:.0%}"
+        
+        time_left = self.time_left()
+        if time_left is not None:
+            percentile = MODEL_SELECTION_CONFIG["latency_percentile"]
+            latency = self.stats.latency(model, percentile)
+            if latency > time_left:
+                return f"p{percentile} {latency:.0f}s exceeds {max(0.0, time_left):.0f}s left"
+        
+        if self.cost_budget > 0:
+            cost_left = self.cost_budget - self.committed_cost
+            if self._estimate_query_cost(model) > cost_left:
+                return f"cost exceeds ${max(0.0, cost_left):.4f} left"
+        
+        return None
+    
+    def _base_model(self, category: QueryCategory) -> PerplexityModel:
+        """Get the base model for a category in the current mode."""
+        base_model = self.CATEGORY_MODELS.get(category, {}).get(
+            self.mode, PerplexityModel.SONAR
+        )
+        
+        # Check if model is available in current mode
+        if base_model not in self.available_models:
+            base_model = self.available_models[0]
+        
+        return base_model
+    
+    def depends_on_info_tier(self, category: QueryCategory) -> bool:
+        """
+        Check whether the model chosen for a category can change with the info tier.
+        
+        Queries in such categories must wait for the info tier to be detected
+        before a model can be selected for them.
+        
+        Args:
+            category: Query category.
+        
+        Returns:
+            True if select_model may return a different model per info tier.
+        """
+        if self.mode != ResearchMode.COMPREHENSIVE:
+            return False
+        
+        return (
+            self._base_model(category) == PerplexityModel.SONAR_PRO
+            and PerplexityModel.SONAR_DEEP_RESEARCH in self.available_models
+            and any(self.TIER_UPGRADES.values())
         )
     
     def select_models_for_research(
@@ -174,29 +311,41 @@ class ModelSelector:
         self,
         categories: List[QueryCategory],
         queries_per_category: int = 2,
+        concurrency: int = 1,
     ) -> Dict[str, float]:
         """
-        Estimate total cost for a research session.
+        Estimate total cost and wall-clock time for a research session.
+        
+        Categories may repeat (e.g. one entry per query). Wall-clock time
+        assumes median latencies spread over `concurrency` requests in
+        flight, and is at least the slowest query's tail latency.
         
         Args:
             categories: Query categories to research.
             queries_per_category: Average queries per category.
+            concurrency: Requests in flight at once.
         
         Returns:
-            Cost breakdown dict.
+            Cost breakdown dict, with predicted seconds.
         """
         total = 0.0
         breakdown = {}
+        query_seconds = 0.0
+        slowest = 0.0
+        percentile = MODEL_SELECTION_CONFIG["latency_percentile"]
         
         for category in categories:
             selection = self.select_model(category)
             category_cost = selection.estimated_cost * queries_per_category
-            breakdown[category.value] = round(category_cost, 4)
+            breakdown[category.value] = round(breakdown.get(category.value, 0.0) + category_cost, 4)
             total += category_cost
+            query_seconds += selection.estimated_seconds * queries_per_category
+            slowest = max(slowest, self.stats.latency(selection.model, percentile))
         
         return {
             "breakdown": breakdown,
             "total": round(total, 4),
+            "predicted_seconds": round(max(query_seconds / max(1, concurrency), slowest), 1),
             "mode": self.mode.value,
         }
     
@@ -206,7 +355,11 @@ class ModelSelector:
         input_tokens: int = 500,
         output_tokens: int = 1500,
     ) -> float:
-        """Estimate cost for a single query."""
+        """Estimate cost for a single query, from billed costs once enough are recorded."""
+        observed = self.stats.mean_cost(model)
+        if observed is not None:
+            return observed
+        
         input_cost, output_cost = PERPLEXITY_COSTS.get(model, (0.001, 0.001))
         return (input_tokens / 1000 * input_cost) + (output_tokens / 1000 * output_cost)
     
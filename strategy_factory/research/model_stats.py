@@ -0,0 +1,210 @@
+"""
+Rolling per-model call statistics for Perplexity research.
+
+Every upstream request records its latency and outcome, and every request
+whose response reports usage its billed cost, under the model it was made
+for. ModelSelector reads
+latency percentiles, error rates and average cost from here to choose
+models that fit a run's latency and cost budget. A single tracker is
+shared by every client in a process and persisted between runs, so CLI
+runs start from the statistics of earlier ones.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from ..config import PerplexityModel, MODEL_SELECTION_CONFIG
+
+
+class ModelStats:
+    """
+    Thread-safe rolling window of latency, errors and cost per model.
+
+    Only the last `window` calls of each model are kept, so the statistics
+    follow changes in upstream behavior. Until a model has `min_samples`
+    calls, its latency comes from configured priors.
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        min_samples: Optional[int] = None,
+        priors: Optional[Dict[PerplexityModel, Tuple[float, float]]] = None,
+        path: Optional[Path] = None,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Calls kept per model. Defaults to MODEL_SELECTION_CONFIG.
+            min_samples: Calls needed before observed statistics are used.
+            priors: (p50, p95) latency in seconds per model, used until then.
+            path: Optional JSON file to load from and save to.
+        """
+        self.window = window or MODEL_SELECTION_CONFIG["stats_window"]
+        self.min_samples = min_samples or MODEL_SELECTION_CONFIG["min_samples"]
+        self.priors = priors or MODEL_SELECTION_CONFIG["latency_priors"]
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._errors: Dict[str, Deque[bool]] = {}
+        self._costs: Dict[str, Deque[float]] = {}
+
+        if path is not None:
+            self.load()
+
+    def _samples(self, samples: Dict[str, Deque], model: PerplexityModel) -> Deque:
+        """Get the sample window for a model, creating it if needed."""
+        key = PerplexityModel(model).value
+        if key not in samples:
+            samples[key] = deque(maxlen=self.window)
+        return samples[key]
+
+    def record_call(self, model: PerplexityModel, latency: float, error: bool = False) -> None:
+        """
+        Record one upstream request.
+
+        Args:
+            model: Model the request was made for.
+            latency: Request duration in seconds.
+            error: Whether the request failed.
+        """
+        with self._lock:
+            self._samples(self._latencies, model).append(latency)
+            self._samples(self._errors, model).append(error)
+
+    def record_cost(self, model: PerplexityModel, cost: float) -> None:
+        """Record the billed cost of one request, as reported by the API."""
+        with self._lock:
+            self._samples(self._costs, model).append(cost)
+
+    def latency(self, model: PerplexityModel, percentile: float = 50) -> float:
+        """
+        Get a latency percentile for a model.
+
+        Args:
+            model: Perplexity model.
+            percentile: Percentile (0-100).
+
+        Returns:
+            Latency in seconds: nearest-rank percentile of the observed
+            calls, or the prior (p50 for percentile <= 50, else p95).
+        """
+        with self._lock:
+            observed = sorted(self._samples(self._latencies, model))
+
+        if len(observed) < self.min_samples:
+            p50, p95 = self.priors.get(model, (5.0, 15.0))
+            return p50 if percentile <= 50 else p95
+
+        rank = max(1, math.ceil(percentile / 100 * len(observed)))
+        return observed[rank - 1]
+
+    def error_rate(self, model: PerplexityModel) -> float:
+        """Get the fraction of recent requests that failed (0 until min_samples)."""
+        with self._lock:
+            errors = self._samples(self._errors, model)
+            if len(errors) < self.min_samples:
+                return 0.0
+            return sum(errors) / len(errors)
+
+    def mean_cost(self, model: PerplexityModel) -> Optional[float]:
+        """Get the average cost per request, or None until min_samples."""
+        with self._lock:
+            costs = self._samples(self._costs, model)
+            if len(costs) < self.min_samples:
+                return None
+            return sum(costs) / len(costs)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get a summary of the statistics per model."""
+        stats = {}
+        for model in PerplexityModel:
+            with self._lock:
+                calls = len(self._samples(self._latencies, model))
+            if not calls:
+                continue
+
+            mean_cost = self.mean_cost(model)
+            stats[model.value] = {
+                "calls": calls,
+                "p50_seconds": round(self.latency(model, 50), 2),
+                "p95_seconds": round(self.latency(model, 95), 2),
+                "error_rate": round(self.error_rate(model), 3),
+                "mean_cost": round(mean_cost, 4) if mean_cost is not None else None,
+            }
+        return stats
+
+    def load(self) -> None:
+        """Load statistics saved by an earlier run, if any."""
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load model stats: {e}")
+            return
+
+        with self._lock:
+            for samples, name in (
+                (self._latencies, "latencies"),
+                (self._errors, "errors"),
+                (self._costs, "costs"),
+            ):
+                for model, values in data.get(name, {}).items():
+                    samples[model] = deque(values, maxlen=self.window)
+
+    def save(self) -> None:
+        """Save the statistics so later runs start from them."""
+        if self.path is None:
+            return
+
+        with self._lock:
+            data = {
+                "latencies": {m: list(v) for m, v in self._latencies.items()},
+                "errors": {m: list(v) for m, v in self._errors.items()},
+                "costs": {m: list(v) for m, v in self._costs.items()},
+            }
+
+        # A temp file per save, so processes sharing the file never write
+        # into each other's half-finished copy
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.path.parent, prefix=f"{self.path.name}.", suffix=".tmp", delete=False
+            ) as tmp:
+                tmp.write(json.dumps(data))
+            try:
+                os.replace(tmp.name, self.path)
+            except OSError:
+                os.unlink(tmp.name)
+                raise
+        except OSError as e:
+            print(f"Warning: Could not save model stats: {e}")
+
+
+_model_stats: Optional[ModelStats] = None
+_model_stats_lock = threading.Lock()
+
+
+def get_model_stats() -> ModelStats:
+    """
+    Get the process-wide model statistics.
+
+    Returns:
+        The shared ModelStats, loaded from MODEL_SELECTION_CONFIG["stats_file"]
+        on first use.
+    """
+    global _model_stats
+    with _model_stats_lock:
+        if _model_stats is None:
+            _model_stats = ModelStats(path=MODEL_SELECTION_CONFIG["stats_file"])
+        return _model_stats
@@ -5,29 +5,93 @@ Manages the execution of research queries in the correct order,
 handles progress tracking, and produces the final research output.
 """
 
+import asyncio
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple, Set, FrozenSet, Union
 
-from ..config import ResearchMode, PerplexityModel
+from ..config import (
+    ResearchMode,
+    PerplexityModel,
+    RESEARCH_CONCURRENCY,
+    RESEARCH_CACHE_DIR,
+    RESEARCH_BUDGET_CONFIG,
+    COMPETITOR_ENRICHMENT_CONFIG,
+    DEEP_RESEARCH_BACKGROUND,
+)
 from ..models import (
     CompanyInput,
     ResearchOutput,
     QueryResult,
     CompanyInfoTier,
+    compact_query_results,
+    expand_query_results,
 )
 from ..temporal import get_temporal_context, TemporalContext
-from .perplexity_client import PerplexityClient
+from .perplexity_client import PerplexityClient, PerplexityClientBase
+from .async_perplexity_client import AsyncPerplexityClient
 from .query_templates import QueryTemplates, QueryCategory, QueryTemplate
 from .model_selector import ModelSelector
-from .result_processor import ResultProcessor
+from .result_processor import ResultProcessor, ResearchOutputBuilder
+from .result_store import ResearchResultStore
+
+
+@dataclass(frozen=True)
+class ResearchNode:
+    """
+    A single query in the research DAG.
+    
+    `needs` lists the inputs that must exist before the node can run:
+    names of other queries, or derived inputs such as the info tier.
+    """
+    name: str
+    phase: str
+    needs: FrozenSet[str] = field(default_factory=frozenset)
+
+
+class _PlanState:
+    """Bookkeeping for one execution of a research plan."""
+    
+    def __init__(self, plan: List[ResearchNode], progress_range: Tuple[float, float]):
+        self.pending = list(plan)
+        self.available: Set[str] = set()
+        self.tier_inputs = {n.name for n in plan if n.phase == "initial_discovery"}
+        self.results: Dict[str, QueryResult] = {}
+        
+        # Competitor enrichment: in-flight futures/tasks -> result name
+        self.enrichment: Dict[Any, str] = {}
+        self.enrichment_deadline: Optional[float] = None
+        self.confidence: Dict[str, float] = {}
+        self.skipped: Set[str] = set()
+        self.downgraded: Set[str] = set()
+        self.total = len(plan)
+        self.start, self.end = progress_range
+    
+    def progress(self) -> float:
+        """Overall progress given the nodes finished so far."""
+        return self.start + (self.end - self.start) * len(self.results) / max(1, self.total)
+    
+    def stuck_error(self) -> RuntimeError:
+        """Error naming the pending nodes that can never start and what they wait for."""
+        waiting = ", ".join(
+            f"{node.name} (needs {', '.join(sorted(node.needs - self.available))})"
+            for node in self.pending
+        )
+        return RuntimeError(f"Research plan cannot finish, nodes waiting on missing inputs: {waiting}")
 
 
 class ResearchOrchestrator:
     """
     Orchestrates the complete research pipeline for a company.
     
+    Queries are grouped into phases, but executed as a DAG: each query
+    starts as soon as its inputs exist, so total latency tracks the longest
+    dependency chain rather than the sum of all phases.
+    
     Research phases:
     1. Initial Discovery - Basic company info to determine info tier
     2. Company Deep Dive - Detailed company profile
@@ -71,35 +135,83 @@ class ResearchOrchestrator:
         ],
     }
     
+    # Derived input produced once all initial_discovery queries have returned
+    INFO_TIER = "info_tier"
+    
     def __init__(
         self,
         mode: ResearchMode = ResearchMode.QUICK,
         cache_dir: Optional[Path] = None,
         progress_callback: Optional[Callable[[str, float], None]] = None,
+        max_concurrency: Optional[int] = None,
+        snapshot_callback: Optional[Callable[[Set[str], ResearchOutput], None]] = None,
+        background_deep_research: bool = False,
     ):
         """
         Initialize the research orchestrator.
         
         Args:
             mode: Research mode (quick or comprehensive).
-            cache_dir: Directory for caching results.
+            cache_dir: Directory for the query cache. Defaults to the global
+                RESEARCH_CACHE_DIR shared across companies and analysis versions.
             progress_callback: Callback for progress updates (phase, progress).
+            max_concurrency: Maximum queries in flight at once. Defaults to
+                RESEARCH_CONCURRENCY["max_in_flight"]; 1 runs queries sequentially.
+            snapshot_callback: Called after each finished batch with the names
+                of the ResearchOutput sections it updated and a partial output,
+                so consumers can start before research is done.
+            background_deep_research: Answer queries routed to deep research
+                with the fast model and keep the deep query running in the
+                background (in DEEP_RESEARCH_BACKGROUND["modes"]). The caller
+                then patches the research with collect_deep_research().
         """
         self.mode = mode
-        self.cache_dir = cache_dir
+        self.cache_dir = cache_dir or RESEARCH_CACHE_DIR
         self.progress_callback = progress_callback
+        self.snapshot_callback = snapshot_callback
+        self.max_concurrency = max(1, max_concurrency or RESEARCH_CONCURRENCY["max_in_flight"])
+        self.batch_size = max(1, min(
+            RESEARCH_CONCURRENCY["batch_size"], PerplexityClient.MAX_BATCH_QUERIES
+        ))
         
         # Initialize components
-        self.client = PerplexityClient(cache_dir=cache_dir)
+        self.client = PerplexityClient(cache_dir=self.cache_dir)
+        self.async_client: Optional[AsyncPerplexityClient] = None
+        self._stats_client: PerplexityClientBase = self.client
         self.templates = QueryTemplates()
         self.model_selector = ModelSelector(mode=mode)
         self.result_processor = ResultProcessor()
+        self.result_store = ResearchResultStore()
         self.temporal = get_temporal_context()
         
+        # Early exit: trim a section's follow-ups once it reaches this confidence
+        self.target_confidence = (
+            RESEARCH_BUDGET_CONFIG["target_confidence"]
+            if mode in RESEARCH_BUDGET_CONFIG["modes"] else 0.0
+        )
+        
+        # Competitor enrichment runs in comprehensive mode unless disabled
+        self.enrich_competitors = (
+            COMPETITOR_ENRICHMENT_CONFIG["enabled"]
+            and mode in COMPETITOR_ENRICHMENT_CONFIG["modes"]
+        )
+        
+        # Deep research answered fast first, with the deep query left running
+        self.background_deep_research = (
+            background_deep_research and mode in DEEP_RESEARCH_BACKGROUND["modes"]
+        )
+        self.deep_research: Dict[Any, str] = {}  # In-flight futures/tasks -> query name
+        self._deep_deadline: Optional[float] = None  # When the last one should have answered
+        self._deep_executor: Optional[ThreadPoolExecutor] = None
+        
         # Track state
         self.current_phase = ""
         self.results: Dict[str, QueryResult] = {}
         self.info_tier = CompanyInfoTier.PUBLIC_MEDIUM
+        self.output_builder: Optional[ResearchOutputBuilder] = None
+        self.trimmed_queries: Dict[str, str] = {}  # query name -> "skipped" | "downgraded"
+        self.dropped_enrichments: List[str] = []  # Competitors past the enrichment deadline or failed
+        self.dropped_deep_research: List[str] = []  # Deep queries past their timeout or failed
     
     def research(self, company_input: CompanyInput) -> ResearchOutput:
         """
@@ -113,98 +225,524 @@ class ResearchOrchestrator:
         """
         company_name = company_input.name
         industry = company_input.industry or "technology"
-        context = company_input.context
         
+        self._stats_client = self.client
+        self._start_output(company_input)
+        self.model_selector.start_run()
         self._report_progress("Starting research", 0)
         
-        # Phase 1: Initial Discovery
-        self._report_progress("initial_discovery", 0.05)
-        self._execute_phase(
-            "initial_discovery",
-            company_name,
-            industry,
-        )
+        # Run the query DAG: every node starts as soon as its inputs exist
+        plan = self.build_research_plan()
+        self._run_plan(plan, company_name, industry, progress_range=(0.05, 0.9))
         
-        # Detect info tier to adjust subsequent queries
-        initial_results = [
-            self.results[q]
-            for q in self.PHASE_QUERIES["initial_discovery"]
-            if q in self.results
-        ]
-        self.info_tier = self.result_processor.detect_info_tier(initial_results)
-        self._report_progress(f"Detected info tier: {self.info_tier.value}", 0.15)
-        
-        # Phase 2: Company Deep Dive (comprehensive only for private companies)
-        if self.mode == ResearchMode.COMPREHENSIVE or self.info_tier in [
-            CompanyInfoTier.PRIVATE_LIMITED,
-            CompanyInfoTier.STARTUP_STEALTH,
-        ]:
-            self._report_progress("company_deep_dive", 0.2)
-            self._execute_phase("company_deep_dive", company_name, industry)
-        
-        # Phase 3: Industry Analysis
-        self._report_progress("industry_analysis", 0.35)
-        self._execute_phase("industry_analysis", company_name, industry)
-        
-        # Phase 4: Competitive Intelligence
-        self._report_progress("competitive_intelligence", 0.5)
-        self._execute_phase("competitive_intelligence", company_name, industry)
-        
-        # Phase 5: Technology Landscape
-        self._report_progress("technology_landscape", 0.65)
-        self._execute_phase("technology_landscape", company_name, industry)
-        
-        # Phase 6: Regulatory Context (comprehensive only)
-        if self.mode == ResearchMode.COMPREHENSIVE:
-            self._report_progress("regulatory_context", 0.8)
-            self._execute_phase("regulatory_context", company_name, industry)
-        
-        # Build final output
-        self._report_progress("Processing results", 0.9)
-        output = self.result_processor.build_research_output(
-            company_name=company_name,
+        return self._build_output(company_input)
+    
+    async def research_async(
+        self,
+        company_input: CompanyInput,
+        client: Optional[AsyncPerplexityClient] = None,
+    ) -> ResearchOutput:
+        """
+        Execute the complete research pipeline on the running event loop.
+        
+        Args:
+            company_input: Company input data.
+            client: Optional AsyncPerplexityClient to use, e.g. one shared by
+                several research jobs so they reuse its connection pool.
+        
+        Returns:
+            ResearchOutput with all research results.
+        """
+        company_name = company_input.name
+        industry = company_input.industry or "technology"
+        
+        if client is not None:
+            self.async_client = client
+        self._stats_client = self._get_async_client()
+        self._start_output(company_input)
+        self.model_selector.start_run()
+        self._report_progress("Starting research", 0)
+        
+        plan = self.build_research_plan()
+        await self._run_plan_async(plan, company_name, industry, progress_range=(0.05, 0.9))
+        
+        return self._build_output(company_input)
+    
+    def _start_output(self, company_input: CompanyInput) -> None:
+        """Start the research output that results are folded into as they arrive."""
+        self.output_builder = self.result_processor.start_research_output(
+            company_name=company_input.name,
             mode=self.mode,
-            results=self.results,
-            user_context=context,
+            user_context=company_input.context,
         )
+    
+    def get_partial_output(self) -> Optional[ResearchOutput]:
+        """
+        Get the research output for the queries finished so far.
         
-        # Update info tier in output
-        output.information_tier = self.info_tier
+        Safe to call from another thread while research is running.
+        
+        Returns:
+            Partial ResearchOutput, or None before research has started.
+        """
+        if self.output_builder is None:
+            return None
+        return self.output_builder.snapshot()
+    
+    def _build_output(self, company_input: CompanyInput) -> ResearchOutput:
+        """Finish the research output the results were folded into."""
+        self._report_progress("Processing results", 0.9)
+        output = self._final_output()
+        self.result_processor.processed_count += 1
+        
+        # Later runs choose models from the latency/cost seen in this one
+        self.model_selector.stats.save()
         
         self._report_progress("Research complete", 1.0)
         
         return output
     
-    def _execute_phase(
+    def _final_output(self) -> ResearchOutput:
+        """Snapshot the output with queries in plan order and the detected info tier."""
+        output = self.output_builder.snapshot()
+        
+        # Report queries in plan order rather than completion order
+        output.raw_queries = list(self.results.values())
+        
+        # Update info tier in output
+        output.information_tier = self.info_tier
+        
+        return output
+    
+    def build_research_plan(self) -> List[ResearchNode]:
+        """
+        Build the research DAG for the current mode.
+        
+        Initial discovery runs first because it produces the info tier. Only
+        company_deep_dive (gated on the tier) and queries whose model choice
+        depends on the tier wait for it; everything else can start right away.
+        When early exit is enabled, a section's follow-up queries also wait
+        for the queries that score its confidence.
+        
+        Returns:
+            List of ResearchNode objects in phase order.
+        """
+        plan = []
+        
+        for phase, queries in self.PHASE_QUERIES.items():
+            # Regulatory context is comprehensive only
+            if phase == "regulatory_context" and self.mode != ResearchMode.COMPREHENSIVE:
+                continue
+            
+            for query_name in queries:
+                template = self.templates.get_template(query_name)
+                if not template:
+                    continue
+                
+                # Filter queries based on mode
+                if self.mode == ResearchMode.QUICK and not template.required_for_quick_mode:
+                    continue
+                
+                needs = set()
+                if phase != "initial_discovery" and (
+                    phase == "company_deep_dive"
+                    or self.model_selector.depends_on_info_tier(template.category)
+                ):
+                    needs.add(self.INFO_TIER)
+                
+                plan.append(ResearchNode(
+                    name=query_name,
+                    phase=phase,
+                    needs=frozenset(needs),
+                ))
+        
+        if self.target_confidence > 0:
+            plan = self._add_follow_up_needs(plan)
+        
+        return plan
+    
+    def _add_follow_up_needs(self, plan: List[ResearchNode]) -> List[ResearchNode]:
+        """Make each section's follow-up queries wait for its confidence queries."""
+        planned = {node.name for node in plan}
+        follow_ups = self.result_processor.SECTION_FOLLOW_UPS
+        
+        section_needs = {}
+        for section, queries in self.result_processor.CONFIDENCE_SECTIONS.items():
+            for follow_up in follow_ups.get(section, []):
+                section_needs[follow_up] = frozenset(q for q in queries if q in planned)
+        
+        return [
+            replace(node, needs=node.needs | section_needs[node.name])
+            if node.name in section_needs else node
+            for node in plan
+        ]
+    
+    def _should_run(self, node: ResearchNode) -> bool:
+        """Check whether a node whose inputs exist should actually run."""
+        # Company deep dive: comprehensive mode, or private companies
+        if node.phase == "company_deep_dive":
+            return self.mode == ResearchMode.COMPREHENSIVE or self.info_tier in [
+                CompanyInfoTier.PRIVATE_LIMITED,
+                CompanyInfoTier.STARTUP_STEALTH,
+            ]
+        return True
+    
+    def _run_plan(
         self,
-        phase: str,
+        plan: List[ResearchNode],
         company_name: str,
         industry: str,
+        progress_range: Tuple[float, float] = (0.0, 1.0),
     ) -> None:
         """
-        Execute all queries for a research phase.
+        Execute a research plan, launching each node once its inputs exist.
+        
+        At most max_concurrency queries are in flight at once. Results are
+        merged into self.results in plan order once all nodes have finished.
         
         Args:
-            phase: Phase name.
+            plan: Research nodes to execute.
             company_name: Company name.
             industry: Industry.
+            progress_range: (start, end) overall progress to spread updates over.
         """
-        self.current_phase = phase
-        queries = self.PHASE_QUERIES.get(phase, [])
-        
-        # Filter queries based on mode
-        if self.mode == ResearchMode.QUICK:
-            queries = [
-                q for q in queries
-                if self.templates.get_template(q) and 
-                self.templates.get_template(q).required_for_quick_mode
-            ]
+        state = _PlanState(plan, progress_range)
+        # Not a context manager: enrichments past the deadline are not waited for
+        enrich_executor = ThreadPoolExecutor(
+            max_workers=COMPETITOR_ENRICHMENT_CONFIG["max_competitors"]
+        )
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                running: Dict[Future, List[ResearchNode]] = {}
+                
+                while state.pending or running:
+                    for batch in self._launch_ready(state, company_name, industry):
+                        future = self._submit_batch(executor, batch)
+                        running[future] = [job["node"] for job in batch]
+                        for name, kwargs in self._deep_research_jobs(batch):
+                            deep = self._get_deep_executor().submit(self.client.search, **kwargs)
+                            self.deep_research[deep] = name
+                    
+                    if not running:
+                        # Nothing left that could release the pending nodes
+                        if state.pending:
+                            raise state.stuck_error()
+                        break
+                    
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self._complete_batch(state, running.pop(future), future.result())
+                    
+                    for job in self._start_enrichment(state, company_name, industry):
+                        future = enrich_executor.submit(self.client.search, **job["kwargs"])
+                        state.enrichment[future] = job["name"]
+            
+            self._merge_plan_results(plan, state)
+            
+            if state.enrichment:
+                done, _ = wait(state.enrichment, timeout=self._enrichment_time_left(state))
+                self._finish_enrichment(state, {
+                    state.enrichment[future]: future.exception() or future.result()
+                    for future in done
+                })
+        finally:
+            enrich_executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def _run_plan_async(
+        self,
+        plan: List[ResearchNode],
+        company_name: str,
+        industry: str,
+        progress_range: Tuple[float, float] = (0.0, 1.0),
+    ) -> None:
+        """
+        Execute a research plan on the event loop with the async client.
+        
+        Same scheduling as _run_plan, but each batch is a task rather than a
+        worker thread, so many research jobs can share one loop.
+        
+        Args:
+            plan: Research nodes to execute.
+            company_name: Company name.
+            industry: Industry.
+            progress_range: (start, end) overall progress to spread updates over.
+        """
+        state = _PlanState(plan, progress_range)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        running: Dict[asyncio.Task, List[ResearchNode]] = {}
+        
+        async def run_batch(batch: List[Dict[str, Any]]) -> List[QueryResult]:
+            async with semaphore:
+                return await self._search_batch_async(batch)
+        
+        try:
+            while state.pending or running:
+                for batch in self._launch_ready(state, company_name, industry):
+                    task = asyncio.ensure_future(run_batch(batch))
+                    running[task] = [job["node"] for job in batch]
+                    for name, kwargs in self._deep_research_jobs(batch):
+                        deep = asyncio.ensure_future(self._get_async_client().search(**kwargs))
+                        self.deep_research[deep] = name
+                
+                if not running:
+                    # Nothing left that could release the pending nodes
+                    if state.pending:
+                        raise state.stuck_error()
+                    break
+                
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    self._complete_batch(state, running.pop(task), task.result())
+                
+                for job in self._start_enrichment(state, company_name, industry):
+                    task = asyncio.ensure_future(self._get_async_client().search(**job["kwargs"]))
+                    state.enrichment[task] = job["name"]
+            
+            self._merge_plan_results(plan, state)
+            
+            if state.enrichment:
+                done, _ = await asyncio.wait(
+                    state.enrichment, timeout=self._enrichment_time_left(state)
+                )
+                self._finish_enrichment(state, {
+                    state.enrichment[task]: task.exception() or task.result()
+                    for task in done
+                })
+        finally:
+            for task in list(running) + list(state.enrichment):
+                task.cancel()
+    
+    def _launch_ready(
+        self,
+        state: "_PlanState",
+        company_name: str,
+        industry: str,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Take every pending node whose inputs now exist and batch it for launch.
+        
+        Derives the info tier first if initial discovery has just finished.
+        Nodes settled without running (skipped, or not needed for this
+        company) release their dependents in the same call.
+        
+        Returns:
+            Batches ready to submit (see _group_batches).
+        """
+        # Derive the info tier once initial discovery is in
+        if self.INFO_TIER not in state.available and state.tier_inputs <= state.available:
+            initial_results = [state.results[q] for q in state.tier_inputs]
+            self.info_tier = self.result_processor.detect_info_tier(initial_results)
+            state.available.add(self.INFO_TIER)
+            self._report_progress(
+                f"Detected info tier: {self.info_tier.value}",
+                state.progress(),
+            )
+        
+        ready = []
+        released = True
+        while released:
+            released = False
+            for node in [n for n in state.pending if n.needs <= state.available]:
+                state.pending.remove(node)
+                if node.name in state.skipped or not self._should_run(node):
+                    # Settled without a result, so nodes waiting on it can start now
+                    state.available.add(node.name)
+                    state.total -= 1
+                    released = True
+                    continue
+                ready.append(node)
+        
+        return self._group_batches(ready, company_name, industry, state.downgraded)
+    
+    def _complete_batch(
+        self,
+        state: "_PlanState",
+        nodes: List[ResearchNode],
+        results: List[QueryResult],
+    ) -> None:
+        """Record the results of a finished batch and report progress."""
+        sections = set()
+        updated = set()
+        for node, result in zip(nodes, results):
+            state.results[node.name] = self.result_store.add(result)
+            state.available.add(node.name)
+            self.current_phase = node.phase
+            self._report_progress(f"{node.phase}: {node.name}", state.progress())
+            sections.add(self.result_processor.section_for_query(node.name))
+            if self.output_builder is not None:
+                updated.add(self.output_builder.add(node.name, state.results[node.name]))
+        
+        if self.target_confidence > 0:
+            for section in sections - {None}:
+                self._update_section_confidence(state, section)
         
-        for i, query_name in enumerate(queries):
-            template = self.templates.get_template(query_name)
-            if not template:
+        updated.discard(None)
+        if updated and self.snapshot_callback:
+            self.snapshot_callback(updated, self.output_builder.snapshot())
+    
+    def _update_section_confidence(self, state: "_PlanState", section: str) -> None:
+        """
+        Re-score a section and trim its pending follow-ups once it hits the target.
+        
+        Depending on RESEARCH_BUDGET_CONFIG["on_target"], follow-ups are
+        either skipped or run with the cheaper downgrade model.
+        """
+        confidence = self.result_processor.score_section(section, state.results)
+        state.confidence[section] = confidence
+        if confidence < self.target_confidence:
+            return
+        
+        pending = {node.name for node in state.pending}
+        skip = RESEARCH_BUDGET_CONFIG["on_target"] == "skip"
+        
+        for name in self.result_processor.SECTION_FOLLOW_UPS.get(section, []):
+            if name not in pending or name in self.trimmed_queries:
+                continue
+            
+            if skip:
+                state.skipped.add(name)
+                self.trimmed_queries[name] = "skipped"
+            else:
+                state.downgraded.add(name)
+                self.trimmed_queries[name] = "downgraded"
+            message = f"{section} confidence {confidence:.1f}: {self.trimmed_queries[name]} {name}"
+            print(f"Warning: Research budget reached, {message}")
+            self._report_progress(message, state.progress())
+    
+    def _start_enrichment(
+        self,
+        state: "_PlanState",
+        company_name: str,
+        industry: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Prepare one profile query per detected competitor, once per plan.
+        
+        Runs as soon as competitors_list has returned and starts the
+        enrichment deadline.
+        
+        Returns:
+            Jobs to launch, each a dict of the result name and the search
+            keyword arguments.
+        """
+        if (
+            not self.enrich_competitors
+            or state.enrichment_deadline is not None
+            or "competitors_list" not in state.results
+        ):
+            return []
+        
+        state.enrichment_deadline = (
+            time.monotonic() + COMPETITOR_ENRICHMENT_CONFIG["deadline_seconds"]
+        )
+        competitors = self.result_processor.extract_competitors(
+            {"competitors_list": state.results["competitors_list"]}
+        )
+        template = self.templates.COMPETITOR_PROFILE
+        
+        jobs = []
+        for comp in competitors[:COMPETITOR_ENRICHMENT_CONFIG["max_competitors"]]:
+            jobs.append({
+                "name": self.result_processor.COMPETITOR_PROFILE_PREFIX + comp.name,
+                "kwargs": {
+                    "query": self.templates.render_query(
+                        template,
+                        company_name=company_name,
+                        industry=industry,
+                        competitor_name=comp.name,
+                    ),
+                    "max_results": template.max_results,
+                    "max_tokens_per_page": template.max_tokens_per_page,
+                    "search_recency_filter": template.recency_filter,
+                    "model": COMPETITOR_ENRICHMENT_CONFIG["model"],
+                    "cache_ttl_hours": template.cache_ttl_hours,
+                    "cache_label": template.name,
+                    "cache_identity": self.templates.cache_identity(
+                        template,
+                        company_name=company_name,
+                        industry=industry,
+                        competitor_name=comp.name,
+                    ),
+                },
+            })
+        
+        if jobs:
+            self._report_progress(
+                f"competitor_enrichment: {len(jobs)} competitors",
+                state.progress(),
+            )
+        return jobs
+    
+    def _enrichment_time_left(self, state: "_PlanState") -> float:
+        """Seconds until the competitor enrichment deadline."""
+        return max(0.0, state.enrichment_deadline - time.monotonic())
+    
+    def _finish_enrichment(
+        self,
+        state: "_PlanState",
+        finished: Dict[str, Union[QueryResult, BaseException]],
+    ) -> None:
+        """Fold finished enrichments into the results and drop the rest."""
+        added = False
+        for name in state.enrichment.values():
+            if name not in finished:
+                self.dropped_enrichments.append(name)
+                continue
+            
+            if isinstance(finished[name], BaseException):
+                # Enrichment is optional: a failed profile must not fail research
+                print(f"Warning: Competitor enrichment {name} failed: {finished[name]}")
+                self.dropped_enrichments.append(name)
                 continue
             
+            self.results[name] = self.result_store.add(finished[name])
+            if self.output_builder is not None:
+                self.output_builder.add(name, self.results[name])
+            added = True
+        
+        if self.dropped_enrichments:
+            self._report_progress(
+                f"competitor_enrichment: dropped {len(self.dropped_enrichments)} (deadline or error)",
+                state.progress(),
+            )
+        if added and self.snapshot_callback and self.output_builder is not None:
+            self.snapshot_callback({"competitors"}, self.output_builder.snapshot())
+    
+    def _merge_plan_results(self, plan: List[ResearchNode], state: "_PlanState") -> None:
+        """Merge in plan order so results are independent of completion order."""
+        for node in plan:
+            if node.name in state.results:
+                self.results[node.name] = state.results[node.name]
+    
+    def _group_batches(
+        self,
+        nodes: List[ResearchNode],
+        company_name: str,
+        industry: str,
+        downgraded: Set[str] = frozenset(),
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Render ready nodes and pack compatible ones into multi-query batches.
+        
+        Queries are compatible when they share a recency filter, model and
+        result budget, since those apply to the whole request.
+        
+        Args:
+            nodes: Nodes ready to run.
+            company_name: Company name.
+            industry: Industry.
+            downgraded: Names of nodes to run with the budget downgrade model.
+        
+        Returns:
+            List of batches, each a list of job dicts (node, query,
+            cache_identity, template, model, deep_selection).
+        """
+        groups: Dict[Tuple[str, PerplexityModel, int, int], List[Dict[str, Any]]] = {}
+        
+        for node in nodes:
+            template = self.templates.get_template(node.name)
+            
             # Render query
             query = self.templates.render_query(
                 template,
@@ -212,26 +750,228 @@ class ResearchOrchestrator:
                 industry=industry,
             )
             
-            # Select model
+            # Select model (info tier is known here if the node needed it)
             selection = self.model_selector.select_model(
                 template.category,
                 info_tier=self.info_tier,
+                force_model=(
+                    RESEARCH_BUDGET_CONFIG["downgrade_model"]
+                    if node.name in downgraded else None
+                ),
             )
             
-            # Execute query
-            result = self.client.search(
-                query=query,
-                max_results=10,
-                search_recency_filter=template.recency_filter,
-                model=selection.model,
+            # Answer with the fast model now; the deep query runs in the
+            # background and is counted against the budget when it is sent
+            deep_selection = None
+            if (
+                self.background_deep_research
+                and selection.model == PerplexityModel.SONAR_DEEP_RESEARCH
+            ):
+                deep_selection = selection
+                selection = self.model_selector.select_model(
+                    template.category,
+                    force_model=DEEP_RESEARCH_BACKGROUND["fast_model"],
+                )
+            self.model_selector.reserve(selection)
+            
+            group_key = (
+                template.recency_filter,
+                selection.model,
+                template.max_results,
+                template.max_tokens_per_page,
             )
+            groups.setdefault(group_key, []).append({
+                "node": node,
+                "query": query,
+                "cache_identity": self.templates.cache_identity(
+                    template,
+                    company_name=company_name,
+                    industry=industry,
+                ),
+                "template": template,
+                "model": selection.model,
+                "deep_selection": deep_selection,
+            })
+        
+        batches = []
+        for jobs in groups.values():
+            for i in range(0, len(jobs), self.batch_size):
+                batches.append(jobs[i:i + self.batch_size])
+        return batches
+    
+    def _deep_research_jobs(self, batch: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Get the background deep queries for the jobs in a batch answered fast.
+        
+        Each deep query is counted against the cost budget here, as it is
+        sent, and pushes back the collection deadline to when its model
+        usually answers (DEEP_RESEARCH_BACKGROUND["latency_percentile"]).
+        """
+        jobs = []
+        for job in batch:
+            selection = job["deep_selection"]
+            if selection is None:
+                continue
             
-            # Store result
-            self.results[query_name] = result
+            self.model_selector.reserve(selection)
+            expected = self.model_selector.stats.latency(
+                selection.model, DEEP_RESEARCH_BACKGROUND["latency_percentile"]
+            )
+            self._deep_deadline = max(
+                self._deep_deadline or 0.0, time.monotonic() + expected
+            )
             
-            # Update progress within phase
-            phase_progress = (i + 1) / len(queries)
-            self._report_progress(f"{phase}: {query_name}", None)
+            template = job["template"]
+            jobs.append((job["node"].name, {
+                "query": job["query"],
+                "max_results": template.max_results,
+                "max_tokens_per_page": template.max_tokens_per_page,
+                "search_recency_filter": template.recency_filter,
+                "model": selection.model,
+                "cache_ttl_hours": template.cache_ttl_hours,
+                "cache_label": job["node"].name,
+                "cache_identity": job["cache_identity"],
+            }))
+        return jobs
+    
+    def _get_deep_executor(self) -> ThreadPoolExecutor:
+        """Get the executor for background deep queries, creating it on first use."""
+        if self._deep_executor is None:
+            self._deep_executor = ThreadPoolExecutor(
+                max_workers=DEEP_RESEARCH_BACKGROUND["workers"]
+            )
+        return self._deep_executor
+    
+    def collect_deep_research(
+        self,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Set[str], ResearchOutput]:
+        """
+        Wait for the background deep queries and patch their results in.
+        
+        Deep answers replace the fast answers of the same queries. Queries
+        still running at the timeout are cancelled, and those and failed
+        ones keep their fast answers.
+        
+        Args:
+            timeout: Seconds to wait. Defaults to the time until every deep
+                query should have answered, from the model's observed latency.
+        
+        Returns:
+            Tuple of (names of the ResearchOutput sections that were patched,
+            the patched research output).
+        """
+        if timeout is None:
+            timeout = self._deep_time_left()
+        
+        try:
+            done, _ = wait(self.deep_research, timeout=timeout)
+            return self._finish_deep_research({
+                self.deep_research[future]: future.result()
+                for future in done if future.exception() is None
+            })
+        finally:
+            if self._deep_executor is not None:
+                self._deep_executor.shutdown(wait=False, cancel_futures=True)
+                self._deep_executor = None
+    
+    async def collect_deep_research_async(
+        self,
+        timeout: Optional[float] = None,
+    ) -> Tuple[Set[str], ResearchOutput]:
+        """Async version of collect_deep_research(), for research_async()."""
+        if timeout is None:
+            timeout = self._deep_time_left()
+        
+        try:
+            done = set()
+            if self.deep_research:
+                done, _ = await asyncio.wait(self.deep_research, timeout=timeout)
+            return self._finish_deep_research({
+                self.deep_research[task]: task.result()
+                for task in done if task.exception() is None
+            })
+        finally:
+            for task in self.deep_research:
+                task.cancel()
+    
+    def _deep_time_left(self) -> float:
+        """Seconds until the in-flight deep queries should all have answered."""
+        if self._deep_deadline is None:
+            return 0.0
+        return max(0.0, self._deep_deadline - time.monotonic())
+    
+    def _finish_deep_research(
+        self,
+        finished: Dict[str, QueryResult],
+    ) -> Tuple[Set[str], ResearchOutput]:
+        """Swap finished deep answers in for the fast ones and drop the rest."""
+        updated = set()
+        for name in self.deep_research.values():
+            result = finished.get(name)
+            if result is None or result.error or not result.results:
+                self.dropped_deep_research.append(name)
+                continue
+            
+            self.results[name] = self.result_store.add(result)
+            updated.add(self.output_builder.add(name, self.results[name]))
+        self.deep_research = {}
+        
+        updated.discard(None)
+        if self.dropped_deep_research:
+            print(
+                f"Warning: Deep research kept fast answers for: "
+                f"{', '.join(self.dropped_deep_research)}"
+            )
+        
+        # Deep latencies inform later runs' model choices too
+        self.model_selector.stats.save()
+        
+        output = self._final_output()
+        if updated and self.snapshot_callback:
+            self.snapshot_callback(updated, output)
+        return updated, output
+    
+    def _submit_batch(
+        self,
+        executor: ThreadPoolExecutor,
+        batch: List[Dict[str, Any]],
+    ) -> Future:
+        """Submit a batch of compatible queries as one multi-query search."""
+        first = batch[0]
+        
+        return executor.submit(
+            self.client.search_batch,
+            [job["query"] for job in batch],
+            max_results=first["template"].max_results,
+            max_tokens_per_page=first["template"].max_tokens_per_page,
+            search_recency_filter=first["template"].recency_filter,
+            model=first["model"],
+            cache_ttl_hours=[job["template"].cache_ttl_hours for job in batch],
+            cache_labels=[job["node"].name for job in batch],
+            cache_identities=[job["cache_identity"] for job in batch],
+        )
+    
+    async def _search_batch_async(self, batch: List[Dict[str, Any]]) -> List[QueryResult]:
+        """Run a batch of compatible queries as one async multi-query search."""
+        first = batch[0]
+        
+        return await self._get_async_client().search_batch(
+            [job["query"] for job in batch],
+            max_results=first["template"].max_results,
+            max_tokens_per_page=first["template"].max_tokens_per_page,
+            search_recency_filter=first["template"].recency_filter,
+            model=first["model"],
+            cache_ttl_hours=[job["template"].cache_ttl_hours for job in batch],
+            cache_labels=[job["node"].name for job in batch],
+            cache_identities=[job["cache_identity"] for job in batch],
+        )
+    
+    def _get_async_client(self) -> AsyncPerplexityClient:
+        """Get the async client, creating it on first use."""
+        if self.async_client is None:
+            self.async_client = AsyncPerplexityClient(cache_dir=self.cache_dir)
+        return self.async_client
     
     def _report_progress(self, message: str, progress: Optional[float]) -> None:
         """Report progress to callback if set."""
@@ -240,7 +980,11 @@ class ResearchOrchestrator:
     
     def get_cost_summary(self) -> Dict[str, Any]:
         """Get cost summary for the research session."""
-        return self.client.get_cost_summary()
+        return self._stats_client.get_cost_summary()
+    
+    def get_cache_report(self) -> Dict[str, Any]:
+        """Get the query cache hit/miss report for the research session."""
+        return self._stats_client.get_cache_report()
     
     def save_research_cache(self, output_dir: Path) -> None:
         """
@@ -252,28 +996,20 @@ class ResearchOrchestrator:
         output_dir.mkdir(parents=True, exist_ok=True)
         cache_file = output_dir / "research_cache.json"
         
+        names = list(self.results)
+        compact = compact_query_results(
+            [self.results[name] for name in names],
+            max_snippet_chars=500,  # Truncate for storage
+        )
+        
+        # Sources shared by several queries are stored once
         cache_data = {
             "timestamp": datetime.now().isoformat(),
             "mode": self.mode.value,
             "info_tier": self.info_tier.value,
-            "results": {
-                name: {
-                    "query": r.query,
-                    "model_used": r.model_used,
-                    "result_count": r.result_count,
-                    "cost_estimate": r.cost_estimate,
-                    "results": [
-                        {
-                            "title": sr.title,
-                            "url": sr.url,
-                            "snippet": sr.snippet[:500],  # Truncate for storage
-                            "date": sr.date,
-                        }
-                        for sr in r.results
-                    ],
-                }
-                for name, r in self.results.items()
-            },
+            "sources": compact["sources"],
+            "snippets": compact["snippets"],
+            "results": dict(zip(names, compact["queries"])),
         }
         
         with open(cache_file, "w") as f:
@@ -300,6 +1036,18 @@ class ResearchOrchestrator:
             self.info_tier = CompanyInfoTier(data["info_tier"])
             
             # Reconstruct results
+            if "snippets" in data:
+                names = list(data["results"])
+                queries = expand_query_results({
+                    "sources": data["sources"],
+                    "snippets": data["snippets"],
+                    "queries": [data["results"][name] for name in names],
+                })
+                for name, query in zip(names, queries):
+                    self.results[name] = self.result_store.add(QueryResult(**query))
+                return True
+            
+            # Older caches stored every search result inline
             from ..models import SearchResult
             
             for name, result_data in data["results"].items():
@@ -313,14 +1061,14 @@ class ResearchOrchestrator:
                     for r in result_data["results"]
                 ]
                 
-                self.results[name] = QueryResult(
+                self.results[name] = self.result_store.add(QueryResult(
                     query=result_data["query"],
                     model_used=result_data["model_used"],
                     results=results,
                     result_count=result_data["result_count"],
                     timestamp=datetime.fromisoformat(data["timestamp"]),
                     cost_estimate=result_data["cost_estimate"],
-                )
+                ))
             
             return True
             
@@ -365,3 +1113,48 @@ def run_research(
     )
     
     return orchestrator.research(company_input)
+
+
+async def run_research_async(
+    company_name: str,
+    context: str = "",
+    industry: str = "",
+    mode: ResearchMode = ResearchMode.QUICK,
+    cache_dir: Optional[Path] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    client: Optional[AsyncPerplexityClient] = None,
+) -> ResearchOutput:
+    """
+    Async convenience function to run research for a company.
+    
+    Args:
+        company_name: Company name.
+        context: User-provided context.
+        industry: Company industry.
+        mode: Research mode.
+        cache_dir: Cache directory.
+        progress_callback: Progress callback.
+        client: Optional shared AsyncPerplexityClient. If not provided, a
+            client is created for this run and closed afterwards.
+    
+    Returns:
+        ResearchOutput with research results.
+    """
+    company_input = CompanyInput(
+        name=company_name,
+        context=context,
+        mode=mode,
+        industry=industry,
+    )
+    
+    orchestrator = ResearchOrchestrator(
+        mode=mode,
+        cache_dir=cache_dir,
+        progress_callback=progress_callback,
+    )
+    
+    try:
+        return await orchestrator.research_async(company_input, client=client)
+    finally:
+        if client is None and orchestrator.async_client is not None:
+            await orchestrator.async_client.aclose()
@@ -6,81 +6,194 @@ with automatic retries, exponential backoff, and cost tracking.
 """
 
 import os
-import time
 import hashlib
 import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union
-from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Any, Union, Tuple, Set, Callable
 
 from perplexity import Perplexity
 
 from ..config import (
-    RETRY_CONFIG,
     PERPLEXITY_COSTS,
     PerplexityModel,
     QUALITY_DOMAINS,
+    RESEARCH_CACHE_CONFIG,
+    PERPLEXITY_HEDGING,
 )
+from ..credentials import CredentialPool, configured_keys, get_credential_pool
 from ..models import SearchResult, QueryResult
+from ..replay import ApiRecorder, get_api_recorder
+from ..retry_policy import RetryPolicy, get_circuit_breaker
+from ..single_flight import get_single_flight
+from .cache_store import CacheEntry, ResearchCacheStore
+from .hedging import HedgePolicy, get_hedge_policy
+from .model_stats import ModelStats, get_model_stats
+from .rate_limiter import TokenBucketRateLimiter, get_shared_rate_limiter
+
+
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+_refresh_executor_lock = threading.Lock()
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    """Get the process-wide executor for background cache refreshes."""
+    global _refresh_executor
+    with _refresh_executor_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=RESEARCH_CACHE_CONFIG["refresh_workers"],
+                thread_name_prefix="perplexity-refresh",
+            )
+        return _refresh_executor
 
 
-@dataclass
-class CacheEntry:
-    """Represents a cached query result."""
-    query_hash: str
-    query: str
-    result: QueryResult
-    timestamp: datetime
-    ttl_hours: int = 24
+_request_executor: Optional[ThreadPoolExecutor] = None
+_request_executor_lock = threading.Lock()
 
 
-class PerplexityClient:
+def _get_request_executor() -> ThreadPoolExecutor:
+    """Get the process-wide executor that runs the originals of hedged requests."""
+    global _request_executor
+    with _request_executor_lock:
+        if _request_executor is None:
+            _request_executor = ThreadPoolExecutor(
+                max_workers=PERPLEXITY_HEDGING["request_workers"],
+                thread_name_prefix="perplexity-request",
+            )
+        return _request_executor
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    """Get the process-wide executor that runs the duplicates of hedged requests."""
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=PERPLEXITY_HEDGING["workers"],
+                thread_name_prefix="perplexity-hedge",
+            )
+        return _hedge_executor
+
+
+class PerplexityClientBase:
     """
-    Wrapper for Perplexity Search API with retry logic and caching.
+    Transport-independent parts of the Perplexity clients.
     
-    Features:
-    - Automatic retry with exponential backoff
-    - Query result caching
-    - Cost estimation and tracking
-    - Rate limiting
-    - Multi-query support
+    Holds caching, request building, response parsing, rate limiter
+    access and cost tracking. Subclasses provide the actual HTTP calls
+    (blocking in PerplexityClient, asyncio in AsyncPerplexityClient).
     """
     
+    # Maximum queries the Search API accepts in one request
+    MAX_BATCH_QUERIES = 5
+    
+    # Cache keys with a background refresh in flight, across all clients
+    _refreshing: Set[str] = set()
+    _refreshing_lock = threading.Lock()
+    
     def __init__(
         self,
         api_key: Optional[str] = None,
         cache_dir: Optional[Path] = None,
         enable_cache: bool = True,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        stale_grace_ratio: Optional[float] = None,
+        recorder: Optional[ApiRecorder] = None,
+        model_stats: Optional[ModelStats] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        credentials: Optional[CredentialPool] = None,
     ):
         """
         Initialize the Perplexity client.
         
         Args:
-            api_key: Perplexity API key. If not provided, uses PERPLEXITY_API_KEY env var.
+            api_key: Perplexity API key. If not provided, uses PERPLEXITY_API_KEY env var,
+                or the single key in PERPLEXITY_API_KEYS. Not required when
+                replaying recorded fixtures.
             cache_dir: Directory for caching query results.
             enable_cache: Whether to enable result caching.
+            rate_limiter: Rate limiter to use. Defaults to the process-wide
+                limiter shared by all clients.
+            stale_grace_ratio: How long past its TTL an entry may still be
+                served while it refreshes, as a fraction of the TTL (0 disables
+                stale-while-revalidate). Defaults to RESEARCH_CACHE_CONFIG.
+            recorder: API record/replay store. Defaults to the process-wide
+                recorder configured by API_REPLAY_CONFIG.
+            model_stats: Per-model latency/error/cost tracker. Defaults to the
+                process-wide tracker read by ModelSelector.
+            hedge_policy: When to send a duplicate of a slow request, and how
+                often. Defaults to the process-wide policy (PERPLEXITY_HEDGING).
+            credentials: Pool of API keys to spread requests across, each with
+                its own rate limit. Defaults to the process-wide pool when
+                PERPLEXITY_API_KEYS lists several keys and no api_key is given.
         """
-        self.api_key = api_key or os.getenv("PERPLEXITY_API_KEY")
+        self.recorder = recorder or get_api_recorder()
+        if credentials is None and not api_key:
+            credentials = get_credential_pool("perplexity")
+        self.credentials = credentials
+        self.api_key = api_key or (
+            credentials.keys[0] if credentials
+            else os.getenv("PERPLEXITY_API_KEY") or next(iter(configured_keys("perplexity")), None)
+        )
         if not self.api_key:
-            raise ValueError("PERPLEXITY_API_KEY not found in environment variables")
+            if not self.recorder.replaying:
+                raise ValueError(
+                    "PERPLEXITY_API_KEY (or PERPLEXITY_API_KEYS) not found in environment variables"
+                )
+            self.api_key = "replay"
         
-        self.client = Perplexity(api_key=self.api_key)
         self.enable_cache = enable_cache
         self.cache_dir = cache_dir
-        self.cache: Dict[str, CacheEntry] = {}
+        if stale_grace_ratio is None:
+            stale_grace_ratio = RESEARCH_CACHE_CONFIG["stale_grace_ratio"]
+        self.stale_grace_ratio = max(0.0, stale_grace_ratio)
+        # Entries are read lazily by key; writes are single-row upserts.
+        # The store evicts LRU entries past its caps and keeps expired
+        # entries only while they can still be served stale.
+        self.cache = ResearchCacheStore(
+            cache_dir if enable_cache else None,
+            stale_grace_ratio=self.stale_grace_ratio,
+        )
         
         # Cost tracking
         self.total_cost = 0.0
         self.query_count = 0
+        self._stats_lock = threading.Lock()
+        self.model_stats = model_stats or get_model_stats()
+        
+        # Hedged requests sent by this client, and how many answered first
+        self.hedge_policy = hedge_policy or get_hedge_policy()
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.hedge_cost = 0.0
+        
+        # Cache hit/miss tracking for this client's session
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_savings = 0.0
+        self.cache_stale_hits = 0
+        self.cache_refreshes = 0
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
+        
+        # Rate limiting (shared across clients so concurrent jobs stay in quota);
+        # with a credential pool, each key is rate limited by the pool instead
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
         
-        # Rate limiting
-        self.last_request_time = 0.0
-        self.min_request_interval = 1.0  # seconds between requests
+        # Retries with a circuit breaker shared by all Perplexity clients
+        self.retry_policy = RetryPolicy(get_circuit_breaker("perplexity"))
         
-        # Load cache from disk if available
-        if self.cache_dir and self.enable_cache:
-            self._load_cache()
+        # Identical cache misses in flight across clients share one request
+        self.single_flight = get_single_flight("perplexity")
+        self.coalesced_requests = 0
     
     def _get_cache_key(self, query: str, **params) -> str:
         """Generate a cache key from query and parameters."""
@@ -88,71 +201,42 @@ class PerplexityClient:
         cache_str = json.dumps(cache_data, sort_keys=True)
         return hashlib.md5(cache_str.encode()).hexdigest()
     
-    def _load_cache(self) -> None:
-        """Load cache from disk."""
-        if not self.cache_dir:
-            return
-        
-        cache_file = self.cache_dir / "research_cache.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, "r") as f:
-                    data = json.load(f)
-                    for key, entry in data.items():
-                        # Reconstruct QueryResult from dict
-                        result_dict = entry["result"]
-                        result_dict["timestamp"] = datetime.fromisoformat(result_dict["timestamp"])
-                        results = [SearchResult(**r) for r in result_dict["results"]]
-                        result_dict["results"] = results
-                        
-                        self.cache[key] = CacheEntry(
-                            query_hash=key,
-                            query=entry["query"],
-                            result=QueryResult(**result_dict),
-                            timestamp=datetime.fromisoformat(entry["timestamp"]),
-                            ttl_hours=entry.get("ttl_hours", 24),
-                        )
-            except Exception as e:
-                print(f"Warning: Could not load cache: {e}")
-    
-    def _save_cache(self) -> None:
-        """Save cache to disk."""
-        if not self.cache_dir:
-            return
-        
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        cache_file = self.cache_dir / "research_cache.json"
-        
-        try:
-            data = {}
-            for key, entry in self.cache.items():
-                result_dict = entry.result.model_dump()
-                result_dict["timestamp"] = result_dict["timestamp"].isoformat()
-                result_dict["results"] = [r.model_dump() for r in entry.result.results]
-                
-                data[key] = {
-                    "query": entry.query,
-                    "result": result_dict,
-                    "timestamp": entry.timestamp.isoformat(),
-                    "ttl_hours": entry.ttl_hours,
-                }
-            
-            with open(cache_file, "w") as f:
-                json.dump(data, f, indent=2, default=str)
-        except Exception as e:
-            print(f"Warning: Could not save cache: {e}")
-    
     def _is_cache_valid(self, entry: CacheEntry) -> bool:
         """Check if a cache entry is still valid."""
         age_hours = (datetime.now() - entry.timestamp).total_seconds() / 3600
         return age_hours < entry.ttl_hours
     
-    def _rate_limit(self) -> None:
-        """Apply rate limiting between requests."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+    def _is_cache_servable_stale(self, entry: CacheEntry) -> bool:
+        """Check if an expired entry is still within its stale grace window."""
+        grace_hours = min(
+            entry.ttl_hours * self.stale_grace_ratio,
+            RESEARCH_CACHE_CONFIG["max_stale_grace_hours"],
+        )
+        age_hours = (datetime.now() - entry.timestamp).total_seconds() / 3600
+        return age_hours < entry.ttl_hours + grace_hours
+    
+    def _record_cache_event(
+        self,
+        label: Optional[str],
+        hit: bool,
+        saved: float = 0.0,
+        stale: bool = False,
+    ) -> None:
+        """Record a cache hit or miss, overall and per label."""
+        with self._stats_lock:
+            if hit:
+                self.cache_hits += 1
+                self.cache_savings += saved
+                if stale:
+                    self.cache_stale_hits += 1
+            else:
+                self.cache_misses += 1
+            
+            if label:
+                stats = self.cache_stats.setdefault(label, {"hits": 0, "misses": 0, "stale": 0})
+                stats["hits" if hit else "misses"] += 1
+                if stale:
+                    stats["stale"] += 1
     
     def _estimate_cost(
         self,
@@ -166,42 +250,57 @@ class PerplexityClient:
         )
         return (input_tokens / 1000 * input_cost) + (output_tokens / 1000 * output_cost)
     
-    def search(
-        self,
-        query: Union[str, List[str]],
-        max_results: int = 10,
-        max_tokens_per_page: int = 1024,
-        country: Optional[str] = None,
-        search_recency_filter: Optional[str] = None,
-        search_after_date: Optional[str] = None,
-        search_before_date: Optional[str] = None,
-        search_domain_filter: Optional[List[str]] = None,
-        use_quality_domains: bool = False,
-        model: PerplexityModel = PerplexityModel.SONAR,
-        cache_ttl_hours: int = 24,
-    ) -> QueryResult:
+    def _billed_cost(self, response: Any, model: PerplexityModel) -> Optional[float]:
         """
-        Execute a Perplexity search query with retry logic.
+        Get a request's billed cost from the usage block of its response.
         
-        Args:
-            query: Search query string or list of queries (max 5).
-            max_results: Maximum number of results (1-20).
-            max_tokens_per_page: Content extraction depth per page.
-            country: ISO country code for regional results.
-            search_recency_filter: Filter by recency (day, week, month, year).
-            search_after_date: Only results after this date (MM/DD/YYYY).
-            search_before_date: Only results before this date (MM/DD/YYYY).
-            search_domain_filter: Allowlist or denylist of domains.
-            use_quality_domains: If True, filter to quality domains.
-            model: Perplexity model to use (for cost tracking).
-            cache_ttl_hours: How long to cache results.
+        The returned cost is used when present; otherwise reported token
+        counts are priced with PERPLEXITY_COSTS.
         
         Returns:
-            QueryResult with search results and metadata.
+            Cost in dollars, or None if the response reports no usage.
+        """
+        usage = self._result_field(response, "usage")
+        if usage is None:
+            return None
+        
+        cost = self._result_field(usage, "cost")
+        if cost is not None and not isinstance(cost, (int, float)):
+            cost = self._result_field(cost, "total_cost")
+        if isinstance(cost, (int, float)):
+            return float(cost)
+        
+        prompt_tokens = self._result_field(usage, "prompt_tokens")
+        completion_tokens = self._result_field(usage, "completion_tokens")
+        if prompt_tokens is None and completion_tokens is None:
+            return None
+        return self._estimate_cost(model, prompt_tokens or 0, completion_tokens or 0)
+    
+    def _build_cache_key(
+        self,
+        query_str: str,
+        max_results: int,
+        max_tokens_per_page: int,
+        country: Optional[str],
+        search_recency_filter: Optional[str],
+        search_after_date: Optional[str],
+        search_before_date: Optional[str],
+        search_domain_filter: Optional[List[str]],
+        model: PerplexityModel,
+        identity: Optional[str] = None,
+    ) -> str:
+        """
+        Build the cache key for a query and its search parameters.
+        
+        If a canonical identity is given (see QueryTemplates.cache_identity),
+        it replaces the query text, so rendered dates finer than the
+        template's temporal granularity do not change the key.
         """
-        # Build cache key
+        if identity:
+            query_str = identity
         cache_params = {
             "max_results": max_results,
+            "max_tokens_per_page": max_tokens_per_page,
             "country": country,
             "recency": search_recency_filter,
             "after": search_after_date,
@@ -209,16 +308,21 @@ class PerplexityClient:
             "domains": search_domain_filter,
             "model": model.value,
         }
-        query_str = query if isinstance(query, str) else "|".join(query)
-        cache_key = self._get_cache_key(query_str, **cache_params)
-        
-        # Check cache
-        if self.enable_cache and cache_key in self.cache:
-            entry = self.cache[cache_key]
-            if self._is_cache_valid(entry):
-                return entry.result
-        
-        # Build request parameters
+        return self._get_cache_key(query_str, **cache_params)
+    
+    def _build_params(
+        self,
+        query: Union[str, List[str]],
+        max_results: int,
+        max_tokens_per_page: int,
+        country: Optional[str],
+        search_recency_filter: Optional[str],
+        search_after_date: Optional[str],
+        search_before_date: Optional[str],
+        search_domain_filter: Optional[List[str]],
+        use_quality_domains: bool,
+    ) -> Dict[str, Any]:
+        """Build Search API request parameters."""
         params: Dict[str, Any] = {
             "query": query,
             "max_results": max_results,
@@ -240,82 +344,320 @@ class PerplexityClient:
         elif search_domain_filter:
             params["search_domain_filter"] = search_domain_filter[:20]
         
-        # Execute with retry
-        result = self._execute_with_retry(params, model)
+        return params
+    
+    def _get_cached(
+        self,
+        cache_key: str,
+        cache_label: Optional[str],
+    ) -> Tuple[Optional[QueryResult], bool]:
+        """
+        Look up a cached result, recording the hit or miss.
+        
+        Returns:
+            Tuple of (cached_result, is_stale). A stale result is past its TTL
+            but within the grace window, and should be refreshed.
+        """
+        if not self.enable_cache:
+            return None, False
+        
+        entry = self.cache.get(cache_key)
+        stale = False
+        if entry and not self._is_cache_valid(entry):
+            stale = self.stale_grace_ratio > 0 and self._is_cache_servable_stale(entry)
+            if not stale:
+                entry = None
         
-        # Cache result
-        if self.enable_cache:
-            self.cache[cache_key] = CacheEntry(
+        # Only entries that will be served are decoded into models
+        result = self.cache.load_result(entry) if entry else None
+        if result is not None:
+            self._record_cache_event(
+                cache_label, hit=True, saved=result.cost_estimate, stale=stale
+            )
+            return result, stale
+        
+        self._record_cache_event(cache_label, hit=False)
+        return None, False
+    
+    def _claim_refresh(self, cache_key: str) -> bool:
+        """Claim the background refresh of a key; False if one is already running."""
+        with self._refreshing_lock:
+            if cache_key in self._refreshing:
+                return False
+            self._refreshing.add(cache_key)
+        with self._stats_lock:
+            self.cache_refreshes += 1
+        return True
+    
+    def _release_refresh(self, cache_keys: List[str]) -> None:
+        """Mark background refreshes as finished."""
+        with self._refreshing_lock:
+            self._refreshing.difference_update(cache_keys)
+    
+    def _store_cached(
+        self,
+        cache_key: str,
+        query_str: str,
+        result: QueryResult,
+        ttl_hours: int,
+    ) -> None:
+        """Cache a successful result."""
+        if self.enable_cache and not result.error:
+            self.cache.put(CacheEntry(
                 query_hash=cache_key,
                 query=query_str,
                 result=result,
                 timestamp=datetime.now(),
-                ttl_hours=cache_ttl_hours,
+                ttl_hours=ttl_hours,
+            ))
+    
+    def _plan_search(
+        self,
+        query: Union[str, List[str]],
+        max_results: int = 10,
+        max_tokens_per_page: int = 1024,
+        country: Optional[str] = None,
+        search_recency_filter: Optional[str] = None,
+        search_after_date: Optional[str] = None,
+        search_before_date: Optional[str] = None,
+        search_domain_filter: Optional[List[str]] = None,
+        use_quality_domains: bool = False,
+        model: PerplexityModel = PerplexityModel.SONAR,
+        cache_label: Optional[str] = None,
+        cache_identity: Optional[str] = None,
+    ) -> Tuple[str, str, Optional[QueryResult], bool, Dict[str, Any]]:
+        """
+        Prepare a single search.
+        
+        Returns:
+            Tuple of (query_str, cache_key, cached_result, needs_refresh,
+            request_params). needs_refresh is True when a stale result was
+            served and this caller has claimed its background refresh.
+        """
+        query_str = query if isinstance(query, str) else "|".join(query)
+        cache_key = self._build_cache_key(
+            query_str, max_results, max_tokens_per_page, country, search_recency_filter,
+            search_after_date, search_before_date, search_domain_filter, model,
+            cache_identity,
+        )
+        
+        # Check cache
+        cached, stale = self._get_cached(cache_key, cache_label)
+        needs_refresh = stale and self._claim_refresh(cache_key)
+        
+        params = self._build_params(
+            query, max_results, max_tokens_per_page, country, search_recency_filter,
+            search_after_date, search_before_date, search_domain_filter, use_quality_domains,
+        )
+        return query_str, cache_key, cached, needs_refresh, params
+    
+    def _plan_batch(
+        self,
+        queries: List[str],
+        max_results: int = 10,
+        max_tokens_per_page: int = 1024,
+        country: Optional[str] = None,
+        search_recency_filter: Optional[str] = None,
+        search_after_date: Optional[str] = None,
+        search_before_date: Optional[str] = None,
+        search_domain_filter: Optional[List[str]] = None,
+        use_quality_domains: bool = False,
+        model: PerplexityModel = PerplexityModel.SONAR,
+        cache_labels: Optional[List[Optional[str]]] = None,
+        cache_identities: Optional[List[Optional[str]]] = None,
+    ) -> Tuple[
+        List[str],
+        List[Optional[QueryResult]],
+        List[Tuple[List[int], Dict[str, Any]]],
+        List[Tuple[List[int], Dict[str, Any]]],
+        Dict[int, Tuple[Future, bool]],
+    ]:
+        """
+        Prepare a batch of searches.
+        
+        Each query is looked up in the cache individually. Misses already
+        being fetched by another caller are joined rather than requested
+        again; the remaining misses, and stale hits that need a background
+        refresh, are packed into requests of up to MAX_BATCH_QUERIES queries.
+        
+        Returns:
+            Tuple of (cache_keys, results with cache hits filled in,
+            [(query indices, request params), ...] for the misses,
+            the same for the stale entries to refresh,
+            {query index: (flight, is_leader)} for every miss).
+        """
+        labels = cache_labels or [None] * len(queries)
+        identities = cache_identities or [None] * len(queries)
+        results: List[Optional[QueryResult]] = [None] * len(queries)
+        
+        keys = [
+            self._build_cache_key(
+                q, max_results, max_tokens_per_page, country, search_recency_filter,
+                search_after_date, search_before_date, search_domain_filter, model,
+                identity,
             )
-            self._save_cache()
+            for q, identity in zip(queries, identities)
+        ]
         
-        return result
+        # Serve what we can from cache
+        misses = []
+        stale = []
+        flights: Dict[int, Tuple[Future, bool]] = {}
+        for i, key in enumerate(keys):
+            cached, is_stale = self._get_cached(key, labels[i])
+            if cached:
+                results[i] = cached
+                if is_stale and self._claim_refresh(key):
+                    stale.append(i)
+                continue
+            
+            flights[i] = self.single_flight.claim(key)
+            if flights[i][1]:
+                misses.append(i)
+        
+        # Pack the rest into multi-query requests
+        def pack(indices: List[int]) -> List[Tuple[List[int], Dict[str, Any]]]:
+            requests = []
+            for start in range(0, len(indices), self.MAX_BATCH_QUERIES):
+                chunk = indices[start:start + self.MAX_BATCH_QUERIES]
+                params = self._build_params(
+                    [queries[i] for i in chunk] if len(chunk) > 1 else queries[chunk[0]],
+                    max_results, max_tokens_per_page, country, search_recency_filter,
+                    search_after_date, search_before_date, search_domain_filter, use_quality_domains,
+                )
+                requests.append((chunk, params))
+            return requests
+        
+        return keys, results, pack(misses), pack(stale), flights
     
-    def _execute_with_retry(
+    def _land_flights(
         self,
-        params: Dict[str, Any],
+        keys: List[str],
+        results: List[Optional[QueryResult]],
+        flights: Dict[int, Tuple[Future, bool]],
+    ) -> None:
+        """Publish results to the callers waiting on the flights we lead."""
+        for i, (flight, leader) in flights.items():
+            if not leader:
+                continue
+            if results[i] is not None:
+                self.single_flight.resolve(keys[i], flight, results[i])
+            else:
+                self.single_flight.fail(
+                    keys[i], flight, RuntimeError("Coalesced search did not complete")
+                )
+    
+    def _followed_result(
+        self,
+        flight: Future,
+        query_str: str,
         model: PerplexityModel,
     ) -> QueryResult:
-        """Execute a search with retry logic."""
-        max_retries = RETRY_CONFIG["max_retries"]
-        delay = RETRY_CONFIG["initial_delay"]
-        max_delay = RETRY_CONFIG["max_delay"]
-        backoff = RETRY_CONFIG["backoff_multiplier"]
-        
-        last_error = None
+        """Take a result from another caller's completed flight."""
+        with self._stats_lock:
+            self.coalesced_requests += 1
+        try:
+            # Each job gets its own copy of the shared result
+            return flight.result().model_copy(deep=True)
+        except Exception as e:
+            return self._error_result(query_str, model, e)
+    
+    def _result_field(self, raw: Any, name: str) -> Any:
+        """Read a field from an SDK result object or a raw JSON dict."""
+        if isinstance(raw, dict):
+            return raw.get(name)
+        return getattr(raw, name, None)
+    
+    def _encode_results(self, raw_results: List[Any]) -> List[Any]:
+        """Convert raw API results to plain JSON, keeping per-query groups."""
+        encoded = []
+        for r in raw_results:
+            if isinstance(r, list):
+                encoded.append(self._encode_results(r))
+                continue
+            encoded.append({
+                name: self._result_field(r, name)
+                for name in ("title", "url", "snippet", "date", "last_updated")
+            })
+        return encoded
+    
+    def _encode_batch(self, raw_results: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Convert a multi-query response to one stored payload per query.
         
-        for attempt in range(max_retries):
-            try:
-                self._rate_limit()
-                
-                response = self.client.search.create(**params)
-                
-                # Parse results
-                results = []
-                for r in response.results:
-                    results.append(SearchResult(
-                        title=r.title,
-                        url=r.url,
-                        snippet=r.snippet,
-                        date=getattr(r, 'date', None),
-                        last_updated=getattr(r, 'last_updated', None),
-                    ))
-                
-                # Estimate cost
-                cost = self._estimate_cost(model)
-                self.total_cost += cost
-                self.query_count += 1
-                
-                query_str = params["query"]
-                if isinstance(query_str, list):
-                    query_str = " | ".join(query_str)
-                
-                return QueryResult(
-                    query=query_str,
-                    model_used=model.value,
-                    results=results,
-                    result_count=len(results),
-                    timestamp=datetime.now(),
-                    cost_estimate=cost,
-                )
-                
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    print(f"Retry {attempt + 1}/{max_retries} after error: {e}")
-                    time.sleep(delay)
-                    delay = min(delay * backoff, max_delay)
+        Each payload has the form a single-query response is stored in. A
+        response that is not grouped per query yields no payloads.
+        """
+        groups = list(raw_results)
+        if not all(isinstance(g, list) for g in groups):
+            return []
+        return [{"results": self._encode_results(g)} for g in groups]
+    
+    def _parse_results(self, raw_results: List[Any]) -> List[SearchResult]:
+        """Parse raw API results, flattening per-query groups if present."""
+        results = []
+        for r in raw_results:
+            if isinstance(r, list):
+                results.extend(self._parse_results(r))
+                continue
+            results.append(SearchResult(
+                title=self._result_field(r, "title") or "",
+                url=self._result_field(r, "url") or "",
+                snippet=self._result_field(r, "snippet") or "",
+                date=self._result_field(r, "date"),
+                last_updated=self._result_field(r, "last_updated"),
+            ))
+        return results
+    
+    def _record_request_cost(
+        self,
+        model: PerplexityModel,
+        billed: Optional[float],
+        queries: int = 1,
+    ) -> float:
+        """
+        Record the cost of one API request answering `queries` queries.
         
-        # All retries failed
-        query_str = params["query"]
-        if isinstance(query_str, list):
-            query_str = " | ".join(query_str)
-            
+        Only billed costs reach ModelStats; the fixed-token estimate used
+        when a response reports no usage is kept out of the model's
+        statistics so cost-based model selection is not fed its own guess.
+        """
+        cost = billed if billed is not None else self._estimate_cost(model)
+        with self._stats_lock:
+            self.total_cost += cost
+            self.query_count += 1
+        if billed is not None:
+            self.model_stats.record_cost(model, billed / queries)
+        return cost
+    
+    def _record_call(self, model: PerplexityModel, started: float, error: bool) -> None:
+        """Record an upstream request's latency (replayed requests are not timed)."""
+        if not self.recorder.replaying:
+            self.model_stats.record_call(model, time.monotonic() - started, error)
+    
+    def _hedge_delay(self, model: PerplexityModel) -> Optional[float]:
+        """Get seconds to wait before hedging a request, or None not to hedge."""
+        if self.recorder.replaying:
+            return None
+        return self.hedge_policy.delay(model)
+    
+    def _record_hedge(self, model: PerplexityModel) -> None:
+        """Record a duplicate request sent to hedge a slow one."""
+        cost = self._estimate_cost(model)
+        with self._stats_lock:
+            self.hedges_sent += 1
+            self.hedge_cost += cost
+            self.total_cost += cost
+    
+    def _record_hedge_outcome(self, hedge_won: bool) -> None:
+        """Record whether the duplicate answered before the original."""
+        self.hedge_policy.record_outcome(hedge_won)
+        if hedge_won:
+            with self._stats_lock:
+                self.hedge_wins += 1
+    
+    def _error_result(self, query_str: str, model: PerplexityModel, error: Exception) -> QueryResult:
+        """Build a QueryResult for a failed query."""
         return QueryResult(
             query=query_str,
             model_used=model.value,
@@ -323,29 +665,70 @@ class PerplexityClient:
             result_count=0,
             timestamp=datetime.now(),
             cost_estimate=0.0,
-            error=str(last_error),
+            error=str(error),
         )
     
-    def search_multi(
+    def _build_query_result(
+        self,
+        params: Dict[str, Any],
+        raw_results: List[Any],
+        model: PerplexityModel,
+        billed: Optional[float] = None,
+    ) -> QueryResult:
+        """Build a QueryResult from a successful single-query response."""
+        query_str = params["query"]
+        if isinstance(query_str, list):
+            query_str = " | ".join(query_str)
+        
+        results = self._parse_results(raw_results)
+        cost = self._record_request_cost(model, billed)
+        
+        return QueryResult(
+            query=query_str,
+            model_used=model.value,
+            results=results,
+            result_count=len(results),
+            timestamp=datetime.now(),
+            cost_estimate=cost,
+        )
+    
+    def _split_batch_results(
         self,
         queries: List[str],
-        **kwargs,
-    ) -> List[QueryResult]:
+        raw_results: List[Any],
+        model: PerplexityModel,
+        billed: Optional[float] = None,
+    ) -> Optional[List[QueryResult]]:
         """
-        Execute multiple independent searches.
+        Split a multi-query response into one QueryResult per query.
         
-        Args:
-            queries: List of search queries.
-            **kwargs: Additional parameters passed to search().
+        The request cost is shared evenly across the queries it answered.
+        It is recorded only once the response is known to be grouped, since
+        otherwise each query is sent again and recorded on its own.
         
         Returns:
-            List of QueryResult objects.
+            List of QueryResult objects, or None if the response is not
+            grouped per query.
         """
-        results = []
-        for query in queries:
-            result = self.search(query, **kwargs)
-            results.append(result)
-        return results
+        groups = list(raw_results)
+        if len(groups) != len(queries) or not all(isinstance(g, list) for g in groups):
+            return None
+        
+        cost = self._record_request_cost(model, billed, len(queries))
+        
+        timestamp = datetime.now()
+        split_results = []
+        for query, group in zip(queries, groups):
+            results = self._parse_results(group)
+            split_results.append(QueryResult(
+                query=query,
+                model_used=model.value,
+                results=results,
+                result_count=len(results),
+                timestamp=timestamp,
+                cost_estimate=cost / len(queries),
+            ))
+        return split_results
     
     def get_cost_summary(self) -> Dict[str, Any]:
         """Get a summary of API usage and costs."""
@@ -353,13 +736,467 @@ class PerplexityClient:
             "total_cost": round(self.total_cost, 4),
             "query_count": self.query_count,
             "avg_cost_per_query": round(self.total_cost / max(1, self.query_count), 4),
-            "cache_hits": len([e for e in self.cache.values() if self._is_cache_valid(e)]),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_stale_hits": self.cache_stale_hits,
+            "hedged_requests": self.hedges_sent,
+            "hedge_wins": self.hedge_wins,
+            "hedge_cost": round(self.hedge_cost, 4),
         }
     
+    def get_cache_report(self) -> Dict[str, Any]:
+        """
+        Get a cache hit/miss report for this client's session.
+        
+        Returns:
+            Dict with overall hit rate, estimated savings, and per-label stats.
+            Stale hits are included in hits; refreshes counts the background
+            refreshes they triggered; coalesced counts misses answered by
+            another caller's identical in-flight request. "store" holds the cache store's size
+            and eviction counters.
+        """
+        with self._stats_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "stale_hits": self.cache_stale_hits,
+                "refreshes": self.cache_refreshes,
+                "coalesced": self.coalesced_requests,
+                "hit_rate": round(self.cache_hits / max(1, lookups), 3),
+                "estimated_savings": round(self.cache_savings, 4),
+                "by_label": {label: dict(stats) for label, stats in self.cache_stats.items()},
+                "store": self.cache.get_stats(),
+            }
+    
     def clear_cache(self) -> None:
         """Clear the query cache."""
-        self.cache = {}
-        if self.cache_dir:
-            cache_file = self.cache_dir / "research_cache.json"
-            if cache_file.exists():
-                cache_file.unlink()
+        self.cache.clear()
+    
+    def export_cache(self, json_file: Path) -> int:
+        """
+        Export the query cache to a JSON file.
+        
+        Args:
+            json_file: Destination path.
+        
+        Returns:
+            Number of entries exported.
+        """
+        return self.cache.export_json(json_file)
+    
+    def import_cache(self, json_file: Path) -> int:
+        """
+        Import query cache entries from a JSON file.
+        
+        Args:
+            json_file: JSON cache file (as written by export_cache).
+        
+        Returns:
+            Number of entries imported.
+        """
+        return self.cache.import_json(json_file)
+
+
+class PerplexityClient(PerplexityClientBase):
+    """
+    Wrapper for Perplexity Search API with retry logic and caching.
+    
+    Features:
+    - Automatic retry with exponential backoff
+    - Query result caching, with stale-while-revalidate refreshes
+    - Cost estimation and tracking
+    - Rate limiting via a process-wide token bucket
+    - Multi-query support, including packing independent queries
+      into shared multi-query requests
+    - Identical in-flight requests across clients coalesced into one
+    - Optional record/replay of API calls for offline runs
+    - Thread-safe, so one client can serve concurrent queries
+    """
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        enable_cache: bool = True,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        stale_grace_ratio: Optional[float] = None,
+        recorder: Optional[ApiRecorder] = None,
+        model_stats: Optional[ModelStats] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        credentials: Optional[CredentialPool] = None,
+    ):
+        """
+        Initialize the Perplexity client.
+        
+        Args:
+            api_key: Perplexity API key. If not provided, uses PERPLEXITY_API_KEY env var.
+            cache_dir: Directory for caching query results.
+            enable_cache: Whether to enable result caching.
+            rate_limiter: Rate limiter to use. Defaults to the process-wide
+                limiter shared by all clients.
+            stale_grace_ratio: Stale-while-revalidate grace window as a fraction
+                of each entry's TTL (0 disables). Defaults to RESEARCH_CACHE_CONFIG.
+            recorder: API record/replay store. Defaults to the process-wide recorder.
+            model_stats: Per-model call statistics. Defaults to the process-wide tracker.
+            hedge_policy: Hedged request policy. Defaults to the process-wide policy.
+            credentials: Pool of API keys to use instead of api_key.
+        """
+        super().__init__(
+            api_key=api_key,
+            cache_dir=cache_dir,
+            enable_cache=enable_cache,
+            rate_limiter=rate_limiter,
+            stale_grace_ratio=stale_grace_ratio,
+            recorder=recorder,
+            model_stats=model_stats,
+            hedge_policy=hedge_policy,
+            credentials=credentials,
+        )
+        self.client = Perplexity(api_key=self.api_key)
+        self._key_clients: Dict[str, Perplexity] = {}
+        self._key_clients_lock = threading.Lock()
+    
+    def _sdk_client(self, key: str) -> Perplexity:
+        """Get the SDK client for an API key (other than api_key) from the credential pool."""
+        if key == self.api_key:
+            return self.client
+        with self._key_clients_lock:
+            if key not in self._key_clients:
+                self._key_clients[key] = Perplexity(api_key=key)
+            return self._key_clients[key]
+    
+    def _rate_limit(self) -> None:
+        """Apply rate limiting between requests."""
+        self.rate_limiter.acquire()
+    
+    def search(
+        self,
+        query: Union[str, List[str]],
+        max_results: int = 10,
+        max_tokens_per_page: int = 1024,
+        country: Optional[str] = None,
+        search_recency_filter: Optional[str] = None,
+        search_after_date: Optional[str] = None,
+        search_before_date: Optional[str] = None,
+        search_domain_filter: Optional[List[str]] = None,
+        use_quality_domains: bool = False,
+        model: PerplexityModel = PerplexityModel.SONAR,
+        cache_ttl_hours: int = 24,
+        cache_label: Optional[str] = None,
+        cache_identity: Optional[str] = None,
+    ) -> QueryResult:
+        """
+        Execute a Perplexity search query with retry logic.
+        
+        A cached result past its TTL but within the stale grace window is
+        returned immediately and refreshed in the background.
+        
+        Args:
+            query: Search query string or list of queries (max 5).
+            max_results: Maximum number of results (1-20).
+            max_tokens_per_page: Content extraction depth per page.
+            country: ISO country code for regional results.
+            search_recency_filter: Filter by recency (day, week, month, year).
+            search_after_date: Only results after this date (MM/DD/YYYY).
+            search_before_date: Only results before this date (MM/DD/YYYY).
+            search_domain_filter: Allowlist or denylist of domains.
+            use_quality_domains: If True, filter to quality domains.
+            model: Perplexity model to use (for cost tracking).
+            cache_ttl_hours: How long to cache results.
+            cache_label: Label (e.g. template name) to report cache hits under.
+            cache_identity: Canonical identity to key the cache on instead of
+                the query text (see QueryTemplates.cache_identity).
+        
+        Returns:
+            QueryResult with search results and metadata.
+        """
+        query_str, cache_key, cached, needs_refresh, params = self._plan_search(
+            query, max_results, max_tokens_per_page, country, search_recency_filter,
+            search_after_date, search_before_date, search_domain_filter,
+            use_quality_domains, model, cache_label, cache_identity,
+        )
+        if needs_refresh:
+            self._schedule_refresh(
+                [([0], params)], [cache_key], [query_str], [cache_ttl_hours], model
+            )
+        if cached:
+            return cached
+        
+        # Wait for an identical request already in flight, if any
+        flight, leader = self.single_flight.claim(cache_key)
+        if not leader:
+            return self._followed_result(flight, query_str, model)
+        
+        try:
+            # Execute with retry
+            result = self._execute_with_retry(params, model)
+            
+            # Cache result
+            self._store_cached(cache_key, query_str, result, cache_ttl_hours)
+        except BaseException as e:
+            self.single_flight.fail(cache_key, flight, e)
+            raise
+        
+        self.single_flight.resolve(cache_key, flight, result)
+        return result
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        max_results: int = 10,
+        max_tokens_per_page: int = 1024,
+        country: Optional[str] = None,
+        search_recency_filter: Optional[str] = None,
+        search_after_date: Optional[str] = None,
+        search_before_date: Optional[str] = None,
+        search_domain_filter: Optional[List[str]] = None,
+        use_quality_domains: bool = False,
+        model: PerplexityModel = PerplexityModel.SONAR,
+        cache_ttl_hours: Union[int, List[int]] = 24,
+        cache_labels: Optional[List[Optional[str]]] = None,
+        cache_identities: Optional[List[Optional[str]]] = None,
+    ) -> List[QueryResult]:
+        """
+        Execute independent queries that share parameters in as few requests as possible.
+        
+        Each query is cached and looked up individually, exactly as search()
+        would. Cache misses are packed into multi-query requests of up to
+        MAX_BATCH_QUERIES and the grouped response is split back into one
+        QueryResult per query. Misses that another caller is already
+        fetching wait for that request instead.
+        
+        Args:
+            queries: Search queries.
+            cache_ttl_hours: TTL for all queries, or one TTL per query.
+            cache_labels: Optional per-query labels for cache reporting.
+            cache_identities: Optional per-query canonical cache identities.
+            Other arguments are as for search() and apply to every query.
+        
+        Returns:
+            List of QueryResult objects, in the same order as queries.
+        """
+        ttls = cache_ttl_hours if isinstance(cache_ttl_hours, list) else [cache_ttl_hours] * len(queries)
+        keys, results, requests, refreshes, flights = self._plan_batch(
+            queries, max_results, max_tokens_per_page, country, search_recency_filter,
+            search_after_date, search_before_date, search_domain_filter,
+            use_quality_domains, model, cache_labels, cache_identities,
+        )
+        
+        if refreshes:
+            self._schedule_refresh(refreshes, keys, queries, ttls, model)
+        
+        try:
+            self._run_requests(requests, keys, queries, ttls, model, results)
+        finally:
+            self._land_flights(keys, results, flights)
+        
+        # Collect queries answered by other callers' requests
+        for i, (flight, leader) in flights.items():
+            if not leader:
+                results[i] = self._followed_result(flight, queries[i], model)
+        return results
+    
+    def _run_requests(
+        self,
+        requests: List[Tuple[List[int], Dict[str, Any]]],
+        keys: List[str],
+        queries: List[str],
+        ttls: List[int],
+        model: PerplexityModel,
+        results: Optional[List[Optional[QueryResult]]] = None,
+    ) -> None:
+        """Execute planned requests, caching each result and filling in results."""
+        for chunk, params in requests:
+            if len(chunk) > 1:
+                chunk_results = self._execute_batch_with_retry(params, model)
+            else:
+                chunk_results = [self._execute_with_retry(params, model)]
+            
+            for i, result in zip(chunk, chunk_results):
+                if results is not None:
+                    results[i] = result
+                self._store_cached(keys[i], queries[i], result, ttls[i])
+    
+    def _schedule_refresh(
+        self,
+        requests: List[Tuple[List[int], Dict[str, Any]]],
+        keys: List[str],
+        queries: List[str],
+        ttls: List[int],
+        model: PerplexityModel,
+    ) -> None:
+        """Refresh stale cache entries on the background refresh executor."""
+        claimed = [keys[i] for chunk, _ in requests for i in chunk]
+        
+        def refresh() -> None:
+            try:
+                self._run_requests(requests, keys, queries, ttls, model)
+            except Exception as e:
+                print(f"Warning: Background cache refresh failed: {e}")
+            finally:
+                self._release_refresh(claimed)
+        
+        _get_refresh_executor().submit(refresh)
+    
+    def _request_with_retry(
+        self,
+        params: Dict[str, Any],
+        model: PerplexityModel,
+    ) -> Tuple[Any, Optional[Exception]]:
+        """
+        Send a Search API request with rate limiting and retries.
+        
+        Each attempt's latency (excluding rate limit waits) is recorded
+        against the model. With hedging enabled, see _run_hedged.
+        
+        Returns:
+            Tuple of (response, None) on success or (None, last_error).
+        """
+        def send(key: str) -> Any:
+            started = time.monotonic()
+            try:
+                if isinstance(params["query"], list):
+                    # One fixture per query, so replay does not depend on batching
+                    response = self.recorder.call_batch(
+                        "perplexity",
+                        params,
+                        "query",
+                        lambda: self._sdk_client(key).search.create(**params),
+                        encode=lambda response: self._encode_batch(response.results),
+                        decode=lambda payloads: SimpleNamespace(
+                            results=[payload["results"] for payload in payloads]
+                        ),
+                    )
+                else:
+                    response = self.recorder.call(
+                        "perplexity",
+                        params,
+                        lambda: self._sdk_client(key).search.create(**params),
+                        encode=lambda response: {"results": self._encode_results(response.results)},
+                        decode=lambda payload: SimpleNamespace(results=payload["results"]),
+                    )
+            except Exception:
+                self._record_call(model, started, error=True)
+                raise
+            self._record_call(model, started, error=False)
+            return response
+        
+        def request() -> Any:
+            if self.credentials is not None:
+                return self.credentials.call(send)
+            self._rate_limit()
+            return send(self.api_key)
+        
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return self.retry_policy.run(request)
+        return self._run_hedged(lambda: self.retry_policy.run(request), delay, model)
+    
+    def _run_hedged(
+        self,
+        attempt: Callable[[], Tuple[Any, Optional[Exception]]],
+        delay: float,
+        model: PerplexityModel,
+    ) -> Tuple[Any, Optional[Exception]]:
+        """
+        Run a request, racing one duplicate if it takes longer than `delay`.
+        
+        The first successful response wins. The other request cannot be
+        cancelled once sent; it finishes in the background and is discarded.
+        
+        The original runs on the request executor and the duplicate on the
+        hedge executor, so the calling thread stays free to return whichever
+        answer comes first while the threads used, including those still
+        finishing a losing request, stay bounded. The delay counts from when
+        the original starts, so time queued for a worker does not trigger
+        a hedge.
+        
+        Returns:
+            Tuple of (response, None) on success or (None, last_error).
+        """
+        started = threading.Event()
+        
+        def run_primary() -> Tuple[Any, Optional[Exception]]:
+            started.set()
+            return attempt()
+        
+        primary = _get_request_executor().submit(run_primary)
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.hedge_policy.try_hedge():
+            return primary.result()
+        
+        self._record_hedge(model)
+        hedge = _get_hedge_executor().submit(attempt)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in (primary, hedge):
+                if future in done and future.result()[0] is not None:
+                    self._record_hedge_outcome(hedge_won=future is hedge)
+                    return future.result()
+        
+        # Both failed
+        self._record_hedge_outcome(hedge_won=False)
+        return primary.result()
+    
+    def _execute_with_retry(
+        self,
+        params: Dict[str, Any],
+        model: PerplexityModel,
+    ) -> QueryResult:
+        """Execute a search with retry logic."""
+        response, error = self._request_with_retry(params, model)
+        if response is None:
+            # All retries failed
+            query_str = params["query"]
+            if isinstance(query_str, list):
+                query_str = " | ".join(query_str)
+            return self._error_result(query_str, model, error)
+        
+        return self._build_query_result(
+            params, response.results, model, self._billed_cost(response, model)
+        )
+    
+    def _execute_batch_with_retry(
+        self,
+        params: Dict[str, Any],
+        model: PerplexityModel,
+    ) -> List[QueryResult]:
+        """Execute a multi-query search and split the response per query."""
+        queries = params["query"]
+        
+        response, error = self._request_with_retry(params, model)
+        if response is None:
+            return [self._error_result(q, model, error) for q in queries]
+        
+        split_results = self._split_batch_results(
+            queries, response.results, model, self._billed_cost(response, model)
+        )
+        if split_results is None:
+            # Response is not grouped per query; fall back to one request each
+            split_results = [
+                self._execute_with_retry({**params, "query": q}, model)
+                for q in queries
+            ]
+        return split_results
+    
+    def search_multi(
+        self,
+        queries: List[str],
+        **kwargs,
+    ) -> List[QueryResult]:
+        """
+        Execute multiple independent searches.
+        
+        Queries are packed into multi-query requests via search_batch().
+        
+        Args:
+            queries: List of search queries.
+            **kwargs: Additional parameters passed to search_batch().
+        
+        Returns:
+            List of QueryResult objects.
+        """
+        return self.search_batch(queries, **kwargs)
@@ -5,11 +5,12 @@ Provides structured query templates for different research categories,
 with temporal awareness and company context injection.
 """
 
+import re
 from typing import Dict, List, Optional, Any
 from enum import Enum
 from dataclasses import dataclass
 
-from ..temporal import TemporalContext, get_temporal_context
+from ..temporal import TemporalContext, TemporalGranularity, get_temporal_context
 
 
 class QueryCategory(str, Enum):
@@ -35,6 +36,12 @@ class QueryTemplate:
     priority: int  # 1 = highest priority
     required_for_quick_mode: bool
     description: str
+    cache_ttl_hours: int = 24  # How long results stay valid in the global cache
+    # Date bucket the cache key uses in place of rendered temporal values
+    temporal_granularity: TemporalGranularity = TemporalGranularity.YEAR
+    # Result budget: sized to what the extractors for this query consume
+    max_results: int = 10
+    max_tokens_per_page: int = 1024
 
 
 class QueryTemplates:
@@ -46,6 +53,10 @@ class QueryTemplates:
     - {industry}: Company's industry (if known)
     - {context}: User-provided context
     - Temporal placeholders from TemporalContext
+    
+    Cache keys are built from the template name, its non-temporal variables
+    and the date bucket for the template's temporal granularity, so cached
+    results survive calendar boundaries finer than that granularity.
     """
     
     # Company Profile Queries
@@ -57,6 +68,9 @@ class QueryTemplates:
         priority=1,
         required_for_quick_mode=True,
         description="Basic company overview and business model",
+        cache_ttl_hours=72,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     COMPANY_DETAILS = QueryTemplate(
@@ -67,6 +81,9 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=True,
         description="Company details including size and location",
+        cache_ttl_hours=168,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     LEADERSHIP = QueryTemplate(
@@ -77,6 +94,9 @@ class QueryTemplates:
         priority=3,
         required_for_quick_mode=False,
         description="Leadership team and key executives",
+        cache_ttl_hours=72,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     FUNDING_STATUS = QueryTemplate(
@@ -87,6 +107,9 @@ class QueryTemplates:
         priority=3,
         required_for_quick_mode=False,
         description="Funding and investment information",
+        cache_ttl_hours=72,
+        max_results=5,
+        max_tokens_per_page=256,
     )
     
     RECENT_NEWS = QueryTemplate(
@@ -97,6 +120,10 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=True,
         description="Recent company news and announcements",
+        cache_ttl_hours=12,
+        temporal_granularity=TemporalGranularity.MONTH,
+        max_results=5,
+        max_tokens_per_page=256,
     )
     
     # Industry Queries
@@ -108,6 +135,7 @@ class QueryTemplates:
         priority=1,
         required_for_quick_mode=True,
         description="Industry overview and market analysis",
+        cache_ttl_hours=168,
     )
     
     INDUSTRY_CHALLENGES = QueryTemplate(
@@ -118,6 +146,9 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=True,
         description="Industry challenges and pain points",
+        cache_ttl_hours=168,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     INDUSTRY_OPPORTUNITIES = QueryTemplate(
@@ -128,6 +159,9 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=False,
         description="Industry opportunities and growth areas",
+        cache_ttl_hours=168,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     # Competitor Queries
@@ -139,6 +173,8 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=True,
         description="Main competitors and alternatives",
+        cache_ttl_hours=72,
+        max_tokens_per_page=512,
     )
     
     COMPETITOR_AI = QueryTemplate(
@@ -149,6 +185,22 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=False,
         description="Competitor AI adoption and initiatives",
+        cache_ttl_hours=48,
+    )
+    
+    # Run once per detected competitor by the enrichment stage, so it is
+    # not part of ALL_TEMPLATES
+    COMPETITOR_PROFILE = QueryTemplate(
+        name="competitor_profile",
+        category=QueryCategory.COMPETITORS,
+        template='{competitor_name} company overview market position products {current_year}',
+        recency_filter="year",
+        priority=3,
+        required_for_quick_mode=False,
+        description="Profile of a single competitor",
+        cache_ttl_hours=168,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     # Technology Queries
@@ -160,6 +212,8 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=False,
         description="Company technology stack and platforms",
+        cache_ttl_hours=168,
+        max_tokens_per_page=512,
     )
     
     AI_INITIATIVES = QueryTemplate(
@@ -170,6 +224,8 @@ class QueryTemplates:
         priority=1,
         required_for_quick_mode=True,
         description="Company AI initiatives and projects",
+        cache_ttl_hours=24,
+        max_tokens_per_page=512,
     )
     
     INDUSTRY_AI_ADOPTION = QueryTemplate(
@@ -180,6 +236,9 @@ class QueryTemplates:
         priority=1,
         required_for_quick_mode=True,
         description="Industry-wide AI adoption trends",
+        cache_ttl_hours=72,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     AI_USE_CASES = QueryTemplate(
@@ -190,6 +249,9 @@ class QueryTemplates:
         priority=1,
         required_for_quick_mode=True,
         description="Industry-specific AI use cases",
+        cache_ttl_hours=72,
+        max_results=5,
+        max_tokens_per_page=256,
     )
     
     AI_TOOLS = QueryTemplate(
@@ -200,6 +262,9 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=False,
         description="Recommended AI tools for the industry",
+        cache_ttl_hours=72,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     # Regulatory Queries
@@ -211,6 +276,9 @@ class QueryTemplates:
         priority=3,
         required_for_quick_mode=False,
         description="Industry-specific regulations",
+        cache_ttl_hours=168,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     AI_REGULATIONS = QueryTemplate(
@@ -221,6 +289,9 @@ class QueryTemplates:
         priority=2,
         required_for_quick_mode=False,
         description="AI-specific regulations and compliance",
+        cache_ttl_hours=72,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     DATA_PRIVACY = QueryTemplate(
@@ -231,6 +302,9 @@ class QueryTemplates:
         priority=3,
         required_for_quick_mode=False,
         description="Data privacy requirements",
+        cache_ttl_hours=168,
+        max_results=5,
+        max_tokens_per_page=512,
     )
     
     # All templates as a dictionary
@@ -310,6 +384,51 @@ class QueryTemplates:
         
         return self.temporal.inject(template.template, **variables)
     
+    def cache_identity(
+        self,
+        template: QueryTemplate,
+        company_name: str,
+        industry: str = "",
+        context: str = "",
+        **extra_vars,
+    ) -> str:
+        """
+        Build the canonical cache identity of a rendered query.
+        
+        Temporal placeholders are replaced by the date bucket for the
+        template's granularity (omitted if the template has none); only
+        variables the template uses are included, normalized for case and
+        whitespace.
+        
+        Args:
+            template: QueryTemplate being rendered.
+            company_name: Company name.
+            industry: Industry (optional).
+            context: User context (optional).
+            **extra_vars: Additional variables.
+        
+        Returns:
+            Identity string to key the query cache on.
+        """
+        variables = {
+            "company_name": company_name,
+            "industry": industry or "technology",
+            "context": context,
+            **extra_vars,
+        }
+        used = set(re.findall(r"\{(\w+)\}", template.template))
+        parts = [
+            f"{name}={' '.join(str(value).lower().split())}"
+            for name, value in sorted(variables.items())
+            if name in used
+        ]
+        # Templates without temporal placeholders need no date bucket
+        if used & self.temporal.get_context().keys():
+            parts.append(f"period={self.temporal.get_bucket(template.temporal_granularity)}")
+        
+        # The template text is included so editing a template invalidates its entries
+        return "|".join([f"template={template.name}:{template.template}", *parts])
+    
     def render_all_queries(
         self,
         company_name: str,
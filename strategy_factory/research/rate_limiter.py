@@ -0,0 +1,229 @@
+"""
+Token-bucket rate limiting for Perplexity API calls.
+
+A single bucket is shared by every PerplexityClient in a process, so
+concurrent jobs together stay within the API quota instead of each
+sending requests at the full rate. Optionally, the bucket state can be
+kept in a lock file so several worker processes on the same host share
+one budget.
+"""
+
+import asyncio
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from ..config import PERPLEXITY_RATE_LIMIT
+
+
+# Bucket state on disk: (tokens, last_refill_time) as two doubles
+_STATE_FORMAT = "dd"
+_STATE_SIZE = struct.calcsize(_STATE_FORMAT)
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `requests_per_second` up to `burst`.
+    Each request reserves one token; if none are available the bucket goes
+    into debt and the caller sleeps until its token would have refilled.
+    Reserving under the lock and sleeping outside it keeps callers queued
+    in arrival order without holding the lock while waiting.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        burst: int = 1,
+        lock_file: Optional[Path] = None,
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_second: Sustained request rate.
+            burst: Maximum number of requests that can be sent back to back.
+            lock_file: Optional path used to share the bucket across processes
+                on the same host. Ignored where file locking is unavailable.
+        """
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+
+        self.rate = float(requests_per_second)
+        self.burst = max(1, int(burst))
+        self.lock_file = Path(lock_file) if lock_file and fcntl else None
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last_refill = time.time()
+
+        # Stats
+        self.total_requests = 0
+        self.total_wait = 0.0
+
+        if lock_file and not fcntl:
+            print("Warning: File locking unavailable; rate limiting is per-process only")
+
+    def _refill(self, tokens: float, last_refill: float, now: float) -> Tuple[float, float]:
+        """Refill tokens for the time elapsed since the last refill."""
+        elapsed = max(0.0, now - last_refill)
+        return min(float(self.burst), tokens + elapsed * self.rate), now
+
+    def _take(self, tokens: float) -> Tuple[float, float]:
+        """Take one token, returning (remaining_tokens, seconds_to_wait)."""
+        tokens -= 1.0
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, wait
+
+    def reserve(self) -> float:
+        """
+        Reserve a request slot without blocking.
+
+        Returns:
+            Seconds the caller must wait before sending its request.
+        """
+        with self._lock:
+            now = time.time()
+            if self.lock_file:
+                wait = self._reserve_shared(now)
+            else:
+                self._tokens, self._last_refill = self._refill(
+                    self._tokens, self._last_refill, now
+                )
+                self._tokens, wait = self._take(self._tokens)
+
+            self.total_requests += 1
+            self.total_wait += wait
+            return wait
+
+    def available(self) -> float:
+        """
+        Get the tokens available now, without reserving one.
+
+        Negative when callers are already queued. A bucket shared through
+        a lock file is read from the file, so reservations made by other
+        processes are included.
+        """
+        with self._lock:
+            now = time.time()
+            if self.lock_file:
+                return self._read_shared(now)
+            tokens, _ = self._refill(self._tokens, self._last_refill, now)
+            return tokens
+
+    def _load_state(self, f: BinaryIO, now: float) -> Tuple[float, float]:
+        """Read and refill the bucket state from a locked lock file."""
+        f.seek(0)
+        data = f.read(_STATE_SIZE)
+        if len(data) == _STATE_SIZE:
+            tokens, last_refill = struct.unpack(_STATE_FORMAT, data)
+        else:
+            tokens, last_refill = float(self.burst), now
+        return self._refill(tokens, last_refill, now)
+
+    def _read_shared(self, now: float) -> float:
+        """Get the tokens available in the bucket stored in the lock file."""
+        if not self.lock_file.exists():
+            return float(self.burst)
+
+        with open(self.lock_file, "rb") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            try:
+                tokens, _ = self._load_state(f, now)
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return tokens
+
+    def _reserve_shared(self, now: float) -> float:
+        """Reserve a slot from the bucket stored in the lock file."""
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.lock_file, "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                tokens, last_refill = self._load_state(f, now)
+                tokens, wait = self._take(tokens)
+
+                f.seek(0)
+                f.truncate()
+                f.write(struct.pack(_STATE_FORMAT, tokens, last_refill))
+                f.flush()
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+        return wait
+
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """
+        Wait, without blocking the event loop, until a request may be sent.
+
+        A bucket shared through a lock file is reserved on a worker thread,
+        since flock() can block while another process holds the file.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        if self.lock_file:
+            wait = await asyncio.to_thread(self.reserve)
+        else:
+            wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get limiter usage statistics."""
+        return {
+            "requests_per_second": self.rate,
+            "burst": self.burst,
+            "total_requests": self.total_requests,
+            "total_wait_seconds": round(self.total_wait, 2),
+            "shared_across_processes": self.lock_file is not None,
+        }
+
+
+_shared_limiters: Dict[str, TokenBucketRateLimiter] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(name: str = "perplexity") -> TokenBucketRateLimiter:
+    """
+    Get the process-wide rate limiter for an API.
+
+    Args:
+        name: Limiter name (one bucket per upstream API).
+
+    Returns:
+        The shared TokenBucketRateLimiter, created from
+        PERPLEXITY_RATE_LIMIT on first use.
+    """
+    with _shared_lock:
+        limiter = _shared_limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucketRateLimiter(
+                requests_per_second=PERPLEXITY_RATE_LIMIT["requests_per_second"],
+                burst=PERPLEXITY_RATE_LIMIT["burst"],
+                lock_file=PERPLEXITY_RATE_LIMIT["lock_file"],
+            )
+            _shared_limiters[name] = limiter
+        return limiter
@@ -6,6 +6,7 @@ for use in the synthesis phase.
 """
 
 import re
+import threading
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
@@ -24,6 +25,7 @@ from ..models import (
 )
 from ..config import ResearchMode
 from .query_templates import QueryCategory
+from .text_index import KeywordMatcher, analyze_snippet, capitalized_spans
 
 
 class ResultProcessor:
@@ -53,6 +55,85 @@ class ResultProcessor:
         CompanyInfoTier.STARTUP_STEALTH: ["stealth", "early-stage", "pre-launch"],
     }
     
+    # Keywords for sentence and technology extraction
+    FUNDING_KEYWORDS = ["raised", "funding", "series", "valuation"]
+    TREND_KEYWORDS = ["trend", "emerging", "growing", "rising", "shift toward"]
+    AI_KEYWORDS = ["ai", "machine learning", "automation"]
+    REGULATION_KEYWORDS = ["regulation", "compliance", "requirement", "law"]
+    PRIVACY_KEYWORDS = ["gdpr", "ccpa", "hipaa", "privacy", "data protection"]
+    TECH_KEYWORDS = [
+        "aws", "azure", "gcp", "kubernetes", "docker", "python", "java",
+        "react", "angular", "vue", "node", "postgresql", "mongodb",
+        "salesforce", "sap", "oracle", "microsoft", "google", "amazon"
+    ]
+    
+    # Each keyword list compiled once into a single-pass matcher
+    SIZE_MATCHER = KeywordMatcher(k for v in SIZE_INDICATORS.values() for k in v)
+    INFO_TIER_MATCHER = KeywordMatcher(k for v in INFO_TIER_INDICATORS.values() for k in v)
+    FUNDING_MATCHER = KeywordMatcher(FUNDING_KEYWORDS)
+    TREND_MATCHER = KeywordMatcher(TREND_KEYWORDS)
+    AI_MATCHER = KeywordMatcher(AI_KEYWORDS)
+    REGULATION_MATCHER = KeywordMatcher(REGULATION_KEYWORDS)
+    PRIVACY_MATCHER = KeywordMatcher(PRIVACY_KEYWORDS)
+    TECH_MATCHER = KeywordMatcher(TECH_KEYWORDS)
+    MARKET_POSITION_MATCHER = KeywordMatcher([
+        "market leader", "leader in", "leading", "largest", "market share", "ranked",
+    ])
+    
+    # Entity extraction: a name follows a competitor cue in the same
+    # sentence, or precedes a tool verb
+    COMPETITOR_CUE = re.compile(r"competitor|alternative|similar")
+    TOOL_VERB = re.compile(r"\s+(?:is a|provides|offers)")
+    
+    # Queries whose results score each section's confidence
+    CONFIDENCE_SECTIONS = {
+        "profile": ["company_overview", "company_details", "leadership"],
+        "industry": ["industry_overview", "industry_challenges"],
+        "competitors": ["competitors_list"],
+        "technology": ["tech_stack", "ai_initiatives"],
+        "regulatory": ["industry_regulations", "ai_regulations"],
+    }
+    
+    # Follow-up queries that only add depth to a section once its
+    # confidence queries are in
+    SECTION_FOLLOW_UPS = {
+        "profile": ["funding_status"],
+        "industry": ["industry_opportunities"],
+        "competitors": ["competitor_ai"],
+        "technology": ["industry_ai_adoption", "ai_use_cases", "ai_tools"],
+        "regulatory": ["data_privacy"],
+    }
+    
+    # Queries that determine the info tier
+    INFO_TIER_QUERIES = ["company_overview", "company_details", "recent_news"]
+    
+    # Query name -> (ResearchOutput section it feeds, updater method)
+    SECTION_UPDATERS = {
+        "company_overview": ("profile", "_update_company_overview"),
+        "company_details": ("profile", "_update_company_details"),
+        "leadership": ("profile", "_update_leadership"),
+        "funding_status": ("profile", "_update_funding"),
+        "recent_news": ("profile", "_update_news"),
+        "industry_overview": ("industry", "_update_industry_overview"),
+        "industry_challenges": ("industry", "_update_industry_challenges"),
+        "industry_opportunities": ("industry", "_update_industry_opportunities"),
+        "tech_stack": ("tech_landscape", "_update_tech_stack"),
+        "ai_initiatives": ("tech_landscape", "_update_ai_initiatives"),
+        "industry_ai_adoption": ("tech_landscape", "_update_ai_adoption"),
+        "ai_use_cases": ("tech_landscape", "_update_ai_use_cases"),
+        "ai_tools": ("tech_landscape", "_update_ai_tools"),
+        "industry_regulations": ("regulatory", "_update_industry_regulations"),
+        "ai_regulations": ("regulatory", "_update_ai_regulations"),
+        "data_privacy": ("regulatory", "_update_data_privacy"),
+    }
+    
+    # Queries the competitor list is built from
+    COMPETITOR_QUERIES = ["competitors_list", "competitor_ai"]
+    
+    # Results of per-competitor enrichment queries are named with this
+    # prefix followed by the competitor name
+    COMPETITOR_PROFILE_PREFIX = "competitor_profile:"
+    
     def __init__(self):
         """Initialize the result processor."""
         self.processed_count = 0
@@ -70,21 +151,19 @@ class ResultProcessor:
         if not results:
             return CompanyInfoTier.PRIVATE_LIMITED
         
-        # Combine all snippets for analysis
-        all_text = " ".join(
-            r.snippet.lower()
-            for qr in results
-            for r in qr.results
-        )
+        # Find every tier indicator in one pass per snippet
+        found = set()
+        for qr in results:
+            for r in qr.results:
+                found |= self.INFO_TIER_MATCHER.find_all(analyze_snippet(r.snippet).lower)
         
         # Count results
         total_results = sum(qr.result_count for qr in results)
         
         # Check for tier indicators
         for tier, indicators in self.INFO_TIER_INDICATORS.items():
-            for indicator in indicators:
-                if indicator in all_text:
-                    return tier
+            if found.intersection(indicators):
+                return tier
         
         # Fall back to result count heuristic
         if total_results >= 15:
@@ -106,11 +185,8 @@ class ResultProcessor:
         Returns:
             Tuple of (CompanySize, estimated_employee_count).
         """
-        all_text = " ".join(
-            r.snippet.lower()
-            for qr in results
-            for r in qr.results
-        )
+        snippets = [analyze_snippet(r.snippet) for qr in results for r in qr.results]
+        all_text = " ".join(a.lower for a in snippets)
         
         # Try to extract employee count
         employee_patterns = [
@@ -142,10 +218,12 @@ class ResultProcessor:
                 return CompanySize.ENTERPRISE, employee_count
         
         # Check size indicators
+        found = set()
+        for a in snippets:
+            found |= self.SIZE_MATCHER.find_all(a.lower)
         for size, indicators in self.SIZE_INDICATORS.items():
-            for indicator in indicators:
-                if indicator in all_text:
-                    return size, None
+            if found.intersection(indicators):
+                return size, None
         
         return CompanySize.MEDIUM, None  # Default assumption
     
@@ -164,50 +242,7 @@ class ResultProcessor:
         Returns:
             CompanyProfile with extracted information.
         """
-        profile = CompanyProfile()
-        sources = set()
-        
-        # Extract from company overview results
-        overview = results.get("company_overview")
-        if overview and overview.results:
-            profile.description = self._extract_first_paragraph(overview.results)
-            sources.update(r.url for r in overview.results)
-        
-        # Extract from company details
-        details = results.get("company_details")
-        if details and details.results:
-            all_results = [details]
-            size, count = self.detect_company_size(all_results)
-            profile.company_size = size
-            profile.employee_estimate = count
-            profile.headquarters = self._extract_location(details.results)
-            profile.founded_year = self._extract_year(details.results, "founded")
-            sources.update(r.url for r in details.results)
-        
-        # Extract leadership
-        leadership = results.get("leadership")
-        if leadership and leadership.results:
-            profile.leadership = self._extract_leadership(leadership.results)
-            sources.update(r.url for r in leadership.results)
-        
-        # Extract funding
-        funding = results.get("funding_status")
-        if funding and funding.results:
-            profile.funding_status = self._extract_funding(funding.results)
-            sources.update(r.url for r in funding.results)
-        
-        # Extract news
-        news = results.get("recent_news")
-        if news and news.results:
-            profile.recent_news = self._extract_news(news.results)
-            sources.update(r.url for r in news.results)
-        
-        # Extract products/services from description
-        if profile.description:
-            profile.products_services = self._extract_products(profile.description)
-        
-        profile.sources = list(sources)[:10]  # Limit sources
-        return profile
+        return self._extract_section(CompanyProfile(), "profile", results)
     
     def extract_industry_context(
         self,
@@ -222,32 +257,7 @@ class ResultProcessor:
         Returns:
             IndustryContext with industry analysis.
         """
-        context = IndustryContext()
-        sources = set()
-        
-        # Extract from industry overview
-        overview = results.get("industry_overview")
-        if overview and overview.results:
-            context.primary_industry = self._extract_industry_name(overview.results)
-            context.market_size = self._extract_market_size(overview.results)
-            context.growth_rate = self._extract_growth_rate(overview.results)
-            context.key_trends = self._extract_trends(overview.results)
-            sources.update(r.url for r in overview.results)
-        
-        # Extract challenges
-        challenges = results.get("industry_challenges")
-        if challenges and challenges.results:
-            context.challenges = self._extract_list_items(challenges.results, "challenge")
-            sources.update(r.url for r in challenges.results)
-        
-        # Extract opportunities
-        opportunities = results.get("industry_opportunities")
-        if opportunities and opportunities.results:
-            context.opportunities = self._extract_list_items(opportunities.results, "opportunity")
-            sources.update(r.url for r in opportunities.results)
-        
-        context.sources = list(sources)[:10]
-        return context
+        return self._extract_section(IndustryContext(), "industry", results)
     
     def extract_competitors(
         self,
@@ -288,6 +298,13 @@ class ResultProcessor:
                 if comp.name in ai_info:
                     comp.ai_initiatives = ai_info[comp.name]
         
+        # Fill in profiles from per-competitor enrichment queries
+        for comp in competitors:
+            profile = results.get(self.COMPETITOR_PROFILE_PREFIX + comp.name)
+            if profile and profile.results:
+                comp.description = self._extract_first_paragraph(profile.results)
+                comp.market_position = self._extract_market_position(profile.results)
+        
         return competitors
     
     def extract_tech_landscape(
@@ -303,41 +320,7 @@ class ResultProcessor:
         Returns:
             TechLandscape with technology analysis.
         """
-        landscape = TechLandscape()
-        sources = set()
-        
-        # Extract tech stack
-        tech = results.get("tech_stack")
-        if tech and tech.results:
-            landscape.company_tech_stack = self._extract_technologies(tech.results)
-            sources.update(r.url for r in tech.results)
-        
-        # Extract AI initiatives
-        ai = results.get("ai_initiatives")
-        if ai and ai.results:
-            landscape.company_ai_initiatives = self._extract_ai_initiatives(ai.results)
-            sources.update(r.url for r in ai.results)
-        
-        # Extract industry AI adoption
-        adoption = results.get("industry_ai_adoption")
-        if adoption and adoption.results:
-            landscape.industry_ai_adoption_rate = self._extract_adoption_rate(adoption.results)
-            sources.update(r.url for r in adoption.results)
-        
-        # Extract use cases
-        use_cases = results.get("ai_use_cases")
-        if use_cases and use_cases.results:
-            landscape.industry_ai_use_cases = self._extract_use_cases(use_cases.results)
-            sources.update(r.url for r in use_cases.results)
-        
-        # Extract recommended tools
-        tools = results.get("ai_tools")
-        if tools and tools.results:
-            landscape.recommended_ai_tools = self._extract_tools(tools.results)
-            sources.update(r.url for r in tools.results)
-        
-        landscape.sources = list(sources)[:10]
-        return landscape
+        return self._extract_section(TechLandscape(), "tech_landscape", results)
     
     def extract_regulatory_context(
         self,
@@ -352,29 +335,93 @@ class ResultProcessor:
         Returns:
             RegulatoryContext with compliance information.
         """
-        context = RegulatoryContext()
+        return self._extract_section(RegulatoryContext(), "regulatory", results)
+    
+    def _extract_section(self, section: Any, section_name: str, results: Dict[str, QueryResult]) -> Any:
+        """Apply every available query result for a section, then its sources."""
         sources = set()
+        for name, (target, _) in self.SECTION_UPDATERS.items():
+            result = results.get(name)
+            if target == section_name and result and result.results:
+                self.update_section(section, name, result)
+                sources.update(r.url for r in result.results)
         
-        # Extract industry regulations
-        regs = results.get("industry_regulations")
-        if regs and regs.results:
-            context.industry_regulations = self._extract_regulations(regs.results)
-            sources.update(r.url for r in regs.results)
-        
-        # Extract AI regulations
-        ai_regs = results.get("ai_regulations")
-        if ai_regs and ai_regs.results:
-            context.ai_regulations = self._extract_regulations(ai_regs.results)
-            sources.update(r.url for r in ai_regs.results)
+        section.sources = list(sources)[:10]  # Limit sources
+        return section
+    
+    def update_section(self, section: Any, query_name: str, result: QueryResult) -> None:
+        """
+        Update the section fields a single query's results feed.
         
-        # Extract data privacy
-        privacy = results.get("data_privacy")
-        if privacy and privacy.results:
-            context.data_privacy_requirements = self._extract_privacy_requirements(privacy.results)
-            sources.update(r.url for r in privacy.results)
+        Each field is derived from exactly one query, so results can be
+        applied in any order and each snippet is scanned once. Sources are
+        left to the caller.
         
-        context.sources = list(sources)[:10]
-        return context
+        Args:
+            section: Section model from SECTION_UPDATERS for the query.
+            query_name: Query name.
+            result: The query's result (with at least one search result).
+        """
+        _, updater = self.SECTION_UPDATERS[query_name]
+        getattr(self, updater)(section, result)
+    
+    # Per-query section updaters
+    
+    def _update_company_overview(self, profile: CompanyProfile, result: QueryResult) -> None:
+        profile.description = self._extract_first_paragraph(result.results)
+        # Extract products/services from description
+        if profile.description:
+            profile.products_services = self._extract_products(profile.description)
+    
+    def _update_company_details(self, profile: CompanyProfile, result: QueryResult) -> None:
+        profile.company_size, profile.employee_estimate = self.detect_company_size([result])
+        profile.headquarters = self._extract_location(result.results)
+        profile.founded_year = self._extract_year(result.results, "founded")
+    
+    def _update_leadership(self, profile: CompanyProfile, result: QueryResult) -> None:
+        profile.leadership = self._extract_leadership(result.results)
+    
+    def _update_funding(self, profile: CompanyProfile, result: QueryResult) -> None:
+        profile.funding_status = self._extract_funding(result.results)
+    
+    def _update_news(self, profile: CompanyProfile, result: QueryResult) -> None:
+        profile.recent_news = self._extract_news(result.results)
+    
+    def _update_industry_overview(self, context: IndustryContext, result: QueryResult) -> None:
+        context.primary_industry = self._extract_industry_name(result.results)
+        context.market_size = self._extract_market_size(result.results)
+        context.growth_rate = self._extract_growth_rate(result.results)
+        context.key_trends = self._extract_trends(result.results)
+    
+    def _update_industry_challenges(self, context: IndustryContext, result: QueryResult) -> None:
+        context.challenges = self._extract_list_items(result.results, "challenge")
+    
+    def _update_industry_opportunities(self, context: IndustryContext, result: QueryResult) -> None:
+        context.opportunities = self._extract_list_items(result.results, "opportunity")
+    
+    def _update_tech_stack(self, landscape: TechLandscape, result: QueryResult) -> None:
+        landscape.company_tech_stack = self._extract_technologies(result.results)
+    
+    def _update_ai_initiatives(self, landscape: TechLandscape, result: QueryResult) -> None:
+        landscape.company_ai_initiatives = self._extract_ai_initiatives(result.results)
+    
+    def _update_ai_adoption(self, landscape: TechLandscape, result: QueryResult) -> None:
+        landscape.industry_ai_adoption_rate = self._extract_adoption_rate(result.results)
+    
+    def _update_ai_use_cases(self, landscape: TechLandscape, result: QueryResult) -> None:
+        landscape.industry_ai_use_cases = self._extract_use_cases(result.results)
+    
+    def _update_ai_tools(self, landscape: TechLandscape, result: QueryResult) -> None:
+        landscape.recommended_ai_tools = self._extract_tools(result.results)
+    
+    def _update_industry_regulations(self, context: RegulatoryContext, result: QueryResult) -> None:
+        context.industry_regulations = self._extract_regulations(result.results)
+    
+    def _update_ai_regulations(self, context: RegulatoryContext, result: QueryResult) -> None:
+        context.ai_regulations = self._extract_regulations(result.results)
+    
+    def _update_data_privacy(self, context: RegulatoryContext, result: QueryResult) -> None:
+        context.data_privacy_requirements = self._extract_privacy_requirements(result.results)
     
     def validate_user_context(
         self,
@@ -402,13 +449,6 @@ class ResultProcessor:
             "raw_context": user_context,
         }
         
-        # Compare with research results
-        all_text = " ".join(
-            r.snippet.lower()
-            for qr in research_results.values()
-            for r in qr.results
-        ).lower()
-        
         user_lower = user_context.lower()
         
         # Check for potential conflicts (simplified)
@@ -436,34 +476,31 @@ class ResultProcessor:
         Returns:
             Complete ResearchOutput model.
         """
-        # Detect info tier from initial results
-        initial_results = [
-            r for name, r in results.items()
-            if name in ["company_overview", "company_details", "recent_news"]
-        ]
-        info_tier = self.detect_info_tier(initial_results)
+        builder = self.start_research_output(company_name, mode, user_context)
+        for name, result in results.items():
+            builder.add(name, result)
         
-        # Build all sections
-        output = ResearchOutput(
-            company_name=company_name,
-            research_timestamp=datetime.now(),
-            research_mode=mode,
-            information_tier=info_tier,
-            profile=self.extract_company_profile(company_name, results),
-            industry=self.extract_industry_context(results),
-            competitors=self.extract_competitors(results),
-            tech_landscape=self.extract_tech_landscape(results),
-            regulatory=self.extract_regulatory_context(results),
-            user_context=self.validate_user_context(user_context, results),
-            raw_queries=list(results.values()),
-            total_cost=sum(r.cost_estimate for r in results.values()),
-        )
+        self.processed_count += 1
+        return builder.snapshot()
+    
+    def start_research_output(
+        self,
+        company_name: str,
+        mode: ResearchMode,
+        user_context: str = "",
+    ) -> "ResearchOutputBuilder":
+        """
+        Start building research output incrementally, as results arrive.
         
-        # Calculate confidence scores
-        output.confidence_scores = self._calculate_confidence(results)
+        Args:
+            company_name: Company name.
+            mode: Research mode used.
+            user_context: User-provided context.
         
-        self.processed_count += 1
-        return output
+        Returns:
+            ResearchOutputBuilder to add query results to.
+        """
+        return ResearchOutputBuilder(self, company_name, mode, user_context)
     
     # Helper methods for extraction
     
@@ -487,7 +524,7 @@ class ResultProcessor:
         ]
         
         for r in results:
-            text = r.snippet.lower()
+            text = analyze_snippet(r.snippet).lower
             for pattern in patterns:
                 match = re.search(pattern, text)
                 if match:
@@ -499,7 +536,7 @@ class ResultProcessor:
         pattern = rf'{keyword}\s*(?:in)?\s*(\d{{4}})'
         
         for r in results:
-            match = re.search(pattern, r.snippet.lower())
+            match = re.search(pattern, analyze_snippet(r.snippet).lower)
             if match:
                 try:
                     return int(match.group(1))
@@ -528,12 +565,11 @@ class ResultProcessor:
     def _extract_funding(self, results: List[SearchResult]) -> str:
         """Extract funding status."""
         for r in results:
-            text = r.snippet.lower()
-            if "raised" in text or "funding" in text or "series" in text:
+            a = analyze_snippet(r.snippet)
+            if "raised" in a.lower or "funding" in a.lower or "series" in a.lower:
                 # Get the sentence containing funding info
-                sentences = r.snippet.split(".")
-                for s in sentences:
-                    if any(word in s.lower() for word in ["raised", "funding", "series", "valuation"]):
+                for s, s_lower in zip(a.sentences, a.lower_sentences):
+                    if self.FUNDING_MATCHER.search(s_lower):
                         return s.strip()[:200]
         return ""
     
@@ -581,7 +617,7 @@ class ResultProcessor:
         
         for r in results:
             for pattern in patterns:
-                match = re.search(pattern, r.snippet.lower())
+                match = re.search(pattern, analyze_snippet(r.snippet).lower)
                 if match:
                     return match.group(0)
         return ""
@@ -595,7 +631,7 @@ class ResultProcessor:
         
         for r in results:
             for pattern in patterns:
-                match = re.search(pattern, r.snippet.lower())
+                match = re.search(pattern, analyze_snippet(r.snippet).lower)
                 if match:
                     return match.group(1)
         return ""
@@ -603,12 +639,11 @@ class ResultProcessor:
     def _extract_trends(self, results: List[SearchResult]) -> List[str]:
         """Extract key trends."""
         trends = []
-        trend_keywords = ["trend", "emerging", "growing", "rising", "shift toward"]
         
         for r in results:
-            sentences = r.snippet.split(".")
-            for s in sentences:
-                if any(kw in s.lower() for kw in trend_keywords):
+            a = analyze_snippet(r.snippet)
+            for s, s_lower in zip(a.sentences, a.lower_sentences):
+                if self.TREND_MATCHER.search(s_lower):
                     trends.append(s.strip()[:150])
         
         return list(set(trends))[:5]
@@ -617,8 +652,7 @@ class ResultProcessor:
         """Extract list items from results."""
         items = []
         for r in results:
-            sentences = r.snippet.split(".")
-            for s in sentences:
+            for s in analyze_snippet(r.snippet).sentences:
                 if len(s) > 20 and len(s) < 200:
                     items.append(s.strip())
         return list(set(items))[:5]
@@ -626,14 +660,19 @@ class ResultProcessor:
     def _extract_competitor_names(self, results: List[SearchResult]) -> List[str]:
         """Extract competitor company names."""
         names = []
-        # Look for capitalized words that might be company names
+        # Simple heuristic: the last capitalized name after a cue word
+        # in the same sentence
         for r in results:
-            # Simple heuristic: find capitalized multi-word names
-            pattern = r'(?:competitor|alternative|similar)[^.]*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
-            matches = re.findall(pattern, r.snippet)
-            names.extend(matches)
+            for sentence in analyze_snippet(r.snippet).sentences:
+                cue = self.COMPETITOR_CUE.search(sentence)
+                if not cue:
+                    continue
+                spans = capitalized_spans(sentence, cue.end())
+                if spans:
+                    start, end = spans[-1]
+                    names.append(sentence[start:end])
         
-        return list(set(names))[:5]
+        return list(dict.fromkeys(names))[:5]
     
     def _extract_competitor_ai(
         self,
@@ -643,32 +682,37 @@ class ResultProcessor:
         """Extract AI initiatives by competitor."""
         ai_info = {}
         
+        snippets = [analyze_snippet(r.snippet) for r in results]
+        
         for name in competitor_names:
+            name_lower = name.lower()
             initiatives = []
-            for r in results:
-                if name.lower() in r.snippet.lower():
+            for a in snippets:
+                if name_lower in a.lower:
                     # Extract AI-related sentences mentioning this competitor
-                    sentences = r.snippet.split(".")
-                    for s in sentences:
-                        if name.lower() in s.lower() and "ai" in s.lower():
+                    for s, s_lower in zip(a.sentences, a.lower_sentences):
+                        if name_lower in s_lower and "ai" in s_lower:
                             initiatives.append(s.strip()[:100])
             ai_info[name] = initiatives[:3]
         
         return ai_info
     
+    def _extract_market_position(self, results: List[SearchResult]) -> str:
+        """Extract a sentence describing market position."""
+        for r in results:
+            a = analyze_snippet(r.snippet)
+            for s, s_lower in zip(a.sentences, a.lower_sentences):
+                if self.MARKET_POSITION_MATCHER.search(s_lower):
+                    return s.strip()[:150]
+        return ""
+    
     def _extract_technologies(self, results: List[SearchResult]) -> List[str]:
         """Extract technology names."""
-        tech_keywords = [
-            "aws", "azure", "gcp", "kubernetes", "docker", "python", "java",
-            "react", "angular", "vue", "node", "postgresql", "mongodb",
-            "salesforce", "sap", "oracle", "microsoft", "google", "amazon"
-        ]
-        
         found = []
         for r in results:
-            text = r.snippet.lower()
-            for tech in tech_keywords:
-                if tech in text and tech not in found:
+            present = self.TECH_MATCHER.find_all(analyze_snippet(r.snippet).lower)
+            for tech in self.TECH_KEYWORDS:
+                if tech in present and tech.title() not in found:
                     found.append(tech.title())
         
         return found[:10]
@@ -677,9 +721,9 @@ class ResultProcessor:
         """Extract AI initiative descriptions."""
         initiatives = []
         for r in results:
-            sentences = r.snippet.split(".")
-            for s in sentences:
-                if any(kw in s.lower() for kw in ["ai", "machine learning", "automation"]):
+            a = analyze_snippet(r.snippet)
+            for s, s_lower in zip(a.sentences, a.lower_sentences):
+                if self.AI_MATCHER.search(s_lower):
                     initiatives.append(s.strip()[:150])
         return list(set(initiatives))[:5]
     
@@ -692,7 +736,7 @@ class ResultProcessor:
         
         for r in results:
             for pattern in patterns:
-                match = re.search(pattern, r.snippet.lower())
+                match = re.search(pattern, analyze_snippet(r.snippet).lower)
                 if match:
                     return match.group(1)
         return ""
@@ -710,71 +754,190 @@ class ResultProcessor:
     def _extract_tools(self, results: List[SearchResult]) -> List[Dict[str, Any]]:
         """Extract recommended AI tools."""
         tools = []
-        tool_patterns = [
-            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:is a|provides|offers)',
-        ]
         
         for r in results:
-            for pattern in tool_patterns:
-                matches = re.findall(pattern, r.snippet)
-                for match in matches:
-                    tools.append({
-                        "name": match,
-                        "description": "",
-                        "source": r.url,
-                    })
+            # Capitalized names directly followed by a tool verb
+            text = r.snippet
+            resume = 0
+            for start, end in capitalized_spans(text):
+                verb = self.TOOL_VERB.match(text, end) if start >= resume else None
+                if not verb:
+                    continue
+                tools.append({
+                    "name": text[start:end],
+                    "description": "",
+                    "source": r.url,
+                })
+                if len(tools) == 5:
+                    return tools
+                resume = verb.end()
         
-        return tools[:5]
+        return tools
     
     def _extract_regulations(self, results: List[SearchResult]) -> List[str]:
         """Extract regulation names/descriptions."""
         regs = []
         for r in results:
-            sentences = r.snippet.split(".")
-            for s in sentences:
-                if any(kw in s.lower() for kw in ["regulation", "compliance", "requirement", "law"]):
+            a = analyze_snippet(r.snippet)
+            for s, s_lower in zip(a.sentences, a.lower_sentences):
+                if self.REGULATION_MATCHER.search(s_lower):
                     regs.append(s.strip()[:150])
         return list(set(regs))[:5]
     
     def _extract_privacy_requirements(self, results: List[SearchResult]) -> List[str]:
         """Extract privacy requirements."""
         privacy = []
-        keywords = ["gdpr", "ccpa", "hipaa", "privacy", "data protection"]
         
         for r in results:
-            sentences = r.snippet.split(".")
-            for s in sentences:
-                if any(kw in s.lower() for kw in keywords):
+            a = analyze_snippet(r.snippet)
+            for s, s_lower in zip(a.sentences, a.lower_sentences):
+                if self.PRIVACY_MATCHER.search(s_lower):
                     privacy.append(s.strip()[:150])
         
         return list(set(privacy))[:5]
     
+    def section_for_query(self, query_name: str) -> Optional[str]:
+        """Get the section whose confidence a query's results count toward."""
+        for section, queries in self.CONFIDENCE_SECTIONS.items():
+            if query_name in queries:
+                return section
+        return None
+    
+    def score_section(self, section: str, results: Dict[str, QueryResult]) -> float:
+        """
+        Score one section's confidence from the results available so far.
+        
+        Cheap enough to re-run as each result arrives, so callers can act
+        on a section's confidence before all of its queries have run.
+        
+        Args:
+            section: Section name (a key of CONFIDENCE_SECTIONS).
+            results: Query results collected so far.
+        
+        Returns:
+            Confidence between 0.3 and 0.9.
+        """
+        total_results = 0
+        for q in self.CONFIDENCE_SECTIONS.get(section, []):
+            if q in results:
+                total_results += results[q].result_count
+        
+        # Simple confidence based on result count
+        if total_results >= 10:
+            return 0.9
+        elif total_results >= 5:
+            return 0.7
+        elif total_results >= 2:
+            return 0.5
+        else:
+            return 0.3
+    
     def _calculate_confidence(self, results: Dict[str, QueryResult]) -> Dict[str, float]:
         """Calculate confidence scores for each research section."""
-        confidence = {}
-        
-        sections = {
-            "profile": ["company_overview", "company_details", "leadership"],
-            "industry": ["industry_overview", "industry_challenges"],
-            "competitors": ["competitors_list"],
-            "technology": ["tech_stack", "ai_initiatives"],
-            "regulatory": ["industry_regulations", "ai_regulations"],
+        return {
+            section: self.score_section(section, results)
+            for section in self.CONFIDENCE_SECTIONS
         }
+
+
+class ResearchOutputBuilder:
+    """
+    Builds a ResearchOutput incrementally as query results arrive.
+    
+    Each result only updates the section fields it feeds, so no snippet is
+    scanned twice. snapshot() can be called at any time (from any thread)
+    for a partial output, e.g. to start synthesis of deliverables that only
+    need the sections already in.
+    """
+    
+    def __init__(
+        self,
+        processor: ResultProcessor,
+        company_name: str,
+        mode: ResearchMode,
+        user_context: str = "",
+    ):
+        """
+        Initialize the builder.
+        
+        Args:
+            processor: ResultProcessor providing the extraction logic.
+            company_name: Company name.
+            mode: Research mode used.
+            user_context: User-provided context.
+        """
+        self.processor = processor
+        self.user_context = user_context
+        self.results: Dict[str, QueryResult] = {}
+        self.output = ResearchOutput(
+            company_name=company_name,
+            research_timestamp=datetime.now(),
+            research_mode=mode,
+            information_tier=processor.detect_info_tier([]),
+        )
+        self._sources: Dict[str, Dict[str, None]] = {}  # section -> ordered URL set
+        self._lock = threading.Lock()
+    
+    def add(self, name: str, result: QueryResult) -> Optional[str]:
+        """
+        Fold one query's result into the output.
+        
+        Args:
+            name: Query name.
+            result: The query's result.
         
-        for section, queries in sections.items():
-            total_results = 0
-            for q in queries:
-                if q in results:
-                    total_results += results[q].result_count
+        Returns:
+            Name of the ResearchOutput section updated, if any.
+        """
+        with self._lock:
+            self.results[name] = result
+            self.output.raw_queries.append(result)
+            self.output.total_cost += result.cost_estimate
             
-            # Simple confidence based on result count
-            if total_results >= 10:
-                confidence[section] = 0.9
-            elif total_results >= 5:
-                confidence[section] = 0.7
-            elif total_results >= 2:
-                confidence[section] = 0.5
-            else:
-                confidence[section] = 0.3
+            if name in self.processor.INFO_TIER_QUERIES:
+                self.output.information_tier = self.processor.detect_info_tier([
+                    self.results[q] for q in self.processor.INFO_TIER_QUERIES if q in self.results
+                ])
+            
+            if (
+                name in self.processor.COMPETITOR_QUERIES
+                or name.startswith(self.processor.COMPETITOR_PROFILE_PREFIX)
+            ):
+                self.output.competitors = self.processor.extract_competitors(self.results)
+                return "competitors"
+            
+            if name not in self.processor.SECTION_UPDATERS or not result.results:
+                return None
+            
+            section_name, _ = self.processor.SECTION_UPDATERS[name]
+            section = getattr(self.output, section_name)
+            self.processor.update_section(section, name, result)
+            
+            sources = self._sources.setdefault(section_name, {})
+            sources.update(dict.fromkeys(r.url for r in result.results))
+            section.sources = list(sources)[:10]  # Limit sources
+            return section_name
+    
+    def snapshot(self) -> ResearchOutput:
+        """
+        Get the research output for the results added so far.
         
-        return confidence
+        Returns:
+            An independent copy; sections whose queries have not arrived
+            keep their defaults.
+        """
+        with self._lock:
+            output = self.output.model_copy(update={
+                "profile": self.output.profile.model_copy(deep=True),
+                "industry": self.output.industry.model_copy(deep=True),
+                "competitors": [c.model_copy(deep=True) for c in self.output.competitors],
+                "tech_landscape": self.output.tech_landscape.model_copy(deep=True),
+                "regulatory": self.output.regulatory.model_copy(deep=True),
+                # Query results are never modified once added
+                "raw_queries": list(self.output.raw_queries),
+            })
+            output.confidence_scores = self.processor._calculate_confidence(self.results)
+            output.user_context = self.processor.validate_user_context(
+                self.user_context, self.results
+            )
+            return output
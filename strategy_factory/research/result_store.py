@@ -0,0 +1,85 @@
+"""
+Deduplicated in-memory store for research search results.
+
+The same page often comes back from several queries (company_overview,
+company_details, recent_news, ...). The store keeps one SearchResult per
+page and snippet, keyed by normalized URL, and interns snippet text, while
+each query keeps its own ordered references to the shared results.
+"""
+
+from typing import Dict, List, Tuple
+
+from ..models import QueryResult, SearchResult, normalize_url
+
+
+class ResearchResultStore:
+    """
+    Interns the search results gathered during one research run.
+
+    Results for the same page (by normalized URL) share the URL first seen
+    for it, so source lists built from them deduplicate; results that also
+    share a snippet are the same object. Results without a URL are never
+    merged, since nothing identifies their page.
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._pages: Dict[str, SearchResult] = {}  # normalized URL -> first result seen
+        self._results: Dict[Tuple[str, str], SearchResult] = {}
+        self._snippets: Dict[str, str] = {}
+
+        # Stats
+        self.added = 0
+        self.deduplicated = 0
+
+    def add(self, result: QueryResult) -> QueryResult:
+        """
+        Intern a query's search results.
+
+        Args:
+            result: Query result as returned by the client.
+
+        Returns:
+            A copy of the result referencing the shared search results. The
+            input is not modified, since it may be shared with other callers.
+        """
+        if not result.results:
+            return result
+        return result.model_copy(update={
+            "results": [self._intern(sr) for sr in result.results],
+        })
+
+    def _intern(self, sr: SearchResult) -> SearchResult:
+        """Get the shared copy of a search result, adding it if new."""
+        self.added += 1
+        page_key = normalize_url(sr.url)
+        snippet = self._snippets.setdefault(sr.snippet, sr.snippet)
+        if not page_key:
+            if snippet is not sr.snippet:
+                sr = sr.model_copy(update={"snippet": snippet})
+            return sr
+
+        shared = self._results.get((page_key, snippet))
+        if shared is not None:
+            self.deduplicated += 1
+            return shared
+
+        page = self._pages.setdefault(page_key, sr)
+        if page.url != sr.url or snippet is not sr.snippet:
+            sr = sr.model_copy(update={"url": page.url, "snippet": snippet})
+        self._results[(page_key, snippet)] = sr
+        return sr
+
+    @property
+    def pages(self) -> List[SearchResult]:
+        """One search result per distinct page, in the order first seen."""
+        return list(self._pages.values())
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get deduplication statistics."""
+        return {
+            "results": self.added,
+            "unique_pages": len(self._pages),
+            "unique_results": len(self._results),
+            "deduplicated": self.deduplicated,
+        }
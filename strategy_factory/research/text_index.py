@@ -0,0 +1,152 @@
+"""
+Shared text pre-processing for search result extraction.
+
+Every extractor in ResultProcessor works on the same snippets. Each
+snippet is analyzed once (lowercased and split into sentences) and the
+analysis is cached. Keyword lists are compiled into a single automaton
+that finds all of their keywords in one pass over a text, so matching cost
+grows with the text, not with text x keywords. Entity names are picked out
+by a linear scan over capitalized words (capitalized_spans). See
+entity_benchmark.py for micro-benchmarks of both.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# A capitalized word: an uppercase letter and the lowercase letters after it
+CAPITALIZED_WORD = re.compile(r"[A-Z][a-z]+")
+WHITESPACE = re.compile(r"\s+")
+
+
+class AnalyzedSnippet:
+    """A snippet split into sentences, with lowercased forms."""
+
+    __slots__ = ("text", "lower", "sentences", "lower_sentences")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.sentences: List[str] = text.split(".")
+        self.lower_sentences: List[str] = self.lower.split(".")
+
+
+@lru_cache(maxsize=4096)
+def analyze_snippet(text: str) -> AnalyzedSnippet:
+    """
+    Analyze a snippet, reusing the analysis of identical text.
+
+    Args:
+        text: Snippet text.
+
+    Returns:
+        Cached AnalyzedSnippet.
+    """
+    return AnalyzedSnippet(text)
+
+
+def capitalized_spans(text: str, pos: int = 0) -> List[Tuple[int, int]]:
+    """
+    Find runs of capitalized words separated only by whitespace.
+
+    Used to pick out entity names such as "Globex Corp". Each word and each
+    gap between words is examined once, so running time is linear in the
+    text, unlike nested-quantifier patterns that backtrack on long runs.
+
+    Args:
+        text: Text to scan.
+        pos: Position to start scanning from.
+
+    Returns:
+        (start, end) offsets of each run, in order.
+    """
+    spans = []
+    start = end = None
+    for word in CAPITALIZED_WORD.finditer(text, pos):
+        if end is not None and WHITESPACE.fullmatch(text, end, word.start()):
+            end = word.end()
+            continue
+        if end is not None:
+            spans.append((start, end))
+        start, end = word.span()
+
+    if end is not None:
+        spans.append((start, end))
+    return spans
+
+
+class KeywordMatcher:
+    """
+    Finds which of a set of keywords occur in a text, in a single pass.
+
+    Keywords are compiled into an Aho-Corasick automaton: a trie of the
+    keywords whose failure links are folded into each state's transitions,
+    so a text is scanned with one table lookup per character however many
+    keywords there are. Each state lists every keyword ending there,
+    including keywords that are suffixes of longer ones, so results match
+    plain substring checks (`keyword in text`) for every keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Compile the matcher.
+
+        Args:
+            keywords: Lowercase keywords to look for.
+        """
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+
+        # Trie of the keywords; state 0 is the root
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[Set[str]] = [set()]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto[state][char] = len(goto)
+                    goto.append({})
+                    outputs.append(set())
+                state = goto[state][char]
+            outputs[state].add(keyword)
+
+        # Breadth-first, so a state's failure state (always shallower) is
+        # complete before the state copies its transitions and outputs
+        self._delta: List[Dict[str, int]] = [{} for _ in goto]
+        self._delta[0] = dict(goto[0])
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._delta[state] = {**self._delta[fail[state]], **goto[state]}
+            outputs[state] |= outputs[fail[state]]
+            for char, child in goto[state].items():
+                fail[child] = self._delta[fail[state]].get(char, 0)
+                queue.append(child)
+
+        self._outputs: List[FrozenSet[str]] = [frozenset(out) for out in outputs]
+
+    def search(self, text: str) -> bool:
+        """Check whether any keyword occurs in a text."""
+        delta, outputs = self._delta, self._outputs
+        if outputs[0]:
+            return True
+
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                return True
+        return False
+
+    def find_all(self, text: str) -> Set[str]:
+        """Get every keyword that occurs in a text."""
+        delta, outputs = self._delta, self._outputs
+        found: Set[str] = set(outputs[0])
+
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
@@ -0,0 +1,433 @@
+"""
+Shared retry policy and circuit breakers for the upstream API clients.
+
+Both the Perplexity and Gemini clients retry through a RetryPolicy, which
+classifies each failure before deciding whether to wait and try again:
+
+- Retryable errors (429 rate limits, 5xx, timeouts, dropped connections)
+  are retried with jittered exponential backoff, honoring Retry-After.
+- Provider-wide errors (invalid key, exhausted quota or credits) are not
+  retried and open the provider's circuit breaker immediately.
+- Request-specific errors (bad request, safety block) are not retried and
+  do not affect the breaker.
+
+A circuit breaker is shared per provider, so once a provider is known to be
+down every in-flight job stops at its next attempt instead of sleeping
+through its own retries.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import CIRCUIT_BREAKER_CONFIG, RETRY_CONFIG
+
+
+class ErrorKind(str, Enum):
+    """How a failed API call should be handled."""
+    RETRYABLE = "retryable"    # Transient: retry with backoff
+    FATAL = "fatal"            # Provider-wide: fail fast and open the breaker
+    PERMANENT = "permanent"    # This request only: fail without retrying
+
+
+# Message fragments that identify provider-wide failures
+_FATAL_MARKERS = (
+    "api key", "api_key", "unauthorized", "permission denied", "quota",
+    "credit", "billing", "payment", "insufficient",
+)
+
+# Message fragments that identify a response blocked by safety filters
+_BLOCKED_MARKERS = ("safety", "blocked", "finish_reason", "response.text")
+
+# Exception class name fragments for transport-level failures
+_TRANSIENT_NAMES = ("timeout", "connection", "connecterror", "readerror", "remoteprotocol")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the provider's circuit is open."""
+
+    def __init__(self, provider: str, retry_in: float, cause: Optional[BaseException] = None):
+        self.provider = provider
+        self.retry_in = retry_in
+        self.cause = cause
+        reason = f": {cause}" if cause else ""
+        super().__init__(
+            f"{provider} circuit open, failing fast for {retry_in:.0f}s{reason}"
+        )
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """Extract an HTTP status code from an SDK or HTTP client exception."""
+    for attr in ("status_code", "code", "http_status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    if isinstance(value, int):
+        return value
+    return None
+
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """
+    Read the Retry-After hint from an error response, if any.
+
+    Returns:
+        Seconds to wait, or None if the response carries no usable hint.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """
+    Decide whether a failed API call is worth retrying.
+
+    Args:
+        error: Exception raised by the API call.
+
+    Returns:
+        The ErrorKind for the failure. Unrecognized errors are treated as
+        retryable, as they were before classification existed.
+    """
+    message = str(error).lower()
+    status = _status_code(error)
+
+    if status is not None:
+        if status in (401, 402, 403):
+            return ErrorKind.FATAL
+        if status == 429:
+            # Gemini and Perplexity use 429 for exhausted quota as well
+            if any(marker in message for marker in ("quota", "credit", "billing", "insufficient")):
+                return ErrorKind.FATAL
+            return ErrorKind.RETRYABLE
+        if status == 408 or status >= 500:
+            return ErrorKind.RETRYABLE
+        if 400 <= status < 500:
+            return ErrorKind.PERMANENT
+
+    error_name = type(error).__name__.lower()
+    if "blocked" in error_name or "stopcandidate" in error_name:
+        return ErrorKind.PERMANENT
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return ErrorKind.RETRYABLE
+    if any(name in error_name for name in _TRANSIENT_NAMES):
+        return ErrorKind.RETRYABLE
+    if any(marker in message for marker in _FATAL_MARKERS):
+        return ErrorKind.FATAL
+    if isinstance(error, ValueError) and any(marker in message for marker in _BLOCKED_MARKERS):
+        return ErrorKind.PERMANENT
+
+    return ErrorKind.RETRYABLE
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for one upstream provider.
+
+    Closed: calls pass through; consecutive retryable failures are counted.
+    Open: calls are rejected with CircuitOpenError until reset_timeout passes.
+    Half-open: a single probe call is let through; its outcome closes the
+    breaker again or re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            name: Provider name, used in error messages.
+            failure_threshold: Consecutive retryable failures that open the circuit.
+            reset_timeout: Seconds the circuit stays open before a probe is allowed.
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._last_error: Optional[BaseException] = None
+
+        # Stats
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: "closed", "open" or "half-open"."""
+        with self._lock:
+            return self._state(time.time())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_call(self) -> None:
+        """
+        Check that a call may be made.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a
+                probe already in flight.
+        """
+        with self._lock:
+            now = time.time()
+            state = self._state(now)
+            if state == "closed":
+                return
+            if state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            self.rejected_calls += 1
+            retry_in = max(0.0, self.reset_timeout - (now - self._opened_at))
+            raise CircuitOpenError(self.name, retry_in, self._last_error)
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+            self._last_error = None
+
+    def record_failure(self, error: BaseException, kind: ErrorKind) -> None:
+        """Record a failed call; fatal errors open the circuit immediately."""
+        if kind == ErrorKind.PERMANENT:
+            # The provider answered; only this request was bad
+            with self._lock:
+                self._probe_in_flight = False
+            return
+
+        with self._lock:
+            self._failures += 1
+            self._last_error = error
+            probe_failed = self._probe_in_flight
+            self._probe_in_flight = False
+            if kind == ErrorKind.FATAL or probe_failed or self._failures >= self.failure_threshold:
+                if self._opened_at is None or probe_failed:
+                    self.times_opened += 1
+                self._opened_at = time.time()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state and statistics."""
+        with self._lock:
+            return {
+                "state": self._state(time.time()),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls,
+            }
+
+
+class RetryPolicy:
+    """
+    Retry engine shared by the API clients.
+
+    Wraps a single API call: checks the provider's circuit breaker, runs the
+    call, and on failure classifies the error to decide between retrying
+    with backoff and failing fast.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        max_retries: int = RETRY_CONFIG["max_retries"],
+        initial_delay: float = RETRY_CONFIG["initial_delay"],
+        max_delay: float = RETRY_CONFIG["max_delay"],
+        backoff_multiplier: float = RETRY_CONFIG["backoff_multiplier"],
+        jitter: float = RETRY_CONFIG["jitter"],
+    ):
+        """
+        Initialize the retry policy.
+
+        Args:
+            breaker: Circuit breaker of the provider being called.
+            max_retries: Maximum attempts per call.
+            initial_delay: Backoff before the first retry, in seconds.
+            max_delay: Longest wait between attempts. A Retry-After hint
+                above this fails the call instead of waiting.
+            backoff_multiplier: Backoff growth factor per attempt.
+            jitter: Random spread applied to backoff, as a fraction (0-1).
+        """
+        self.breaker = breaker
+        self.max_retries = max(1, max_retries)
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_multiplier = backoff_multiplier
+        self.jitter = min(1.0, max(0.0, jitter))
+
+    def _next_wait(
+        self,
+        error: BaseException,
+        attempt: int,
+        delay: float,
+    ) -> Optional[float]:
+        """
+        Decide how long to wait before retrying after a failed attempt.
+
+        Returns:
+            Seconds to wait, or None if the call should not be retried.
+        """
+        kind = classify_error(error)
+        self.breaker.record_failure(error, kind)
+
+        if kind != ErrorKind.RETRYABLE or attempt >= self.max_retries - 1:
+            return None
+
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                return None
+            return retry_after
+
+        spread = delay * self.jitter
+        return max(0.0, delay + random.uniform(-spread, spread))
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """
+        Run a call with retries.
+
+        Args:
+            fn: Zero-argument function making one API request.
+
+        Returns:
+            The function's return value.
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open.
+            Exception: The last error, once retries are exhausted or the
+                error is not retryable.
+        """
+        delay = self.initial_delay
+
+        for attempt in range(self.max_retries):
+            self.breaker.before_call()
+            try:
+                result = fn()
+            except (KeyboardInterrupt, asyncio.CancelledError) as e:
+                # Abandoned, not failed: release a half-open probe slot
+                self.breaker.record_failure(e, ErrorKind.PERMANENT)
+                raise
+            except Exception as e:
+                wait = self._next_wait(e, attempt, delay)
+                if wait is None:
+                    raise
+                print(f"Retry {attempt + 1}/{self.max_retries} in {wait:.1f}s after error: {e}")
+                time.sleep(wait)
+                delay = min(delay * self.backoff_multiplier, self.max_delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def call_async(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an async call with retries, without blocking the event loop.
+
+        Args:
+            fn: Zero-argument function returning an awaitable API request.
+
+        Returns:
+            The awaited result.
+
+        Raises:
+            CircuitOpenError: If the provider's circuit is open.
+            Exception: The last error, once retries are exhausted or the
+                error is not retryable.
+        """
+        delay = self.initial_delay
+
+        for attempt in range(self.max_retries):
+            self.breaker.before_call()
+            try:
+                result = await fn()
+            except (KeyboardInterrupt, asyncio.CancelledError) as e:
+                # Abandoned, not failed: release a half-open probe slot
+                self.breaker.record_failure(e, ErrorKind.PERMANENT)
+                raise
+            except Exception as e:
+                wait = self._next_wait(e, attempt, delay)
+                if wait is None:
+                    raise
+                print(f"Retry {attempt + 1}/{self.max_retries} in {wait:.1f}s after error: {e}")
+                await asyncio.sleep(wait)
+                delay = min(delay * self.backoff_multiplier, self.max_delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def run(self, fn: Callable[[], Any]) -> Tuple[Any, Optional[Exception]]:
+        """Run a call with retries, returning (result, None) or (None, last_error)."""
+        try:
+            return self.call(fn), None
+        except Exception as e:
+            return None, e
+
+    async def run_async(self, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, Optional[Exception]]:
+        """Async variant of run()."""
+        try:
+            return await self.call_async(fn), None
+        except Exception as e:
+            return None, e
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for a provider.
+
+    Args:
+        provider: Provider name, e.g. "perplexity" or "gemini".
+
+    Returns:
+        The shared CircuitBreaker, created from CIRCUIT_BREAKER_CONFIG on first use.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name=provider,
+                failure_threshold=CIRCUIT_BREAKER_CONFIG["failure_threshold"],
+                reset_timeout=CIRCUIT_BREAKER_CONFIG["reset_timeout"],
+            )
+            _breakers[provider] = breaker
+        return breaker
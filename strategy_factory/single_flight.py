@@ -0,0 +1,154 @@
+"""
+Request coalescing ("single-flight") for upstream API calls.
+
+When several jobs issue the same request at the same time, only the
+first caller (the leader) makes the upstream call; the others (followers)
+wait for its outcome instead of spending money and rate-limit capacity on
+a duplicate. Flights are tracked per process and keyed by the caller,
+e.g. on the research cache key or a hash of a Gemini request.
+
+Flights are concurrent.futures.Future objects, so followers can wait on a
+leader from any thread or event loop.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from .config import COALESCE_API_REQUESTS
+
+
+class SingleFlight:
+    """
+    Thread-safe registry of in-flight requests.
+
+    Use claim() / resolve() / fail() when one call answers several keys
+    (such as a multi-query search), or do() / do_async() to wrap a single
+    call.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        """
+        Initialize the registry.
+
+        Args:
+            name: Registry name, e.g. the provider it coalesces calls for.
+            enabled: If False, every caller leads its own call.
+        """
+        self.name = name
+        self.enabled = enabled
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        # Stats
+        self.led = 0
+        self.coalesced = 0
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """
+        Join the flight for a key, starting one if none is in progress.
+
+        Args:
+            key: Request key.
+
+        Returns:
+            Tuple of (future, is_leader). A leader must later call resolve()
+            or fail() for the key; a follower waits on the future.
+        """
+        with self._lock:
+            flight = self._flights.get(key) if self.enabled else None
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+
+            flight = Future()
+            if self.enabled:
+                self._flights[key] = flight
+            self.led += 1
+            return flight, True
+
+    def _land(self, key: str, flight: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def resolve(self, key: str, flight: Future, result: Any) -> None:
+        """Publish a leader's result to its followers."""
+        self._land(key, flight)
+        if not flight.done():
+            flight.set_result(result)
+
+    def fail(self, key: str, flight: Future, error: BaseException) -> None:
+        """Publish a leader's failure to its followers."""
+        self._land(key, flight)
+        if not flight.done():
+            flight.set_exception(error)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn, or wait for an identical call already in flight.
+
+        Args:
+            key: Request key.
+            fn: Zero-argument function making the call.
+
+        Returns:
+            Tuple of (result, is_leader).
+        """
+        flight, leader = self.claim(key)
+        if not leader:
+            return flight.result(), False
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.fail(key, flight, e)
+            raise
+        self.resolve(key, flight, result)
+        return result, True
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async variant of do(); fn returns an awaitable call."""
+        flight, leader = self.claim(key)
+        if not leader:
+            return await asyncio.wrap_future(flight), False
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.fail(key, flight, e)
+            raise
+        self.resolve(key, flight, result)
+        return result, True
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing statistics."""
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "led": self.led,
+                "coalesced": self.coalesced,
+            }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """
+    Get the process-wide single-flight registry for an API.
+
+    Args:
+        name: Registry name, e.g. "perplexity" or "gemini".
+
+    Returns:
+        The shared SingleFlight, enabled per COALESCE_API_REQUESTS.
+    """
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = SingleFlight(name, enabled=COALESCE_API_REQUESTS)
+            _groups[name] = group
+        return group
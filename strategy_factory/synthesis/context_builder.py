@@ -172,6 +172,8 @@ class ContextBuilder:
             comp_info = f"### {comp.name}"
             if comp.description:
                 comp_info += f"\n{comp.description}"
+            if comp.market_position:
+                comp_info += f"\n**Market Position:** {comp.market_position}"
             if comp.ai_initiatives:
                 comp_info += "\n**AI Initiatives:**\n" + "\n".join(
                     f"- {i}" for i in comp.ai_initiatives[:3]
@@ -305,6 +307,37 @@ class ContextBuilder:
         
         return "\n\n".join(sections)
     
+    def _uses_competitors(self, deliverable_id: str) -> bool:
+        """Whether a deliverable's prompt includes the competitor section."""
+        return "competitor" in deliverable_id.lower() or "vendor" in deliverable_id.lower()
+    
+    def _uses_regulatory(self, deliverable_id: str) -> bool:
+        """Whether a deliverable's prompt includes the regulatory section."""
+        return any(word in deliverable_id.lower() for word in ["policy", "governance", "regulatory"])
+    
+    def research_inputs(self, deliverable_id: str, research: ResearchOutput) -> Dict[str, str]:
+        """
+        Get the research a deliverable's prompt is built from.
+        
+        Args:
+            deliverable_id: ID of the deliverable.
+            research: Research output.
+        
+        Returns:
+            Dict mapping ResearchOutput section name to its formatted text,
+            for the sections build_full_prompt includes.
+        """
+        inputs = {
+            "profile": self._format_company_profile(research),
+            "industry": self._format_industry_context(research),
+            "tech_landscape": self._format_tech_landscape(research),
+        }
+        if self._uses_competitors(deliverable_id):
+            inputs["competitors"] = self._format_competitors(research)
+        if self._uses_regulatory(deliverable_id):
+            inputs["regulatory"] = self._format_regulatory_context(research)
+        return inputs
+    
     def build_full_prompt(
         self,
         deliverable_id: str,
@@ -336,11 +369,11 @@ class ContextBuilder:
         ]
         
         # Add competitors if relevant
-        if "competitor" in deliverable_id.lower() or "vendor" in deliverable_id.lower():
+        if self._uses_competitors(deliverable_id):
             prompt_parts.append(f"\n{context['competitors']}")
         
         # Add regulatory context if relevant
-        if any(word in deliverable_id.lower() for word in ["policy", "governance", "regulatory"]):
+        if self._uses_regulatory(deliverable_id):
             prompt_parts.append(f"\n{context['regulatory_context']}")
         
         # Add TLDR knowledge
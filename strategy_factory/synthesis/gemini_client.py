@@ -5,15 +5,23 @@ Provides a robust interface for making Gemini API calls
 with automatic retries, exponential backoff, and cost tracking.
 """
 
+import hashlib
+import json
 import os
+import threading
 import time
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 
-from ..config import GEMINI_MODEL, GEMINI_REQUEST_DELAY, RETRY_CONFIG
+from ..config import GEMINI_MODEL, GEMINI_REQUEST_DELAY
+from ..credentials import CredentialPool, configured_keys, get_credential_pool
+from ..replay import ApiRecorder, get_api_recorder
+from ..retry_policy import RetryPolicy, get_circuit_breaker
+from ..single_flight import get_single_flight
 
 
 @dataclass
@@ -33,9 +41,14 @@ class GeminiClient:
     Wrapper for Gemini API with retry logic.
     
     Features:
-    - Automatic retry with exponential backoff
+    - Automatic retry with jittered exponential backoff for transient errors
+    - Fail-fast on invalid keys, exhausted quota and safety blocks, via a
+      circuit breaker shared by all Gemini clients
+    - Identical prompts in flight across clients coalesced into one call
+    - Optional record/replay of API calls for offline runs
     - Cost estimation and tracking
     - Rate limiting
+    - Optional pool of API keys, rate limited per key
     - Token counting
     """
     
@@ -47,17 +60,37 @@ class GeminiClient:
         self,
         api_key: Optional[str] = None,
         model_name: str = GEMINI_MODEL,
+        recorder: Optional[ApiRecorder] = None,
+        credentials: Optional[CredentialPool] = None,
     ):
         """
         Initialize the Gemini client.
         
         Args:
-            api_key: Gemini API key. If not provided, uses GEMINI_API_KEY env var.
+            api_key: Gemini API key. If not provided, uses GEMINI_API_KEY env var,
+                or the single key in GEMINI_API_KEYS. Not required when
+                replaying recorded fixtures.
             model_name: Model to use for synthesis.
+            recorder: API record/replay store. Defaults to the process-wide
+                recorder configured by API_REPLAY_CONFIG.
+            credentials: Pool of API keys to spread requests across, each with
+                its own rate limit. Defaults to the process-wide pool when
+                GEMINI_API_KEYS lists several keys and no api_key is given.
         """
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self.recorder = recorder or get_api_recorder()
+        if credentials is None and not api_key:
+            credentials = get_credential_pool("gemini")
+        self.credentials = credentials
+        self.api_key = api_key or (
+            credentials.keys[0] if credentials
+            else os.getenv("GEMINI_API_KEY") or next(iter(configured_keys("gemini")), None)
+        )
         if not self.api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
+            if not self.recorder.replaying:
+                raise ValueError(
+                    "GEMINI_API_KEY (or GEMINI_API_KEYS) not found in environment variables"
+                )
+            self.api_key = "replay"
         
         genai.configure(api_key=self.api_key)
         self.model_name = model_name
@@ -72,6 +105,56 @@ class GeminiClient:
         # Rate limiting
         self.last_request_time = 0.0
         self.min_request_interval = GEMINI_REQUEST_DELAY
+        
+        # Retries with a circuit breaker shared by all Gemini clients
+        self.retry_policy = RetryPolicy(get_circuit_breaker("gemini"))
+        
+        # Identical prompts in flight across clients share one call
+        self.single_flight = get_single_flight("gemini")
+        self.coalesced_requests = 0
+        
+        # Per-key API clients when using a credential pool
+        self._key_clients: Dict[str, glm.GenerativeServiceClient] = {}
+        self._key_clients_lock = threading.Lock()
+    
+    def _client_for_key(self, key: str) -> glm.GenerativeServiceClient:
+        """
+        Get the API client that sends requests with the given key.
+        
+        genai.configure() sets one key for the whole process, so each key
+        gets its own GenerativeServiceClient, created on first use.
+        """
+        with self._key_clients_lock:
+            if key not in self._key_clients:
+                self._key_clients[key] = glm.GenerativeServiceClient(
+                    client_options={"api_key": key}
+                )
+            return self._key_clients[key]
+    
+    def _generate_with_key(
+        self,
+        key: str,
+        prompt: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        max_output_tokens: int,
+    ) -> str:
+        """Generate text with the given API key, through that key's client."""
+        request = glm.GenerateContentRequest(
+            model=f"models/{self.model_name}",
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+            system_instruction=(
+                glm.Content(parts=[glm.Part(text=system_instruction)])
+                if system_instruction else None
+            ),
+            generation_config=glm.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            ),
+        )
+        response = self._client_for_key(key).generate_content(request=request)
+        # Same .text as GenerativeModel responses, which raises if blocked
+        return genai.types.GenerateContentResponse.from_response(response).text
     
     def _rate_limit(self) -> None:
         """Apply rate limiting between requests."""
@@ -110,73 +193,102 @@ class GeminiClient:
         Returns:
             SynthesisResult with generated content.
         """
-        max_retries = RETRY_CONFIG["max_retries"]
-        delay = RETRY_CONFIG["initial_delay"]
-        max_delay = RETRY_CONFIG["max_delay"]
-        backoff = RETRY_CONFIG["backoff_multiplier"]
-        
-        last_error = None
+        request_data = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "system_instruction": system_instruction,
+            "temperature": temperature,
+            "max_output_tokens": max_output_tokens,
+        }
         
-        for attempt in range(max_retries):
-            try:
-                self._rate_limit()
-                
-                # Configure generation
-                generation_config = genai.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_output_tokens,
+        def send(key: Optional[str]) -> Any:
+            # Configure generation
+            generation_config = genai.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            )
+            
+            # Create model with system instruction if provided
+            if system_instruction:
+                model = genai.GenerativeModel(
+                    self.model_name,
+                    system_instruction=system_instruction,
                 )
-                
-                # Create model with system instruction if provided
-                if system_instruction:
-                    model = genai.GenerativeModel(
-                        self.model_name,
-                        system_instruction=system_instruction,
+            else:
+                model = self.model
+            
+            def generate_text() -> str:
+                if key is not None:
+                    return self._generate_with_key(
+                        key, prompt, system_instruction, temperature, max_output_tokens
                     )
-                else:
-                    model = self.model
                 
-                # Generate response
+                # .text raises if the response was blocked
                 response = model.generate_content(
                     prompt,
                     generation_config=generation_config,
                 )
-                
-                # Extract content
-                content = response.text
-                
-                # Estimate tokens
-                input_tokens = self._count_tokens(prompt)
-                if system_instruction:
-                    input_tokens += self._count_tokens(system_instruction)
-                output_tokens = self._count_tokens(content)
-                
-                # Calculate cost
-                cost = self._estimate_cost(input_tokens, output_tokens)
-                
-                # Update tracking
-                self.total_cost += cost
-                self.total_input_tokens += input_tokens
-                self.total_output_tokens += output_tokens
-                self.request_count += 1
-                
-                return SynthesisResult(
-                    content=content,
-                    model_used=self.model_name,
-                    timestamp=datetime.now(),
-                    prompt_tokens=input_tokens,
-                    completion_tokens=output_tokens,
-                    cost_estimate=cost,
-                )
-                
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    print(f"Retry {attempt + 1}/{max_retries} after error: {e}")
-                    time.sleep(delay)
-                    delay = min(delay * backoff, max_delay)
+                return response.text
+            
+            return self.recorder.call(
+                "gemini",
+                request_data,
+                generate_text,
+                encode=lambda text: {"text": text},
+                decode=lambda payload: payload["text"],
+            )
+        
+        def request() -> Any:
+            if self.credentials is not None:
+                return self.credentials.call(send)
+            self._rate_limit()
+            return send(None)
+        
+        request_key = hashlib.sha256(
+            json.dumps(request_data, sort_keys=True).encode()
+        ).hexdigest()
+        (content, last_error), leader = self.single_flight.do(
+            request_key, lambda: self.retry_policy.run(request)
+        )
+        
+        if content is not None and not leader:
+            # Another job paid for this exact prompt; nothing was spent here
+            self.coalesced_requests += 1
+            return SynthesisResult(
+                content=content,
+                model_used=self.model_name,
+                timestamp=datetime.now(),
+                prompt_tokens=0,
+                completion_tokens=0,
+                cost_estimate=0.0,
+            )
+        
+        if content is not None:
+            # Estimate tokens
+            input_tokens = self._count_tokens(prompt)
+            if system_instruction:
+                input_tokens += self._count_tokens(system_instruction)
+            output_tokens = self._count_tokens(content)
+            
+            # Calculate cost
+            cost = self._estimate_cost(input_tokens, output_tokens)
+            
+            # Update tracking
+            self.total_cost += cost
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
+            self.request_count += 1
+            
+            return SynthesisResult(
+                content=content,
+                model_used=self.model_name,
+                timestamp=datetime.now(),
+                prompt_tokens=input_tokens,
+                completion_tokens=output_tokens,
+                cost_estimate=cost,
+            )
         
-        # All retries failed
+        # All retries failed, or the error was not retryable
         return SynthesisResult(
             content="",
             model_used=self.model_name,
@@ -310,6 +422,7 @@ Follow these formatting guidelines:
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
             "request_count": self.request_count,
+            "coalesced_requests": self.coalesced_requests,
             "avg_cost_per_request": round(
                 self.total_cost / max(1, self.request_count), 4
             ),
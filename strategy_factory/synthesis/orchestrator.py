@@ -8,7 +8,7 @@ manages context building, and tracks progress.
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Set
 
 from ..config import DELIVERABLES, OUTPUT_DIR
 from ..models import (
@@ -76,6 +76,8 @@ class SynthesisOrchestrator:
         # Track state
         self.generated_content: Dict[str, DeliverableContent] = {}
         self.errors: List[Dict[str, Any]] = []
+        # Formatted research sections each deliverable was generated from
+        self.research_inputs: Dict[str, Dict[str, str]] = {}
     
     def synthesize(
         self,
@@ -137,12 +139,7 @@ class SynthesisOrchestrator:
                 )
                 
                 if content and not content.error:
-                    self.generated_content[deliverable_id] = content
-                    # Register for dependency tracking
-                    self.context_builder.register_deliverable(
-                        deliverable_id,
-                        content.content
-                    )
+                    self._store_deliverable(deliverable_id, content, research)
                 else:
                     self._record_error(
                         deliverable_id,
@@ -161,6 +158,99 @@ class SynthesisOrchestrator:
             total_cost=self.gemini_client.total_cost,
         )
     
+    def regenerate_stale(
+        self,
+        company_input: CompanyInput,
+        research: ResearchOutput,
+        updated_sections: Set[str],
+    ) -> List[str]:
+        """
+        Regenerate the deliverables built from research that has since changed.
+        
+        Used when research is patched after synthesis, e.g. once background
+        deep research lands. A deliverable is regenerated when one of the
+        updated sections it was built from now reads differently, or when a
+        deliverable it depends on was regenerated. If regeneration fails the
+        earlier version is kept.
+        
+        Args:
+            company_input: Company input data.
+            research: Patched research output.
+            updated_sections: Names of the ResearchOutput sections that changed.
+        
+        Returns:
+            IDs of the regenerated deliverables, in generation order.
+        """
+        regenerated: List[str] = []
+        if not updated_sections:
+            return regenerated
+        
+        generated = [
+            d for level in self.GENERATION_ORDER for d in level
+            if d in self.generated_content
+        ]
+        
+        for index, deliverable_id in enumerate(generated):
+            if not self._is_stale(deliverable_id, research, updated_sections, regenerated):
+                continue
+            
+            self._report_progress(f"Regenerating {deliverable_id}", index / len(generated))
+            content = self._generate_deliverable(
+                deliverable_id,
+                company_input,
+                research,
+            )
+            
+            if content and not content.error:
+                self._store_deliverable(deliverable_id, content, research)
+                regenerated.append(deliverable_id)
+            else:
+                print(
+                    f"Warning: Could not regenerate {deliverable_id}, keeping earlier version: "
+                    f"{content.error if content else 'Unknown error'}"
+                )
+        
+        self._report_progress("Regeneration complete", 1.0)
+        return regenerated
+    
+    def _is_stale(
+        self,
+        deliverable_id: str,
+        research: ResearchOutput,
+        updated_sections: Set[str],
+        regenerated: List[str],
+    ) -> bool:
+        """Check whether a deliverable's research inputs or dependencies changed."""
+        dependencies = DELIVERABLES.get(deliverable_id, {}).get("dependencies", [])
+        if "ALL_MARKDOWN" in dependencies and regenerated:
+            return True
+        if any(dep in regenerated for dep in dependencies):
+            return True
+        
+        used = self.research_inputs.get(deliverable_id, {})
+        current = self.context_builder.research_inputs(deliverable_id, research)
+        return any(
+            used.get(section) != current[section]
+            for section in updated_sections if section in current
+        )
+    
+    def _store_deliverable(
+        self,
+        deliverable_id: str,
+        content: DeliverableContent,
+        research: ResearchOutput,
+    ) -> None:
+        """Keep a generated deliverable and the research it was built from."""
+        self.generated_content[deliverable_id] = content
+        self.research_inputs[deliverable_id] = self.context_builder.research_inputs(
+            deliverable_id, research
+        )
+        # Register for dependency tracking
+        self.context_builder.register_deliverable(
+            deliverable_id,
+            content.content
+        )
+    
     def _generate_deliverable(
         self,
         deliverable_id: str,
@@ -6,9 +6,18 @@ recommendations are current and forward-looking.
 """
 
 from datetime import datetime, timedelta
+from enum import Enum
 from typing import Dict
 
 
+class TemporalGranularity(str, Enum):
+    """How finely a time-dependent value changes (used for cache bucketing)."""
+    DAY = "day"
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
+
+
 class TemporalContext:
     """
     Provides consistent temporal context injection across all prompts and queries.
@@ -100,6 +109,24 @@ class TemporalContext:
 
         return result
 
+    def get_bucket(self, granularity: TemporalGranularity) -> str:
+        """
+        Get the date bucket the reference date falls in.
+
+        Args:
+            granularity: Bucket size.
+
+        Returns:
+            Bucket label, e.g. "2025-03-14", "2025-03", "2025-Q1" or "2025".
+        """
+        if granularity == TemporalGranularity.DAY:
+            return self.now.strftime("%Y-%m-%d")
+        if granularity == TemporalGranularity.MONTH:
+            return self.now.strftime("%Y-%m")
+        if granularity == TemporalGranularity.QUARTER:
+            return f"{self.now.year}-Q{(self.now.month - 1) // 3 + 1}"
+        return str(self.now.year)
+
     def get_recency_filter(self, query_type: str) -> str:
         """
         Get appropriate Perplexity recency filter for query type.
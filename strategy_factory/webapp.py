@@ -108,6 +108,15 @@ def get_error_details(exception, phase="unknown"):
             "technical": f"{error_type}: {exception}"
         }
 
+    # Provider circuit breaker open after repeated failures
+    if "circuit open" in error_str:
+        return {
+            "title": "Serviço de API Indisponível",
+            "message": "O serviço de API falhou repetidamente e as chamadas foram suspensas temporariamente.",
+            "solution": "Aguarde cerca de um minuto e tente novamente. Se persistir, verifique o status do Perplexity ou do Google Gemini.",
+            "technical": f"{error_type}: {exception}"
+        }
+
     # Network errors
     if "connection" in error_str or "timeout" in error_str or "network" in error_str:
         return {
@@ -2551,13 +2560,20 @@ def run_pipeline(job_id: str, company_name: str, context: str, mode: str, new_ve
             logger.info(f"Starting new research phase (continue_mode={continue_mode}, new_version={new_version})")
             tracker.start_phase("research")
 
+            # Query cache is global (RESEARCH_CACHE_DIR), so repeat companies,
+            # new versions and same-industry analyses reuse earlier results
             research_orchestrator = ResearchOrchestrator(
                 mode=research_mode,
-                cache_dir=Path(tracker.output_dir),
                 progress_callback=research_callback,
             )
 
             research_output = research_orchestrator.research(company_input)
+            cache_report = research_orchestrator.get_cache_report()
+            logger.info(
+                f"Research cache: {cache_report['hits']} hits ({cache_report['stale_hits']} stale), "
+                f"{cache_report['misses']} misses "
+                f"(hit rate {cache_report['hit_rate']:.0%}, saved ~${cache_report['estimated_savings']:.4f})"
+            )
             tracker.save_research_output(research_output)
             research_orchestrator.save_research_cache(Path(tracker.output_dir))
             tracker.complete_phase("research", f"Completed research with {len(research_orchestrator.results)} queries")
@@ -2855,9 +2871,9 @@ def main():
 
     # Check for API keys
     missing_keys = []
-    if not os.getenv("PERPLEXITY_API_KEY"):
+    if not (os.getenv("PERPLEXITY_API_KEY") or os.getenv("PERPLEXITY_API_KEYS")):
         missing_keys.append("PERPLEXITY_API_KEY")
-    if not os.getenv("GEMINI_API_KEY"):
+    if not (os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEYS")):
         missing_keys.append("GEMINI_API_KEY")
 
     if missing_keys:
@@ -0,0 +1,29 @@
+"""Tests for API key pooling in strategy_factory.credentials."""
+
+from strategy_factory.credentials import CredentialPool
+from strategy_factory.research.rate_limiter import TokenBucketRateLimiter
+
+
+def test_shared_bucket_reports_other_processes_reservations(tmp_path):
+    """available() reads a lock-file bucket's shared state, not a local copy."""
+    lock_file = tmp_path / "bucket.lock"
+    ours = TokenBucketRateLimiter(0.01, burst=3, lock_file=lock_file)
+    theirs = TokenBucketRateLimiter(0.01, burst=3, lock_file=lock_file)
+
+    assert ours.available() == 3
+    theirs.reserve()
+    theirs.reserve()
+    assert round(ours.available()) == 1
+
+
+def test_pools_sharing_lock_files_balance_on_shared_capacity(tmp_path):
+    """A pool picks the key other processes have used least, not the one it used least."""
+    lock_file = tmp_path / "pool.lock"
+    ours = CredentialPool("test", ["key-a", "key-b"], 0.01, burst=3, lock_file=lock_file)
+    theirs = CredentialPool("test", ["key-a", "key-b"], 0.01, burst=3, lock_file=lock_file)
+
+    # Another process has spent most of key-a's burst
+    theirs._keys[0].limiter.reserve()
+    theirs._keys[0].limiter.reserve()
+
+    assert ours.acquire() == "key-b"
@@ -0,0 +1,58 @@
+"""Tests for query result serialization in strategy_factory.models."""
+
+from datetime import datetime
+
+from strategy_factory.models import (
+    QueryResult,
+    SearchResult,
+    compact_query_results,
+    expand_query_results,
+)
+from strategy_factory.research.result_store import ResearchResultStore
+
+
+def make_result(query, *results):
+    """Build a QueryResult holding the given search results."""
+    return QueryResult(
+        query=query,
+        model_used="sonar",
+        results=list(results),
+        result_count=len(results),
+        timestamp=datetime(2025, 1, 1),
+    )
+
+
+def test_results_without_url_keep_their_own_source():
+    """URL-less results are not merged onto one another's title and date."""
+    first = SearchResult(title="Annual report", url="", snippet="Revenue grew", date="2024-03-01")
+    second = SearchResult(title="Press release", url="", snippet="New CEO named", date="2024-06-01")
+    results = [make_result("overview", first), make_result("news", second)]
+
+    data = compact_query_results(results)
+    expanded = expand_query_results(data)
+
+    assert len(data["sources"]) == 2
+    assert expanded[0]["results"][0]["title"] == "Annual report"
+    assert expanded[1]["results"][0]["title"] == "Press release"
+    assert expanded[1]["results"][0]["date"] == "2024-06-01"
+
+
+def test_results_with_same_url_share_a_source():
+    """Results for the same page are still deduplicated."""
+    first = SearchResult(title="Acme", url="https://www.acme.com/about/", snippet="Founded 1990")
+    second = SearchResult(title="Acme", url="http://acme.com/about", snippet="HQ in Ohio")
+    data = compact_query_results([make_result("a", first), make_result("b", second)])
+
+    assert len(data["sources"]) == 1
+    assert len(data["snippets"]) == 2
+
+
+def test_result_store_does_not_merge_results_without_url():
+    """The result store keeps each URL-less result's own attribution."""
+    store = ResearchResultStore()
+    first = store.add(make_result("a", SearchResult(title="Report", url="", snippet="Same text")))
+    second = store.add(make_result("b", SearchResult(title="Blog", url="", snippet="Same text")))
+
+    assert first.results[0].title == "Report"
+    assert second.results[0].title == "Blog"
+    assert store.pages == []
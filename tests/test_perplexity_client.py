@@ -0,0 +1,49 @@
+"""Tests for request hedging in strategy_factory.research.perplexity_client."""
+
+import threading
+import time
+
+from strategy_factory.config import PERPLEXITY_HEDGING, PerplexityModel
+from strategy_factory.research import perplexity_client
+from strategy_factory.research.hedging import HedgePolicy
+from strategy_factory.research.model_stats import ModelStats
+from strategy_factory.research.perplexity_client import PerplexityClient
+
+
+def request_threads():
+    """Count the threads running hedged requests and their duplicates."""
+    return sum(
+        thread.name.startswith(("perplexity-request", "perplexity-hedge"))
+        for thread in threading.enumerate()
+    )
+
+
+def test_hedged_requests_use_bounded_threads(monkeypatch):
+    """Originals that lose to their duplicate do not pile up as extra threads."""
+    monkeypatch.setitem(PERPLEXITY_HEDGING, "request_workers", 3)
+    monkeypatch.setitem(PERPLEXITY_HEDGING, "workers", 2)
+    monkeypatch.setattr(perplexity_client, "_request_executor", None)
+    monkeypatch.setattr(perplexity_client, "_hedge_executor", None)
+
+    stats = ModelStats()
+    client = PerplexityClient(
+        api_key="test",
+        enable_cache=False,
+        model_stats=stats,
+        hedge_policy=HedgePolicy(stats=stats, enabled=True, max_rate=1.0, min_delay=0.0),
+    )
+
+    def attempt():
+        # Every original is slow, so every duplicate wins
+        if threading.current_thread().name.startswith("perplexity-request"):
+            time.sleep(0.3)
+            return "original", None
+        return "hedge", None
+
+    peak = 0
+    for _ in range(10):
+        client.hedge_policy.delay(PerplexityModel.SONAR)
+        assert client._run_hedged(attempt, 0.01, PerplexityModel.SONAR) == ("hedge", None)
+        peak = max(peak, request_threads())
+
+    assert peak <= 5
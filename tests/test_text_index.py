@@ -0,0 +1,22 @@
+"""Tests for keyword matching in strategy_factory.research.text_index."""
+
+from strategy_factory.research.text_index import KeywordMatcher
+
+
+def test_matches_plain_substring_checks():
+    """Overlapping, nested and suffix keywords are all found, as `in` would."""
+    keywords = ["machine learning", "learning", "earn", "ai", "chain", "cloud"]
+    matcher = KeywordMatcher(keywords)
+    text = "we use machine learning and supply chain tools"
+
+    assert matcher.find_all(text) == {k for k in keywords if k in text}
+    assert matcher.search(text)
+    assert not matcher.search("on premises only")
+
+
+def test_empty_keyword_list_matches_nothing():
+    """A matcher without keywords never matches."""
+    matcher = KeywordMatcher([])
+
+    assert matcher.find_all("anything") == set()
+    assert not matcher.search("anything")